@@ -0,0 +1 @@
+"""Performance benchmarks over synthetic repositories and metrics logs."""
@@ -0,0 +1,128 @@
+"""Run the benchmark suite: ``python -m benchmarks``.
+
+Results are written as JSON and compared with a stored baseline of the same
+size; save one with ``--save-baseline`` on the machine the comparisons will
+run on.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from .suite import BENCHMARKS, SIZES, Context, measure
+
+ROOT = Path(__file__).resolve().parent
+RESULTS_DIR = ROOT / "results"
+
+
+def git_commit() -> str | None:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                            text=True, check=False, cwd=ROOT)
+    return result.stdout.strip() or None
+
+
+def compare(results: dict, baseline: dict) -> dict[str, float]:
+    """Percent change of each benchmark's median wall time against the baseline.
+
+    Only benchmarks present in both with a non-zero baseline are compared.
+    """
+    changes = {}
+    for name, result in results.items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if before and before["wall_s"]:
+            changes[name] = round((result["wall_s"] - before["wall_s"]) / before["wall_s"] * 100, 1)
+    return changes
+
+
+def main():
+    """Generate the workload, run the selected benchmarks and compare with the baseline."""
+    parser = argparse.ArgumentParser(description="Benchmark ai-metrics analyzers, exporter and collectors")
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="Workload size")
+    parser.add_argument("--only", type=str, default=None,
+                        help="Comma-separated benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark")
+    parser.add_argument("--output", type=str, default=None,
+                        help="Results file (default: benchmarks/results/<size>.json)")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Baseline to compare with (default: benchmarks/results/baseline-<size>.json)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Also store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Percent slowdown of a median reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any benchmark regressed")
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for benchmark in BENCHMARKS:
+            print(f"{benchmark.name} ({benchmark.unit})")
+        return 0
+
+    selected = BENCHMARKS
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(",")}
+        unknown = wanted - {benchmark.name for benchmark in BENCHMARKS}
+        if unknown:
+            print(f"Unknown benchmarks: {', '.join(sorted(unknown))}", file=sys.stderr)
+            return 1
+        selected = [benchmark for benchmark in BENCHMARKS if benchmark.name in wanted]
+
+    workload = SIZES[args.size]
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{args.size}.json"
+    baseline_path = Path(args.baseline) if args.baseline else RESULTS_DIR / f"baseline-{args.size}.json"
+
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        context = Context(workload, Path(temp_dir))
+        for benchmark in selected:
+            print(f"Running {benchmark.name}...", file=sys.stderr)
+            results[benchmark.name] = measure(benchmark, context, args.repeat)
+
+    entry = {
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "size": args.size,
+        "repeat": args.repeat,
+        "workload": asdict(workload),
+        "benchmarks": results,
+    }
+
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else None
+    changes = compare(results, baseline) if baseline else {}
+    regressions = [name for name, percent in changes.items() if percent > args.threshold]
+    entry["baseline"] = {"commit": baseline.get("commit"), "changes": changes} if baseline else None
+
+    print(f"{'benchmark':<18} {'wall':>9} {'cpu':>9} {'throughput':>18} {'change':>8}")
+    for name, result in results.items():
+        change = f"{changes[name]:+.0f}%" if name in changes else ""
+        throughput = f"{result['per_second']:.0f} {result['unit']}/s" if result["per_second"] else ""
+        print(f"{name:<18} {result['wall_s']:>8.3f}s {result['cpu_s']:>8.3f}s "
+              f"{throughput:>18} {change:>8}")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(entry, indent=2) + "\n")
+    print(f"Results written to {output}", file=sys.stderr)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(entry, indent=2) + "\n")
+        print(f"Baseline saved to {baseline_path}", file=sys.stderr)
+
+    if regressions:
+        print(f"Slower than the baseline by more than {args.threshold:g}%: {', '.join(regressions)}",
+              file=sys.stderr)
+        if args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
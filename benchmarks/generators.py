@@ -0,0 +1,199 @@
+"""Synthetic git repositories and metrics logs for benchmarks.
+
+Everything is generated locally from a seed, so the same workload can be
+rebuilt offline on any machine.
+"""
+
+import json
+import random
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from ai_code_metrics.storage import API_USAGE, TIMING
+
+# Commit message trailers recognized by CommitPatternMatcher, one per assistant
+AI_SIGNATURES = [
+    "🤖 Generated with [Claude Code](https://claude.ai/code)\n\n"
+    "Co-Authored-By: Claude <noreply@anthropic.com>",
+    "Co-authored-by: Copilot <copilot@github.com>",
+    "Co-authored-by: Cursor <cursor@cursor.com>",
+    "AI-assisted refactoring",
+]
+
+AUTHORS = [("Alice Example", "alice@example.com"), ("Bob Example", "bob@example.com"),
+           ("Carol Example", "carol@example.com"), ("Dan Example", "dan@example.com")]
+
+WORDS = ["parse", "cache", "index", "render", "config", "metrics", "report", "token",
+         "commit", "handler", "buffer", "window", "sketch", "series", "request", "result"]
+
+MODELS = ["claude-3-opus", "claude-3-sonnet", "gpt-4", "gpt-3.5-turbo"]
+
+
+@dataclass
+class RepoSpec:
+    """Shape of a synthetic repository."""
+
+    commits: int = 200
+    files_per_commit: int = 3
+    lines_per_file: int = 40
+    ai_share: float = 0.3
+    # Every ``giant_every``-th commit rewrites ``giant_files`` files (0: never)
+    giant_every: int = 50
+    giant_files: int = 200
+    # Distinct files commits are spread over
+    file_pool: int = 500
+    # Commits are spread evenly over this many days before now
+    days: int = 30
+    seed: int = 0
+
+
+@dataclass
+class LogSpec:
+    """Volume of synthetic timing and API usage logs."""
+
+    timing_records: int = 20_000
+    api_records: int = 10_000
+    functions: int = 50
+    ai_share: float = 0.5
+    days: int = 30
+    seed: int = 0
+
+
+def _code(rng: random.Random, lines: int, ai_generated: bool) -> str:
+    body = []
+    for i in range(lines):
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}"
+        body.append(f"{name}_{i} = {rng.choice(WORDS)}({rng.randrange(1000)})")
+    if ai_generated:
+        body.insert(0, "# AI-generated")
+    return "\n".join(body) + "\n"
+
+
+def _data(text: str) -> bytes:
+    encoded = text.encode()
+    return b"data %d\n%s\n" % (len(encoded), encoded)
+
+
+def generate_repo(path: Path, spec: RepoSpec) -> Path:
+    """Create a git repository at ``path`` holding ``spec.commits`` commits.
+
+    History is written with ``git fast-import``, which is much faster than
+    committing through a working tree. The working tree is left empty, as
+    the analyzers only read history.
+    """
+    rng = random.Random(spec.seed)
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q", str(path)], check=True)
+    subprocess.run(["git", "-C", str(path), "symbolic-ref", "HEAD", "refs/heads/main"], check=True)
+
+    now = int(time.time())
+    step = max(1, spec.days * 86400 // max(1, spec.commits))
+    start = now - step * spec.commits
+    stream = []
+    for i in range(spec.commits):
+        ai_assisted = rng.random() < spec.ai_share
+        giant = spec.giant_every and i % spec.giant_every == spec.giant_every - 1
+        name, email = rng.choice(AUTHORS)
+        subject = f"Update {rng.choice(WORDS)} {rng.choice(WORDS)} handling"
+        message = f"{subject}\n\n{rng.choice(AI_SIGNATURES)}\n" if ai_assisted else f"{subject}\n"
+        timestamp = start + i * step
+        stream.append(b"commit refs/heads/main\n")
+        stream.append(b"mark :%d\n" % (i + 1))
+        stream.append(f"author {name} <{email}> {timestamp} +0000\n".encode())
+        stream.append(f"committer {name} <{email}> {timestamp} +0000\n".encode())
+        stream.append(_data(message))
+        if i:
+            stream.append(b"from :%d\n" % i)
+        files = spec.giant_files if giant else spec.files_per_commit
+        for file_number in rng.sample(range(spec.file_pool), min(files, spec.file_pool)):
+            stream.append(f"M 100644 inline src/module_{file_number % 20}/file_{file_number}.py\n".encode())
+            stream.append(_data(_code(rng, spec.lines_per_file, ai_assisted and rng.random() < 0.5)))
+        stream.append(b"\n")
+
+    subprocess.run(["git", "-C", str(path), "fast-import", "--quiet"],
+                   input=b"".join(stream), check=True)
+    return path
+
+
+def generate_logs(metrics_dir: Path, spec: LogSpec) -> dict[str, int]:
+    """Write daily timing and API usage logs to ``metrics_dir``.
+
+    Records are spread evenly over the last ``spec.days`` days and written
+    in timestamp order, one file per kind and day as ``JsonlStore`` would.
+    About half of the API calls carry the span id of a timing record.
+    """
+    rng = random.Random(spec.seed)
+    metrics_dir = Path(metrics_dir)
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    start = now - spec.days * 86400
+
+    span_ids = []
+    timing = []
+    for i in range(spec.timing_records):
+        timestamp = start + (now - start) * i / max(1, spec.timing_records)
+        duration = rng.lognormvariate(0, 1)
+        span_id = f"{i:016x}"
+        span_ids.append((span_id, timestamp, duration))
+        timing.append({
+            "function_name": f"task_{rng.randrange(spec.functions)}",
+            "start_time": timestamp - duration,
+            "ai_assisted": rng.random() < spec.ai_share,
+            "iterations": 0,
+            "success": rng.random() < 0.95,
+            "span_id": span_id,
+            "model": rng.choice(MODELS),
+            "duration": duration,
+            "timestamp": timestamp,
+        })
+
+    api = []
+    for i in range(spec.api_records):
+        record = {
+            "model": rng.choice(MODELS),
+            "provider": "anthropic",
+            "input_tokens": rng.randrange(100, 4000),
+            "output_tokens": rng.randrange(50, 2000),
+            "total_cost": round(rng.random() / 10, 4),
+            "function": f"task_{rng.randrange(spec.functions)}",
+        }
+        if span_ids and rng.random() < 0.5:
+            span_id, timestamp, duration = rng.choice(span_ids)
+            record.update(span_id=span_id, timestamp=timestamp - duration * rng.random(),
+                          duration=duration / 2)
+        else:
+            record.update(timestamp=start + (now - start) * i / max(1, spec.api_records),
+                          duration=rng.lognormvariate(0, 1))
+        api.append(record)
+    api.sort(key=lambda record: record["timestamp"])
+
+    for kind, records in ((TIMING, timing), (API_USAGE, api)):
+        days: dict[str, list[str]] = {}
+        for record in records:
+            day = time.strftime("%Y-%m-%d", time.localtime(record["timestamp"]))
+            days.setdefault(day, []).append(json.dumps(record))
+        for day, lines in days.items():
+            (metrics_dir / f"{kind}_{day}.jsonl").write_text("\n".join(lines) + "\n")
+    return {TIMING: len(timing), API_USAGE: len(api)}
+
+
+def generate_snippets(count: int, lines: int = 30, seed: int = 0) -> list[str]:
+    """Code snippets for the anonymizer."""
+    rng = random.Random(seed)
+    return [_code(rng, lines, False) for _ in range(count)]
+
+
+def generate_messages(count: int, ai_share: float = 0.3, seed: int = 0) -> list[str]:
+    """Commit messages, ``ai_share`` of them signed by an assistant."""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randrange(5, 60)))
+        message = f"Update {rng.choice(WORDS)}\n\n{body}\n"
+        if rng.random() < ai_share:
+            message += f"\n{rng.choice(AI_SIGNATURES)}\n"
+        messages.append(message)
+    return messages
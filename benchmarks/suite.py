@@ -0,0 +1,233 @@
+"""Benchmark cases over a generated workload.
+
+Each case prepares its state once, outside the timing, and then runs a
+function returning the number of items it processed, so results can be
+reported as throughput as well as time.
+"""
+
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ai_code_metrics.storage import API_USAGE, TIMING, JsonlStore
+from ai_code_metrics.storage.jsonl import log_files
+
+from .generators import (
+    LogSpec,
+    RepoSpec,
+    generate_logs,
+    generate_messages,
+    generate_repo,
+    generate_snippets,
+)
+
+# Unknown to tiktoken, so token estimates never try to download an encoding
+OFFLINE_MODEL = 'benchmark-model'
+
+
+@dataclass
+class Workload:
+    """Sizes of everything a benchmark run generates."""
+
+    repo: RepoSpec = field(default_factory=RepoSpec)
+    logs: LogSpec = field(default_factory=LogSpec)
+    messages: int = 20_000
+    snippets: int = 2_000
+    scrapes: int = 200
+    decorated_calls: int = 5_000
+
+
+SIZES = {
+    'small': Workload(RepoSpec(commits=100, giant_every=50, giant_files=100),
+                      LogSpec(timing_records=5_000, api_records=2_500),
+                      messages=5_000, snippets=500, scrapes=50, decorated_calls=1_000),
+    'medium': Workload(),
+    'large': Workload(RepoSpec(commits=2_000, giant_every=200, giant_files=1_000, file_pool=2_000),
+                      LogSpec(timing_records=200_000, api_records=100_000),
+                      messages=200_000, snippets=20_000, scrapes=1_000, decorated_calls=50_000),
+}
+
+
+@dataclass
+class Benchmark:
+    """A named case: ``setup`` builds the state ``run`` works on."""
+
+    name: str
+    setup: Callable[['Context'], Any]
+    run: Callable[[Any], int]
+    unit: str = 'items'
+
+
+class Context:
+    """The generated workload, each part built on first use."""
+
+    def __init__(self, workload: Workload, scratch: Path):
+        self.workload = workload
+        self.scratch = Path(scratch)
+        self._repo: Path | None = None
+        self._metrics_dir: Path | None = None
+
+    @property
+    def repo(self) -> Path:
+        if self._repo is None:
+            self._repo = generate_repo(self.scratch / 'repo', self.workload.repo)
+        return self._repo
+
+    @property
+    def metrics_dir(self) -> Path:
+        if self._metrics_dir is None:
+            self._metrics_dir = self.scratch / 'metrics'
+            generate_logs(self._metrics_dir, self.workload.logs)
+        return self._metrics_dir
+
+    def temp_dir(self) -> Path:
+        return Path(tempfile.mkdtemp(dir=self.scratch))
+
+
+def _commit_analyzer(context: Context):
+    from ai_code_metrics.analyzers import CommitAnalyzer
+    return CommitAnalyzer(str(context.repo))
+
+
+def _git_metrics(context: Context):
+    from ai_code_metrics.analyzers import GitMetricsAnalyzer
+    return GitMetricsAnalyzer(str(context.repo)), context.workload.repo.days + 1
+
+
+def _pattern_matching(context: Context):
+    from ai_code_metrics.analyzers import CommitPatternMatcher
+    return CommitPatternMatcher, generate_messages(context.workload.messages)
+
+
+def _match_all(state) -> int:
+    matcher, messages = state
+    for message in messages:
+        matcher.extract_ai_data(message)
+    return len(messages)
+
+
+def _roi(context: Context):
+    from ai_code_metrics.analyzers import ROICalculator
+    metrics_dir = context.metrics_dir
+    return (ROICalculator(hourly_rate=75.0, improvement_factor=0.3),
+            log_files(metrics_dir, TIMING), log_files(metrics_dir, API_USAGE),
+            context.workload.logs.days + 1)
+
+
+def _calculate_roi(state) -> int:
+    calculator, timing_files, api_files, days = state
+    return calculator.calculate_roi(timing_files, period_days=days,
+                                    api_usage_files=api_files)['metrics_analyzed']
+
+
+def _fresh_exporter(context: Context, metrics_dir: Path):
+    from ai_code_metrics.exporters.prometheus_exporter import MetricsExporter
+    # A tenant exporter has a registry of its own, leaving the default one alone
+    return MetricsExporter(metrics_dir, checkpoint_path=context.temp_dir() / 'checkpoint.json',
+                           tenant='benchmark')
+
+
+def _exporter_ingest(context: Context):
+    metrics_dir = context.metrics_dir  # generated before timing starts
+    return lambda: _fresh_exporter(context, metrics_dir)
+
+
+def _ingest(make_exporter) -> int:
+    return make_exporter().update_metrics()
+
+
+def _exporter_scrape(context: Context):
+    from prometheus_client import generate_latest
+    exporter = _fresh_exporter(context, context.metrics_dir)
+    exporter.update_metrics()
+    return generate_latest, exporter.metrics.registry, context.workload.scrapes
+
+
+def _scrape(state) -> int:
+    generate_latest, registry, scrapes = state
+    for _ in range(scrapes):
+        generate_latest(registry)
+    return scrapes
+
+
+def _anonymizer(context: Context):
+    from ai_code_metrics.security import CodeAnonymizer
+    return CodeAnonymizer('benchmark'), generate_snippets(context.workload.snippets)
+
+
+def _anonymize(state) -> int:
+    anonymizer, snippets = state
+    anonymizer.anonymize_batch(snippets)
+    return len(snippets)
+
+
+def _timing_decorator(context: Context):
+    from ai_code_metrics.collectors import MetricsCollector
+    collector = MetricsCollector(store=JsonlStore(context.temp_dir()), sink=None)
+
+    @collector.track_function(ai_assisted=True)
+    def task(value):
+        return value
+
+    return task, context.workload.decorated_calls
+
+
+def _api_decorator(context: Context):
+    from ai_code_metrics.collectors import APIUsageTracker
+    tracker = APIUsageTracker(store=JsonlStore(context.temp_dir()), sink=None)
+
+    class Response:
+        usage = {'input_tokens': 120, 'output_tokens': 40}
+
+    @tracker.track_api_call(model=OFFLINE_MODEL)
+    def call(messages):
+        return Response()
+
+    def task(value):
+        tracker.usage_log.clear()
+        return call(messages=[{'role': 'user', 'content': 'benchmark'}])
+
+    return task, context.workload.decorated_calls
+
+
+def _call_repeatedly(state) -> int:
+    task, calls = state
+    for i in range(calls):
+        task(i)
+    return calls
+
+
+BENCHMARKS = [
+    Benchmark('commit_analyzer', _commit_analyzer, lambda a: len(a.analyze_commits()), 'commits'),
+    Benchmark('git_metrics', _git_metrics, lambda s: len(s[0].analyze_recent_commits(s[1])), 'commits'),
+    Benchmark('pattern_matching', _pattern_matching, _match_all, 'messages'),
+    Benchmark('roi', _roi, _calculate_roi, 'records'),
+    Benchmark('exporter_ingest', _exporter_ingest, _ingest, 'records'),
+    Benchmark('exporter_scrape', _exporter_scrape, _scrape, 'scrapes'),
+    Benchmark('anonymizer', _anonymizer, _anonymize, 'snippets'),
+    Benchmark('timing_decorator', _timing_decorator, _call_repeatedly, 'calls'),
+    Benchmark('api_decorator', _api_decorator, _call_repeatedly, 'calls'),
+]
+
+
+def measure(benchmark: Benchmark, context: Context, repeat: int) -> dict[str, Any]:
+    """Median wall and CPU time of ``repeat`` runs, and throughput at the median."""
+    state = benchmark.setup(context)
+    runs = []
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        items = benchmark.run(state)
+        runs.append((time.perf_counter() - wall, time.process_time() - cpu, items))
+    runs.sort()
+    wall, cpu, items = runs[len(runs) // 2]
+    return {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(cpu, 4),
+        'min_wall_s': round(runs[0][0], 4),
+        'items': items,
+        'unit': benchmark.unit,
+        'per_second': round(items / wall, 1) if wall else None,
+    }
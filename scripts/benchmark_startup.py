@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Benchmark cold-start time of each ai-metrics subcommand.
+
+Each subcommand is run in a fresh interpreter against a small scratch
+metrics directory, with HOME pointed elsewhere so no user config is read.
+Wall time is the median of several runs; one extra run under
+``python -X importtime`` reports the total import time and the packages
+that cost the most. Results are appended to a JSON lines history and
+compared with the previous entry.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ai_code_metrics.storage import API_USAGE, TIMING, JsonlStore
+
+DEFAULT_HISTORY = Path(__file__).resolve().parent.parent / "benchmarks" / "results" / "startup.jsonl"
+
+# Runs the CLI the way the ai-metrics entry point does
+CLI = "import sys; from ai_code_metrics.cli import main; sys.argv[0] = 'ai-metrics'; sys.exit(main())"
+
+
+def cases(scratch: Path) -> dict[str, list[str]]:
+    """Arguments for each subcommand, doing as little work as possible."""
+    metrics = str(scratch / "metrics")
+    return {
+        "help": ["--help"],
+        "analyze": ["analyze", "--repo-path", str(scratch / "repo"), "--days", "1",
+                    "--output", str(scratch / "report.json")],
+        "roi": ["roi", "--metrics-dir", metrics, "--days", "1"],
+        "query": ["query", "--backend", "jsonl", "--path", metrics],
+        "migrate": ["migrate", "--metrics-dir", metrics, "--db", str(scratch / "metrics.db")],
+        "backfill": ["backfill", "--metrics-dir", metrics, "--output-dir", str(scratch / "blocks")],
+        "compact": ["compact", "--metrics-dir", metrics, "--compress-after-days", "1000"],
+        # Serving never returns, so export is measured up to the imports it needs
+        "export": [],
+    }
+
+
+def command(name: str, args: list[str], importtime: bool = False) -> list[str]:
+    flags = ["-X", "importtime"] if importtime else []
+    if name == "export":
+        code = "import ai_code_metrics.cli, ai_code_metrics.exporters.prometheus_exporter"
+        return [sys.executable, *flags, "-c", code]
+    return [sys.executable, *flags, "-c", CLI, *args]
+
+
+def prepare(scratch: Path) -> None:
+    """Create the scratch metrics directory and git repository."""
+    store = JsonlStore(scratch / "metrics")
+    now = time.time()
+    store.append(TIMING, {"function_name": "generate", "duration": 1.5, "timestamp": now})
+    store.append(API_USAGE, {"model": "gpt-4", "total_cost": 0.01, "duration": 1.4, "timestamp": now})
+    repo = scratch / "repo"
+    repo.mkdir()
+    subprocess.run(["git", "init", "-q", str(repo)], check=False, capture_output=True)
+    (scratch / "home").mkdir()
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """``-X importtime`` output as module -> (self, cumulative) microseconds."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def import_cost(modules: dict[str, tuple[int, int]],
+                baseline: dict[str, tuple[int, int]]) -> tuple[float, list[dict]]:
+    """Import time beyond interpreter startup and the costliest packages, in ms.
+
+    Packages are top-level names (no dot) outside this project, so a
+    dependency's cost is reported once however it was reached.
+    """
+    total = sum(self_us for name, (self_us, _) in modules.items() if name not in baseline)
+    packages = [
+        {"module": name, "ms": round(cumulative_us / 1000, 1)}
+        for name, (_, cumulative_us) in modules.items()
+        if name not in baseline and "." not in name and name != "ai_code_metrics"
+    ]
+    packages.sort(key=lambda p: p["ms"], reverse=True)
+    return round(total / 1000, 1), packages[:5]
+
+
+def measure(name: str, args: list[str], runs: int, env: dict,
+            baseline: dict[str, tuple[int, int]]) -> dict:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command(name, args), env=env, capture_output=True, check=False)
+        timings.append(time.perf_counter() - started)
+    traced = subprocess.run(command(name, args, importtime=True), env=env,
+                            capture_output=True, text=True, check=False)
+    import_ms, top_imports = import_cost(parse_importtime(traced.stderr), baseline)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 1),
+        "min_ms": round(min(timings) * 1000, 1),
+        "import_ms": import_ms,
+        "top_imports": top_imports,
+    }
+
+
+def git_commit() -> str | None:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                            text=True, check=False, cwd=Path(__file__).resolve().parent)
+    return result.stdout.strip() or None
+
+
+def last_entry(history: Path) -> dict | None:
+    if not history.exists():
+        return None
+    lines = [line for line in history.read_text().splitlines() if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def main():
+    """Measure every subcommand, record the result and compare with the last one."""
+    parser = argparse.ArgumentParser(description="Benchmark ai-metrics subcommand startup")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per subcommand")
+    parser.add_argument("--commands", type=str, default=None,
+                        help="Comma-separated subcommands to measure (default: all)")
+    parser.add_argument("--history", type=str, default=str(DEFAULT_HISTORY),
+                        help="JSON lines file results are appended to")
+    parser.add_argument("--no-record", action="store_true", help="Do not append to the history")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="Percent slowdown of a median reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any subcommand regressed")
+    args = parser.parse_args()
+
+    history = Path(args.history)
+    previous = last_entry(history)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        scratch = Path(temp_dir)
+        prepare(scratch)
+        env = {key: value for key, value in os.environ.items()
+               if key in ("PATH", "PYTHONPATH", "VIRTUAL_ENV", "SYSTEMROOT")}
+        env["HOME"] = str(scratch / "home")
+
+        selected = cases(scratch)
+        if args.commands:
+            wanted = {name.strip() for name in args.commands.split(",")}
+            selected = {name: argv for name, argv in selected.items() if name in wanted}
+        # Modules every interpreter imports before running any code
+        baseline = parse_importtime(subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "pass"], env=env,
+            capture_output=True, text=True, check=False
+        ).stderr)
+        results = {
+            name: measure(name, argv, args.runs, env, baseline) for name, argv in selected.items()
+        }
+
+    entry = {
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "commands": results,
+    }
+
+    regressions = []
+    print(f"{'command':<10} {'median':>9} {'imports':>9} {'change':>8}  slowest imports")
+    for name, result in results.items():
+        change = ""
+        before = (previous or {}).get("commands", {}).get(name)
+        if before and before["median_ms"]:
+            percent = (result["median_ms"] - before["median_ms"]) / before["median_ms"] * 100
+            change = f"{percent:+.0f}%"
+            if percent > args.threshold:
+                regressions.append(name)
+        slowest = ", ".join(f"{p['module']} {p['ms']}" for p in result["top_imports"][:3])
+        print(f"{name:<10} {result['median_ms']:>7.1f}ms {result['import_ms']:>7.1f}ms {change:>8}  {slowest}")
+
+    if not args.no_record:
+        history.parent.mkdir(parents=True, exist_ok=True)
+        with open(history, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    if regressions:
+        print(f"Slower than the previous run by more than {args.threshold:g}%: {', '.join(regressions)}",
+              file=sys.stderr)
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
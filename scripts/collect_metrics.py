@@ -2,11 +2,12 @@
 """CLI script to collect metrics from a Git repository."""
 
 import argparse
-import json
 import sys
 from pathlib import Path
 
-from ai_code_metrics.analyzers import GitMetricsAnalyzer, ROICalculator
+from ai_code_metrics.analyzers import GitMetricsAnalyzer
+from ai_code_metrics.analyzers.report import CommitReport
+from ai_code_metrics.config import config
 from ai_code_metrics.security import CodeAnonymizer
 
 
@@ -23,50 +24,23 @@ def main():
     args = parser.parse_args()
     
     try:
-        # Analyze Git repository
+        # Analyze Git repository, writing each commit as soon as it is analyzed
         analyzer = GitMetricsAnalyzer(args.repo_path)
-        metrics = analyzer.analyze_recent_commits(days=args.days)
-        
-        # Anonymize if requested
-        if args.anonymize:
-            anonymizer = CodeAnonymizer()
-            for metric in metrics:
-                if 'author' in metric:
-                    metric['author'] = anonymizer.anonymize_code_snippet(metric['author'])
-        
-        # Calculate basic stats
-        total_commits = len(metrics)
-        ai_commits = sum(1 for m in metrics if m.get('ai_generated_lines', 0) > 0)
-        total_lines_added = sum(m.get('lines_added', 0) for m in metrics)
-        total_lines_deleted = sum(m.get('lines_deleted', 0) for m in metrics)
-        ai_lines = sum(m.get('ai_generated_lines', 0) for m in metrics)
-        
-        # Generate report
-        report = {
-            'repository': args.repo_path,
-            'days_analyzed': args.days,
-            'total_commits': total_commits,
-            'ai_assisted_commits': ai_commits,
-            'ai_assisted_percentage': round(ai_commits / total_commits * 100 if total_commits else 0, 2),
-            'total_lines_added': total_lines_added,
-            'total_lines_deleted': total_lines_deleted,
-            'ai_generated_lines': ai_lines,
-            'ai_generated_percentage': round(ai_lines / total_lines_added * 100 if total_lines_added else 0, 2),
-            'commit_data': metrics
-        }
-        
-        # Save to file
-        with open(args.output, 'w') as f:
-            json.dump(report, f, indent=2)
+        anonymizer = CodeAnonymizer(config.get("security.salt", "change-this-salt")) if args.anonymize else None
+        header = {'repository': args.repo_path, 'days_analyzed': args.days}
+        with CommitReport(Path(args.output), header, anonymizer=anonymizer) as report:
+            for metric in analyzer.iter_recent_commits(days=args.days):
+                report.write(metric)
+        summary = report.summary
         
         print(f"Metrics saved to {args.output}")
         
         # Print summary
         print("\nSummary:")
-        print(f"Total commits: {total_commits}")
-        print(f"AI-assisted commits: {ai_commits} ({report['ai_assisted_percentage']}%)")
-        print(f"Total lines added: {total_lines_added}")
-        print(f"AI-generated lines: {ai_lines} ({report['ai_generated_percentage']}%)")
+        print(f"Total commits: {summary['total_commits']}")
+        print(f"AI-assisted commits: {summary['ai_assisted_commits']} ({summary['ai_assisted_percentage']}%)")
+        print(f"Total lines added: {summary['total_lines_added']}")
+        print(f"AI-generated lines: {summary['ai_generated_lines']} ({summary['ai_generated_percentage']}%)")
         
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
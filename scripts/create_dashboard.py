@@ -1,141 +1,229 @@
 #!/usr/bin/env python3
-"""Generate a dashboard for AI coding assistant metrics."""
+"""Generate a dashboard for AI coding assistant metrics.
+
+Commit analysis is cached by commit hash, so only new commits are diffed.
+Each chart's input data is fingerprinted; charts whose PNG is already
+current are skipped and the rest are drawn in worker processes.
+"""
 
 import argparse
+import hashlib
 import json
+import os
 import sys
-from pathlib import Path
-import matplotlib.pyplot as plt
-import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import os
+from pathlib import Path
+
+from ai_code_metrics.analyzers import CommitAnalyzer, CommitCache
+
+# Bump when a render function changes, so existing PNGs are redrawn
+RENDER_VERSION = 1
+
+CACHE_DIR = ".cache"
+
+
+def render_commit_activity(data: dict, path: str) -> None:
+    """Plot all and AI-assisted commits per day."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(data["dates"], data["all_counts"], label="All Commits", marker="o")
+    ax.plot(data["dates"], data["ai_counts"], label="AI-Assisted Commits", marker="x")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Number of Commits")
+    ax.set_title("Commit Activity Over Time")
+    ax.tick_params(axis="x", rotation=45)
+    ax.legend()
+    fig.tight_layout()
+    _save(fig, path)
+
+
+def render_assistant_breakdown(data: dict, path: str) -> None:
+    """Plot the number of commits per AI assistant."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.bar(list(data["assistants"]), list(data["assistants"].values()))
+    ax.set_xlabel("AI Assistant")
+    ax.set_ylabel("Number of Commits")
+    ax.set_title("AI Assistant Usage")
+    fig.tight_layout()
+    _save(fig, path)
+
+
+def render_code_distribution(data: dict, path: str) -> None:
+    """Plot the share of added lines from AI-assisted commits."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.pie([data["ai_lines"], data["human_lines"]], explode=(0.1, 0),  # explode the AI slice
+           labels=["AI-Assisted", "Human"], colors=["#ff9999", "#66b3ff"],
+           autopct="%1.1f%%", startangle=90)
+    ax.axis("equal")  # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.set_title("Lines of Code Distribution")
+    fig.tight_layout()
+    _save(fig, path)
+
+
+RENDERERS = {
+    "commit_activity": render_commit_activity,
+    "assistant_breakdown": render_assistant_breakdown,
+    "code_distribution": render_code_distribution,
+}
+
+
+def _save(fig, path: str) -> None:
+    """Write the figure atomically, so an interrupted run leaves no partial PNG."""
+    import matplotlib.pyplot as plt
+
+    tmp_path = f"{path}.tmp"
+    fig.savefig(tmp_path, format="png")
+    plt.close(fig)
+    os.replace(tmp_path, path)
+
+
+def _init_worker() -> None:
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def _render(name: str, data: dict, path: str) -> str:
+    RENDERERS[name](data, path)
+    return name
 
-from ai_code_metrics.analyzers import CommitAnalyzer
 
+def chart_data(commits: list[dict]) -> dict[str, dict]:
+    """The input of every chart to draw, keyed by chart name."""
+    all_by_date: dict[str, int] = {}
+    ai_by_date: dict[str, int] = {}
+    assistants: dict[str, int] = {}
+    for commit in commits:
+        date_str = commit["timestamp"].split("T")[0]  # Extract YYYY-MM-DD
+        all_by_date[date_str] = all_by_date.get(date_str, 0) + 1
+        if commit.get("ai_assisted", False):
+            ai_by_date[date_str] = ai_by_date.get(date_str, 0) + 1
+            if commit.get("ai_assistant"):
+                assistant = commit["ai_assistant"]
+                assistants[assistant] = assistants.get(assistant, 0) + 1
+
+    dates = sorted(all_by_date)
+    charts = {
+        "commit_activity": {
+            "dates": dates,
+            "all_counts": [all_by_date[d] for d in dates],
+            "ai_counts": [ai_by_date.get(d, 0) for d in dates],
+        },
+        "code_distribution": {
+            "ai_lines": sum(c["lines_added"] for c in commits if c.get("ai_assisted", False)),
+            "human_lines": sum(c["lines_added"] for c in commits if not c.get("ai_assisted", False)),
+        },
+    }
+    if assistants:
+        charts["assistant_breakdown"] = {"assistants": dict(sorted(assistants.items()))}
+    return charts
+
+
+def fingerprint(name: str, data: dict) -> str:
+    """Hash of everything a chart's PNG depends on."""
+    payload = json.dumps([name, RENDER_VERSION, data], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_charts(charts: dict[str, dict], output_path: Path, cache_path: Path,
+                  workers: int | None = None) -> list[str]:
+    """Draw the charts whose PNG is missing or out of date; return their names."""
+    manifest_path = cache_path / "charts.json"
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
 
-def generate_commit_graphs(repo_path: str, output_dir: str, days: int = 30):
+    fingerprints = {name: fingerprint(name, data) for name, data in charts.items()}
+    stale = [
+        name for name in charts
+        if manifest.get(name) != fingerprints[name] or not (output_path / f"{name}.png").exists()
+    ]
+    if not stale:
+        return []
+
+    jobs = [(name, charts[name], str(output_path / f"{name}.png")) for name in stale]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers < 2:
+        _init_worker()
+        rendered = [_render(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+            rendered = list(pool.map(_render, *zip(*jobs, strict=True)))
+
+    manifest = {name: fingerprints[name] for name in charts}
+    cache_path.mkdir(parents=True, exist_ok=True)
+    tmp_file = manifest_path.with_suffix(".tmp")
+    tmp_file.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_file, manifest_path)
+    return rendered
+
+
+def generate_commit_graphs(repo_path: str, output_dir: str, days: int = 30,
+                           cache_dir: str | None = None, workers: int | None = None):
     """Generate graphs of commit activity by AI assistant."""
     try:
         # Create output directory if it doesn't exist
         output_path = Path(output_dir)
         output_path.mkdir(exist_ok=True, parents=True)
-        
-        # Analyze repository
+        cache_path = Path(cache_dir) if cache_dir else output_path / CACHE_DIR
+
+        # Analyze repository, diffing only commits not seen before
         analyzer = CommitAnalyzer(repo_path)
-        
+        cache = CommitCache(cache_path / "commits.json")
+
         # Get date range
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
-        
+
         # Get commit data
-        commits = analyzer.analyze_commits(since=start_date.strftime("%Y-%m-%d"))
-        
+        commits = analyzer.analyze_commits(since=start_date.strftime("%Y-%m-%d"), cache=cache)
+        cache.save()
+
         if not commits:
             print("No commits found in the specified time period.")
             return
-            
-        # Group commits by date
-        commits_by_date = {}
-        ai_commits_by_date = {}
-        
-        for commit in commits:
-            date_str = commit['timestamp'].split('T')[0]  # Extract YYYY-MM-DD
-            
-            # Track all commits
-            if date_str not in commits_by_date:
-                commits_by_date[date_str] = []
-            commits_by_date[date_str].append(commit)
-            
-            # Track AI-assisted commits
-            if commit.get('ai_assisted', False):
-                if date_str not in ai_commits_by_date:
-                    ai_commits_by_date[date_str] = []
-                ai_commits_by_date[date_str].append(commit)
-        
-        # Generate time series data
-        dates = sorted(commits_by_date.keys())
-        all_counts = [len(commits_by_date[d]) for d in dates]
-        ai_counts = [len(ai_commits_by_date.get(d, [])) for d in dates]
-        
-        # Plot commit frequency
-        plt.figure(figsize=(12, 6))
-        plt.plot(dates, all_counts, label="All Commits", marker="o")
-        plt.plot(dates, ai_counts, label="AI-Assisted Commits", marker="x")
-        plt.xlabel("Date")
-        plt.ylabel("Number of Commits")
-        plt.title("Commit Activity Over Time")
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        plt.legend()
-        plt.savefig(output_path / "commit_activity.png")
-        
-        # Generate AI assistant breakdown
-        assistants = {}
-        for commit in commits:
-            if commit.get('ai_assisted', False) and commit.get('ai_assistant'):
-                assistant = commit['ai_assistant']
-                assistants[assistant] = assistants.get(assistant, 0) + 1
-        
-        if assistants:
-            # Plot AI assistant breakdown
-            plt.figure(figsize=(10, 6))
-            assistant_names = list(assistants.keys())
-            assistant_counts = [assistants[name] for name in assistant_names]
-            
-            plt.bar(assistant_names, assistant_counts)
-            plt.xlabel("AI Assistant")
-            plt.ylabel("Number of Commits")
-            plt.title("AI Assistant Usage")
-            plt.tight_layout()
-            plt.savefig(output_path / "assistant_breakdown.png")
-        
-        # Calculate lines of code statistics
-        human_lines = sum(c['lines_added'] for c in commits if not c.get('ai_assisted', False))
-        ai_lines = sum(c['lines_added'] for c in commits if c.get('ai_assisted', False))
-        total_lines = human_lines + ai_lines
-        
-        # Plot lines of code comparison
-        plt.figure(figsize=(8, 8))
-        labels = ['AI-Assisted', 'Human']
-        sizes = [ai_lines, human_lines]
-        colors = ['#ff9999','#66b3ff']
-        explode = (0.1, 0)  # explode the AI slice
-        
-        plt.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-        plt.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-        plt.title("Lines of Code Distribution")
-        plt.tight_layout()
-        plt.savefig(output_path / "code_distribution.png")
-        
+
+        charts = chart_data(commits)
+        rendered = render_charts(charts, output_path, cache_path, workers)
+
+        ai_commits = sum(1 for c in commits if c.get("ai_assisted", False))
+        ai_lines = charts["code_distribution"]["ai_lines"]
+        total_lines = ai_lines + charts["code_distribution"]["human_lines"]
+
         # Generate summary report
         summary = {
             "repository": repo_path,
             "period": f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}",
             "total_commits": len(commits),
-            "ai_assisted_commits": sum(1 for c in commits if c.get('ai_assisted', False)),
-            "ai_percentage": round(sum(1 for c in commits if c.get('ai_assisted', False)) / len(commits) * 100 if commits else 0, 2),
+            "ai_assisted_commits": ai_commits,
+            "ai_percentage": round(ai_commits / len(commits) * 100, 2),
             "total_lines_added": total_lines,
             "ai_lines_percentage": round(ai_lines / total_lines * 100 if total_lines else 0, 2),
-            "ai_assistants": assistants,
-            "graphs": [
-                str(output_path / "commit_activity.png"),
-                str(output_path / "assistant_breakdown.png"),
-                str(output_path / "code_distribution.png")
-            ]
+            "ai_assistants": charts.get("assistant_breakdown", {}).get("assistants", {}),
+            "graphs": [str(output_path / f"{name}.png") for name in RENDERERS if name in charts]
         }
-        
-        with open(output_path / "summary.json", "w") as f:
-            json.dump(summary, f, indent=2)
-        
+
+        summary_file = output_path / "summary.json"
+        content = json.dumps(summary, indent=2)
+        if not summary_file.exists() or summary_file.read_text() != content:
+            summary_file.write_text(content)
+
         print(f"Dashboard generated in {output_path}")
+        print(f"Charts redrawn: {len(rendered)} of {len(charts)}")
         print(f"Total commits: {summary['total_commits']}")
         print(f"AI-assisted commits: {summary['ai_assisted_commits']} ({summary['ai_percentage']}%)")
         print(f"AI-generated code: {summary['ai_lines_percentage']}%")
-        
+
     except Exception as e:
         print(f"Error generating dashboard: {e}", file=sys.stderr)
         return 1
-    
+
     return 0
 
 
@@ -145,19 +233,24 @@ def main():
     parser.add_argument("--repo-path", type=str, default=".", help="Path to Git repository")
     parser.add_argument("--output-dir", type=str, default="./dashboard", help="Output directory for dashboard files")
     parser.add_argument("--days", type=int, default=30, help="Number of days to include in analysis")
-    
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Directory for the commit and chart caches (default: <output-dir>/.cache)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Processes drawing charts (default: CPU count)")
+
     args = parser.parse_args()
-    
+
     # Check for matplotlib
     try:
-        import matplotlib
+        import matplotlib  # noqa: F401
     except ImportError:
         print("Error: matplotlib is required for dashboard generation")
         print("Install with: uv add --dev matplotlib")
         return 1
-    
-    return generate_commit_graphs(args.repo_path, args.output_dir, args.days)
+
+    return generate_commit_graphs(args.repo_path, args.output_dir, args.days,
+                                  args.cache_dir, args.workers)
 
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Load test the Prometheus exporter with concurrent scrapers."""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from pathlib import Path
+
+from werkzeug.serving import make_server
+
+from ai_code_metrics.exporters import prometheus_exporter
+from ai_code_metrics.exporters.server import ExporterServer
+from ai_code_metrics.storage import TIMING, JsonlStore
+
+
+def scrape(connection: HTTPConnection, gzip_encoding: bool, keep_alive: bool) -> float:
+    """Fetch the metrics page once and return the latency in seconds."""
+    headers = {'Accept-Encoding': 'gzip'} if gzip_encoding else {}
+    if not keep_alive:
+        headers['Connection'] = 'close'
+    started = time.perf_counter()
+    connection.request('GET', '/metrics', headers=headers)
+    response = connection.getresponse()
+    response.read()
+    if response.status != 200:
+        raise OSError(f"HTTP {response.status}")
+    if not keep_alive:
+        connection.close()
+    return time.perf_counter() - started
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def main():
+    """Run concurrent scrapers against an exporter fed by a log writer."""
+    parser = argparse.ArgumentParser(description="Load test the Prometheus exporter")
+    parser.add_argument("--scrapers", type=int, default=10, help="Number of concurrent scrapers")
+    parser.add_argument("--duration", type=float, default=10.0, help="Test duration in seconds")
+    parser.add_argument("--write-rate", type=float, default=500.0,
+                        help="Timing records appended per second while scraping")
+    parser.add_argument("--operations", type=int, default=50,
+                        help="Distinct function names in the generated records")
+    parser.add_argument("--gzip", action="store_true", help="Request gzip-encoded responses")
+    parser.add_argument("--port", type=int, default=0, help="Port to listen on (default: any free port)")
+    parser.add_argument("--server", choices=["threaded", "werkzeug"], default="threaded",
+                        help="Server to test: the exporter's keep-alive server or Werkzeug's")
+    parser.add_argument("--no-keep-alive", action="store_true",
+                        help="Open a new connection for every scrape")
+    
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        metrics_dir = Path(temp_dir)
+        prometheus_exporter.exporter.metrics_dir = metrics_dir
+        prometheus_exporter.start_tailer(poll_interval=0.1)
+        
+        if args.server == 'threaded':
+            server = ExporterServer(prometheus_exporter.app, '127.0.0.1', args.port)
+        else:
+            logging.getLogger('werkzeug').setLevel(logging.ERROR)
+            server = make_server('127.0.0.1', args.port, prometheus_exporter.app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        
+        stop = threading.Event()
+        written = 0
+        
+        def write():
+            nonlocal written
+            store = JsonlStore(metrics_dir)
+            while not stop.is_set():
+                store.append(TIMING, {
+                    'function_name': f'op_{written % args.operations}',
+                    'duration': 0.1 + (written % 7) / 10,
+                    'timestamp': time.time(),
+                })
+                written += 1
+                time.sleep(1 / args.write_rate)
+        
+        latencies: list[float] = []
+        errors = 0
+        lock = threading.Lock()
+        
+        def scraper():
+            nonlocal errors
+            connection = HTTPConnection('127.0.0.1', port, timeout=10)
+            while not stop.is_set():
+                try:
+                    latency = scrape(connection, args.gzip, not args.no_keep_alive)
+                except OSError:
+                    connection.close()
+                    with lock:
+                        errors += 1
+                    continue
+                with lock:
+                    latencies.append(latency)
+        
+        threads = [threading.Thread(target=write)]
+        threads += [threading.Thread(target=scraper) for _ in range(args.scrapers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        
+        prometheus_exporter.stop_tailer()
+        prometheus_exporter.exporter.update_metrics()
+        server.shutdown()
+        server.server_close()
+        
+        counted = sum(
+            sample.value
+            for family in prometheus_exporter.ai_requests_total.collect()
+            for sample in family.samples if sample.name.endswith('_total')
+        )
+    
+    if not latencies:
+        print("No successful scrapes", file=sys.stderr)
+        sys.exit(1)
+    
+    result = {
+        'server': args.server,
+        'keep_alive': not args.no_keep_alive,
+        'scrapers': args.scrapers,
+        'scrapes': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(statistics.median(latencies) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2),
+        },
+        'records_written': written,
+        'records_counted': int(counted),
+    }
+    print(json.dumps(result, indent=2))
+    
+    if counted != written:
+        print("Counter does not match the records written", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 
 import argparse
 import sys
-from ai_code_metrics.exporters.prometheus_exporter import app
+from ai_code_metrics.exporters.prometheus_exporter import run_exporter
 
 
 def main():
@@ -11,13 +11,14 @@ def main():
     parser = argparse.ArgumentParser(description="Run the Prometheus metrics exporter")
     parser.add_argument("--host", type=str, default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8080, help="Port to listen on")
-    parser.add_argument("--debug", action="store_true", help="Run in debug mode")
+    parser.add_argument("--debug", action="store_true",
+                        help="Run in debug mode (uses the Flask development server)")
     
     args = parser.parse_args()
     
     try:
         print(f"Starting Prometheus exporter on {args.host}:{args.port}")
-        app.run(host=args.host, port=args.port, debug=args.debug)
+        run_exporter(args.host, args.port, debug=args.debug)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
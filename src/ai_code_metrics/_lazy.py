@@ -0,0 +1,27 @@
+"""Package attributes imported on first use."""
+
+import importlib
+from collections.abc import Callable
+from typing import Any
+
+
+def lazy_attributes(namespace: dict[str, Any],
+                    lazy: dict[str, str]) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """Module ``__getattr__`` and ``__dir__`` for a package's ``globals()``.
+
+    ``lazy`` maps attribute names to the relative module defining them; each
+    is imported when first accessed and then kept in the package namespace.
+    """
+    package = namespace['__name__']
+
+    def getattr_(name):
+        module = lazy.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = namespace[name] = getattr(importlib.import_module(module, package), name)
+        return value
+
+    def dir_():
+        return sorted(set(namespace) | set(namespace.get('__all__', ())))
+
+    return getattr_, dir_
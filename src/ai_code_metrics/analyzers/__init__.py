@@ -1,7 +1,22 @@
 """Analyzers for AI code metrics framework."""
 
-from .commit_analyzer import CommitAnalyzer, CommitPatternMatcher
-from .git_metrics import GitMetricsAnalyzer
-from .roi_calculator import ROICalculator
+from ai_code_metrics._lazy import lazy_attributes
 
-__all__ = ['GitMetricsAnalyzer', 'ROICalculator', 'CommitAnalyzer', 'CommitPatternMatcher']
\ No newline at end of file
+__all__ = ['GitMetricsAnalyzer', 'ROICalculator', 'CommitAnalyzer', 'CommitPatternMatcher',
+           'ROIScenarioEngine', 'ParameterRange', 'CommitReport', 'CommitCache',
+           'DashboardBuilder']
+
+# Analyzers pull in GitPython and numpy, so each is imported on first use
+_LAZY = {
+    'CommitAnalyzer': '.commit_analyzer',
+    'CommitCache': '.commit_analyzer',
+    'CommitPatternMatcher': '.commit_analyzer',
+    'GitMetricsAnalyzer': '.git_metrics',
+    'ROICalculator': '.roi_calculator',
+    'ROIScenarioEngine': '.roi_scenarios',
+    'ParameterRange': '.roi_scenarios',
+    'CommitReport': '.report',
+    'DashboardBuilder': '.dashboard',
+}
+
+__getattr__, __dir__ = lazy_attributes(globals(), _LAZY)
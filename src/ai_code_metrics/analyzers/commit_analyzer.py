@@ -1,10 +1,15 @@
 """Analyze git commits for AI assistant contribution patterns."""
 
+import json
+import os
 import re
+from pathlib import Path
 from typing import Any
 
 import git
 
+from ai_code_metrics.profiling import stage, timed_iter
+
 
 class CommitPatternMatcher:
     """Match commit patterns for different AI assistants."""
@@ -60,6 +65,54 @@ class CommitPatternMatcher:
         return result
 
 
+class CommitCache:
+    """Analyzed commits by hash, kept in a JSON file between runs.
+
+    A commit never changes once made, so its analysis stays valid until
+    ``VERSION`` changes. On ``save`` only the commits used since loading are
+    kept, so the file tracks the window being analyzed.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._commits: dict[str, dict[str, Any]] = {}
+        self._used: set[str] = set()
+        self._dirty = False
+        try:
+            state = json.loads(self.path.read_text())
+            if state.get('version') == self.VERSION:
+                self._commits = state['commits']
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    def get(self, commit_hash: str) -> dict[str, Any] | None:
+        commit_data = self._commits.get(commit_hash)
+        if commit_data is not None:
+            self._used.add(commit_hash)
+        return commit_data
+    
+    def put(self, commit_hash: str, commit_data: dict[str, Any]) -> None:
+        self._commits[commit_hash] = commit_data
+        self._used.add(commit_hash)
+        self._dirty = True
+    
+    def save(self) -> None:
+        """Atomically write the commits used since loading, if any changed."""
+        if not self._dirty and self._used == set(self._commits):
+            return
+        commits = {sha: self._commits[sha] for sha in self._used}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps({'version': self.VERSION, 'commits': commits}))
+            os.replace(tmp_file, self.path)
+        except OSError:
+            return
+        self._commits, self._dirty = commits, False
+
+
 class CommitAnalyzer:
     """Analyze git repository for AI assistant patterns."""
     
@@ -70,8 +123,13 @@ class CommitAnalyzer:
     def analyze_commits(self, 
                         limit: int | None = None, 
                         since: str | None = None,
-                        until: str | None = None) -> list[dict[str, Any]]:
-        """Analyze repository commits for AI patterns."""
+                        until: str | None = None,
+                        cache: CommitCache | None = None) -> list[dict[str, Any]]:
+        """Analyze repository commits for AI patterns.
+
+        With a ``cache``, commits analyzed before are taken from it instead of
+        being diffed again; the caller saves it.
+        """
         commits_data = []
         
         # Build the commit iteration parameters
@@ -81,12 +139,14 @@ class CommitAnalyzer:
         if until:
             kwargs['until'] = until
         if limit:
-            commits = list(self.repo.iter_commits(**kwargs))[:limit]
-        else:
-            commits = list(self.repo.iter_commits(**kwargs))
+            kwargs['max_count'] = limit
         
-        for commit in commits:
-            commit_data = self._analyze_commit(commit)
+        for commit in timed_iter('commit_walk', self.repo.iter_commits(**kwargs)):
+            commit_data = cache.get(commit.hexsha) if cache is not None else None
+            if commit_data is None:
+                commit_data = self._analyze_commit(commit)
+                if cache is not None:
+                    cache.put(commit.hexsha, commit_data)
             commits_data.append(commit_data)
             
         return commits_data
@@ -102,9 +162,11 @@ class CommitAnalyzer:
             'message': commit.message,
         }
         
-        # Extract stats
-        if hasattr(commit, 'stats') and hasattr(commit.stats, 'total'):
-            stats = commit.stats.total
+        # Extract stats; each access to commit.stats runs git diff --numstat
+        with stage('numstat', items=1):
+            commit_stats = getattr(commit, 'stats', None)
+        if commit_stats is not None and hasattr(commit_stats, 'total'):
+            stats = commit_stats.total
             commit_data.update({
                 'files_changed': stats.get('files', 0),
                 'lines_added': stats.get('insertions', 0),
@@ -112,7 +174,8 @@ class CommitAnalyzer:
             })
         
         # Analyze AI patterns in commit message
-        ai_data = CommitPatternMatcher.extract_ai_data(commit.message)
+        with stage('pattern_match', items=1):
+            ai_data = CommitPatternMatcher.extract_ai_data(commit.message)
         commit_data.update(ai_data)
         
         return commit_data
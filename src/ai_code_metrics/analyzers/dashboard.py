@@ -0,0 +1,175 @@
+"""Static HTML dashboard built from precomputed aggregates.
+
+The dashboard is a directory that any static file server can host:
+``index.html`` rendered once from ``templates/dashboard.html``, a small
+``data/summary.json`` with the period's totals, per-assistant and per-author
+aggregates, and one compact ``data/days/<YYYY-MM-DD>.json`` fragment per day.
+The summary lists every fragment with a hash of its content, which the page
+appends to the fragment's URL, so browsers keep unchanged days cached and
+charts fetch their data only when scrolled into view. On a rebuild, only the
+fragments whose content changed are written.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from ai_code_metrics.security import CodeAnonymizer
+
+TEMPLATE = Path(__file__).resolve().parent.parent / 'templates' / 'dashboard.html'
+
+DATA_DIR = 'data'
+DAYS_DIR = 'days'
+
+# Commits listed in the recent commits table
+RECENT_COMMITS = 20
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), sort_keys=True)
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    tmp_file = path.with_name(path.name + '.tmp')
+    tmp_file.write_text(content)
+    os.replace(tmp_file, path)
+
+
+def _add(totals: dict[str, list[int]], key: str, ai_assisted: bool, lines: int) -> None:
+    """Count a commit in ``totals[key]``, a ``[commits, ai_commits, lines_added]`` triple."""
+    entry = totals.setdefault(key, [0, 0, 0])
+    entry[0] += 1
+    entry[1] += ai_assisted
+    entry[2] += lines
+
+
+def day_aggregates(commits: Iterable[dict[str, Any]],
+                   anonymizer: CodeAnonymizer | None = None) -> dict[str, dict[str, Any]]:
+    """Per-day totals of analyzed commits, broken down by assistant and by author.
+
+    Assistant and author entries are ``[commits, ai_commits, lines_added]``.
+    With an ``anonymizer``, authors are replaced before they are counted.
+    """
+    days: dict[str, dict[str, Any]] = {}
+    for commit in commits:
+        day = days.setdefault(commit['timestamp'][:10], {
+            'commits': 0, 'ai_commits': 0, 'lines_added': 0, 'ai_lines_added': 0,
+            'assistants': {}, 'authors': {},
+        })
+        ai_assisted = bool(commit.get('ai_assisted', False))
+        lines = commit.get('lines_added', 0)
+        day['commits'] += 1
+        day['ai_commits'] += ai_assisted
+        day['lines_added'] += lines
+        day['ai_lines_added'] += lines if ai_assisted else 0
+        if ai_assisted and commit.get('ai_assistant'):
+            _add(day['assistants'], commit['ai_assistant'], ai_assisted, lines)
+        author = commit.get('author') or 'unknown'
+        if anonymizer is not None:
+            author = anonymizer.anonymize_value(author)
+        _add(day['authors'], author, ai_assisted, lines)
+    return days
+
+
+class DashboardBuilder:
+    """Build, and incrementally rebuild, a static dashboard in ``output_dir``."""
+
+    def __init__(self, output_dir: Path, anonymizer: CodeAnonymizer | None = None):
+        self.output_dir = Path(output_dir)
+        self.anonymizer = anonymizer
+        self.data_dir = self.output_dir / DATA_DIR
+        self.days_dir = self.data_dir / DAYS_DIR
+
+    def build(self, commits: list[dict[str, Any]], header: dict[str, Any],
+              roi: dict[str, Any] | None = None) -> dict[str, int]:
+        """Write the dashboard for ``commits``; return counts of fragments changed.
+
+        ``header`` is shown as is (e.g. the repository and period) and ``roi``,
+        if given, is a ``ROICalculator`` result for the same period.
+        """
+        self.days_dir.mkdir(parents=True, exist_ok=True)
+        previous = self._previous_hashes()
+
+        days = day_aggregates(commits, self.anonymizer)
+        hashes = {}
+        stats = {'written': 0, 'unchanged': 0, 'removed': 0}
+        for day, aggregate in sorted(days.items()):
+            content = _compact(aggregate)
+            hashes[day] = hashlib.sha256(content.encode()).hexdigest()[:12]
+            path = self.days_dir / f"{day}.json"
+            if previous.get(day) == hashes[day] and path.exists():
+                stats['unchanged'] += 1
+                continue
+            _write_atomic(path, content)
+            stats['written'] += 1
+
+        # Days that fell out of the period, or lost all their commits
+        for path in self.days_dir.glob('*.json'):
+            if path.stem not in hashes:
+                path.unlink()
+                stats['removed'] += 1
+
+        summary = self.summarize(days, commits)
+        summary.update(header=header, roi=roi, days=hashes,
+                       generated=datetime.now().isoformat(timespec='seconds'))
+        _write_atomic(self.data_dir / 'summary.json', _compact(summary))
+        self._write_page(header)
+        return stats
+
+    def summarize(self, days: dict[str, dict[str, Any]],
+                  commits: list[dict[str, Any]]) -> dict[str, Any]:
+        """Totals over ``days`` and the most recent of ``commits``."""
+        totals = {'commits': 0, 'ai_commits': 0, 'lines_added': 0, 'ai_lines_added': 0}
+        assistants: dict[str, list[int]] = {}
+        authors: dict[str, list[int]] = {}
+        for aggregate in days.values():
+            for key in totals:
+                totals[key] += aggregate[key]
+            for merged, part in ((assistants, aggregate['assistants']),
+                                 (authors, aggregate['authors'])):
+                for name, counts in part.items():
+                    entry = merged.setdefault(name, [0, 0, 0])
+                    for i, count in enumerate(counts):
+                        entry[i] += count
+
+        recent = sorted(commits, key=lambda c: c['timestamp'], reverse=True)[:RECENT_COMMITS]
+        return {
+            'totals': totals,
+            'assistants': assistants,
+            'authors': authors,
+            'recent': [self._recent(commit) for commit in recent],
+        }
+
+    def _recent(self, commit: dict[str, Any]) -> dict[str, Any]:
+        message = (commit.get('message') or '').strip().split('\n', 1)[0]
+        author = commit.get('author') or 'unknown'
+        if self.anonymizer is not None:
+            message = self.anonymizer.anonymize_text(message)
+            author = self.anonymizer.anonymize_value(author)
+        return {
+            'date': commit['timestamp'][:10],
+            'author': author,
+            'message': message,
+            'lines_added': commit.get('lines_added', 0),
+            'ai_assistant': commit.get('ai_assistant') if commit.get('ai_assisted') else None,
+        }
+
+    def _previous_hashes(self) -> dict[str, str]:
+        try:
+            return json.loads((self.data_dir / 'summary.json').read_text()).get('days', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _write_page(self, header: dict[str, Any]) -> None:
+        """Render ``index.html``, which only changes with the header."""
+        import jinja2  # installed with Flask
+
+        template = jinja2.Template(TEMPLATE.read_text(), autoescape=True)
+        page = template.render(repository_name=header.get('repository', ''))
+        index = self.output_dir / 'index.html'
+        if not index.exists() or index.read_text() != page:
+            _write_atomic(index, page)
@@ -1,11 +1,14 @@
 """Git repository metrics analysis for AI coding metrics."""
 
 import re
+from collections.abc import Iterator
 from datetime import datetime, timedelta
 from typing import Any
 
 import git
 
+from ai_code_metrics.profiling import stage, timed_iter
+
 
 class GitMetricsAnalyzer:
     """Analyzes git repositories for AI-related metrics."""
@@ -23,31 +26,37 @@ class GitMetricsAnalyzer:
         
     def analyze_recent_commits(self, days: int = 7) -> list[dict[str, Any]]:
         """Analyze commits from the last N days."""
+        return list(self.iter_recent_commits(days))
+    
+    def iter_recent_commits(self, days: int = 7) -> Iterator[dict[str, Any]]:
+        """Analyze commits from the last N days one at a time, newest first."""
         since = datetime.now() - timedelta(days=days)
-        metrics = []
-        
-        for commit in self.repo.iter_commits(since=since):
-            commit_metrics = self._analyze_commit(commit)
-            metrics.append(commit_metrics)
-            
-        return metrics
+        for commit in timed_iter('commit_walk', self.repo.iter_commits(since=since)):
+            yield self._analyze_commit(commit)
     
     def _analyze_commit(self, commit) -> dict[str, Any]:
         """Analyze a single commit for metrics."""
-        stats = commit.stats.total
+        with stage('numstat', items=1):
+            commit_stats = commit.stats
+        stats = commit_stats.total
         ai_lines = 0
         
         # Check for AI patterns in diff
         if len(commit.parents) > 0:
-            for item in commit.diff(commit.parents[0]):
+            with stage('diff', items=1):
+                diffs = commit.diff(commit.parents[0])
+            for item in diffs:
                 if not item.a_blob or not item.b_blob:
                     continue
                     
                 try:
-                    diff_text = item.diff.decode('utf-8', errors='ignore')
-                    for line in diff_text.split('\n'):
-                        if line.startswith('+') and any(re.search(pattern, line) for pattern in self.ai_patterns):
-                            ai_lines += 1
+                    with stage('diff_decode', items=1):
+                        diff_text = item.diff.decode('utf-8', errors='ignore')
+                    lines = diff_text.split('\n')
+                    with stage('pattern_match', items=len(lines)):
+                        for line in lines:
+                            if line.startswith('+') and any(re.search(pattern, line) for pattern in self.ai_patterns):
+                                ai_lines += 1
                 except Exception:
                     pass
         
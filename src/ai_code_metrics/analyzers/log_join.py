@@ -0,0 +1,116 @@
+"""Streaming correlation of timing metrics with API usage records."""
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+# Longest tracked call we expect an API request to be nested inside. API
+# records older than this relative to the current timing record are released
+# as unattributed, which is what keeps the join's memory bounded.
+DEFAULT_JOIN_WINDOW = 3600.0
+
+
+@dataclass
+class JoinedTiming:
+    """A timing record together with the API calls made while it ran."""
+    timing: dict[str, Any]
+    api_calls: list[dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def api_cost(self) -> float:
+        """Total cost of the API calls attributed to this timing record."""
+        return sum(call.get('total_cost', 0.0) for call in self.api_calls)
+
+
+def _start_time(record: dict[str, Any]) -> float:
+    """Wall-clock start of a record, derived from its end timestamp and duration."""
+    return record['timestamp'] - record.get('duration', 0.0)
+
+
+def join_timing_with_api(timing_records: Iterable[dict[str, Any]],
+                         api_records: Iterable[dict[str, Any]],
+                         window: float = DEFAULT_JOIN_WINDOW,
+                         on_unmatched=None) -> Iterator[JoinedTiming]:
+    """Sort-merge join of timestamp-ordered timing and API usage streams.
+
+    API calls are matched on ``span_id`` when they carry one, otherwise on time
+    containment: the call started and finished inside the timing record.
+    Timing records without a ``span_id``, as written before spans existed,
+    also take span-tagged calls by time containment, so mixed logs still
+    attribute calls whose span never appears. Timing records arrive in
+    end-time order, so nested tracked functions are seen innermost-first and
+    claim their API calls before the enclosing call.
+
+    API records that no timing record has claimed within ``window`` seconds are
+    passed to ``on_unmatched`` (if given) and dropped from the buffer.
+    """
+    api_iter = iter(api_records)
+    lookahead = next(api_iter, None)
+    # Buffered API calls in end-time order as [record, claimed] pairs; claimed
+    # entries are left in place and dropped once they fall out of the window.
+    pending: deque[list] = deque()
+    # The entries of each span, also in end-time order, until its timing
+    # record claims them or they expire
+    by_span: dict[str, deque[list]] = {}
+
+    def release(entry):
+        record, claimed = entry
+        span_id = record.get('span_id')
+        # Entries expire oldest first, so an entry still listed under its span
+        # is at the front; one claimed by its span's timing record is not
+        spans = by_span.get(span_id) if span_id is not None else None
+        if spans and spans[0] is entry:
+            spans.popleft()
+            if not spans:
+                del by_span[span_id]
+        if not claimed and on_unmatched is not None:
+            on_unmatched(record)
+
+    for timing in timing_records:
+        end = timing['timestamp']
+        start = _start_time(timing)
+
+        # Pull every API call that finished no later than this timing record
+        while lookahead is not None and lookahead['timestamp'] <= end:
+            entry = [lookahead, False]
+            pending.append(entry)
+            span_id = lookahead.get('span_id')
+            if span_id is not None:
+                by_span.setdefault(span_id, deque()).append(entry)
+            lookahead = next(api_iter, None)
+
+        # Expire calls too old to be nested in any timing record still to come
+        while pending and pending[0][0]['timestamp'] < end - window:
+            release(pending.popleft())
+
+        joined = JoinedTiming(timing=timing)
+
+        span_id = timing.get('span_id')
+        if span_id is not None:
+            for entry in by_span.pop(span_id, ()):
+                if not entry[1]:
+                    entry[1] = True
+                    joined.api_calls.append(entry[0])
+
+        # Only calls that finished after this record started can be inside it
+        for entry in reversed(pending):
+            api_call, claimed = entry
+            if api_call['timestamp'] < start:
+                break
+            if claimed or (span_id is not None and 'span_id' in api_call):
+                continue
+            if _start_time(api_call) >= start:
+                entry[1] = True
+                joined.api_calls.append(api_call)
+
+        yield joined
+
+    for entry in pending:
+        if not entry[1] and on_unmatched is not None:
+            on_unmatched(entry[0])
+    if lookahead is not None and on_unmatched is not None:
+        on_unmatched(lookahead)
+    for record in api_iter:
+        if on_unmatched is not None:
+            on_unmatched(record)
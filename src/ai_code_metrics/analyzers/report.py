@@ -0,0 +1,120 @@
+"""Streaming reports of analyzed commits."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from ai_code_metrics.profiling import stage, stage_report
+from ai_code_metrics.security import CodeAnonymizer
+
+# Fields of commit records that identify people or code, and how each is anonymized
+ANONYMIZED_FIELDS = {
+    'author': 'value',
+    'author_email': 'value',
+    'message': 'text',
+    'files': 'paths',
+}
+
+
+def anonymize_commit(record: dict[str, Any], anonymizer: CodeAnonymizer) -> dict[str, Any]:
+    """A copy of a commit record with ``ANONYMIZED_FIELDS`` anonymized."""
+    record = dict(record)
+    for field, how in ANONYMIZED_FIELDS.items():
+        value = record.get(field)
+        if not value:
+            continue
+        if how == 'value':
+            record[field] = anonymizer.anonymize_value(value)
+        elif how == 'text':
+            record[field] = anonymizer.anonymize_text(value)
+        else:
+            record[field] = [anonymizer.anonymize_file_path(path) for path in value]
+    return record
+
+
+class CommitReport:
+    """Write an analysis report as commits arrive, in constant memory.
+
+    Each record is written (and anonymized, with an ``anonymizer``) as soon
+    as it is passed to ``write``, and only running totals are kept. In the
+    ``json`` format the report is one object whose ``commit_data`` array is
+    streamed and whose totals follow it; in ``ndjson`` it is one line per
+    commit followed by a ``summary`` line. While stages are being timed, the
+    totals end with the time spent in each stage.
+    """
+
+    def __init__(self, path: Path, header: dict[str, Any], format: str = 'json',
+                 anonymizer: CodeAnonymizer | None = None):
+        if format not in ('json', 'ndjson'):
+            raise ValueError(f"Unknown report format: {format}")
+        self.path = Path(path)
+        self.header = header
+        self.format = format
+        self.anonymizer = anonymizer
+        self.total_commits = 0
+        self.ai_assisted_commits = 0
+        self.total_lines_added = 0
+        self.total_lines_deleted = 0
+        self.ai_generated_lines = 0
+        self._file = None
+
+    def __enter__(self) -> 'CommitReport':
+        self._file = open(self.path, 'w')
+        if self.format == 'json':
+            self._file.write(json.dumps(self.header, indent=2)[:-2] + ',\n  "commit_data": [')
+        else:
+            self._file.write(json.dumps({'type': 'header', **self.header}) + '\n')
+        self._file.flush()
+        return self
+
+    def write(self, record: dict[str, Any]) -> None:
+        """Add one commit's metrics to the report."""
+        self.total_commits += 1
+        ai_lines = record.get('ai_generated_lines', 0)
+        self.ai_assisted_commits += ai_lines > 0
+        self.ai_generated_lines += ai_lines
+        self.total_lines_added += record.get('lines_added', 0)
+        self.total_lines_deleted += record.get('lines_deleted', 0)
+
+        if self.anonymizer is not None:
+            with stage('anonymize', items=1):
+                record = anonymize_commit(record, self.anonymizer)
+        with stage('json_write', items=1):
+            if self.format == 'json':
+                separator = ',' if self.total_commits > 1 else ''
+                self._file.write(f"{separator}\n    {json.dumps(record)}")
+            else:
+                self._file.write(json.dumps({'type': 'commit', **record}) + '\n')
+            self._file.flush()
+
+    @property
+    def summary(self) -> dict[str, Any]:
+        """Totals over the commits written so far."""
+        return {
+            'total_commits': self.total_commits,
+            'ai_assisted_commits': self.ai_assisted_commits,
+            'ai_assisted_percentage': round(
+                self.ai_assisted_commits / self.total_commits * 100 if self.total_commits else 0, 2
+            ),
+            'total_lines_added': self.total_lines_added,
+            'total_lines_deleted': self.total_lines_deleted,
+            'ai_generated_lines': self.ai_generated_lines,
+            'ai_generated_percentage': round(
+                self.ai_generated_lines / self.total_lines_added * 100 if self.total_lines_added else 0, 2
+            ),
+        }
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                summary = self.summary
+                stages = stage_report()
+                if stages is not None:
+                    summary['stages'] = stages
+                if self.format == 'json':
+                    totals = json.dumps(summary, indent=2)[1:]
+                    self._file.write(('\n  ' if self.total_commits else '') + '],' + totals + '\n')
+                else:
+                    self._file.write(json.dumps({'type': 'summary', **summary}) + '\n')
+        finally:
+            self._file.close()
@@ -1,61 +1,108 @@
 """ROI calculation for AI coding assistants."""
 
-import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+from ai_code_metrics.config import config
+from ai_code_metrics.profiling import timed_iter
+from ai_code_metrics.storage import API_USAGE, TIMING, MetricsStore
+from ai_code_metrics.storage.jsonl import iter_sorted_records
+
+from .log_join import join_timing_with_api
+
+
+def time_saved_seconds(duration, improvement_factor):
+    """Time saved by a task that took ``duration`` with AI assistance.
+
+    With an improvement factor ``f`` the task would have taken
+    ``duration / (1 - f)`` without AI. Works on scalars and NumPy arrays alike.
+    """
+    return duration * improvement_factor / (1 - improvement_factor)
+
 
 class ROICalculator:
     """Calculate return on investment for AI coding assistant usage."""
     
-    def __init__(self, hourly_rate: float = 75.0):
-        self.hourly_rate = hourly_rate
+    def __init__(self, hourly_rate: float | None = None, improvement_factor: float | None = None):
+        self.hourly_rate = hourly_rate if hourly_rate is not None else config.get("roi.hourly_rate", 75.0)
+        # Fraction of task time saved with AI assistance
+        self.improvement_factor = (
+            improvement_factor if improvement_factor is not None
+            else config.get("roi.improvement_factor", 0.3)
+        )
+        if not 0 <= self.improvement_factor < 1:
+            raise ValueError(
+                f"improvement_factor must be at least 0 and less than 1, got {self.improvement_factor}"
+            )
     
-    def calculate_roi(self, metrics_files: list[Path], period_days: int = 30) -> dict[str, Any]:
-        """Calculate ROI for AI coding assistant usage."""
+    def calculate_roi(self, metrics_files: list[Path], period_days: int = 30,
+                      api_usage_files: list[Path] | None = None) -> dict[str, Any]:
+        """Calculate ROI for AI coding assistant usage.
+
+        Timing records from ``metrics_files`` are joined against API usage
+        records from ``api_usage_files`` as both are streamed in timestamp
+        order, so neither log is loaded into memory in full.
+        """
+        cutoff_timestamp = (datetime.now() - timedelta(days=period_days)).timestamp()
+        return self._calculate(
+            iter_sorted_records(metrics_files, start=cutoff_timestamp),
+            iter_sorted_records(api_usage_files or [], start=cutoff_timestamp),
+            period_days
+        )
+    
+    def calculate_roi_from_store(self, store: MetricsStore, period_days: int = 30) -> dict[str, Any]:
+        """Calculate ROI from records held in a metrics store."""
+        cutoff_timestamp = (datetime.now() - timedelta(days=period_days)).timestamp()
+        return self._calculate(
+            store.iter_records(TIMING, start=cutoff_timestamp),
+            store.iter_records(API_USAGE, start=cutoff_timestamp),
+            period_days
+        )
+    
+    def _calculate(self, timing_stream, api_stream, period_days: int) -> dict[str, Any]:
+        """Calculate ROI from timestamp-ordered timing and API usage streams."""
         
         # Metrics collection
         total_time_saved = 0
         total_api_cost = 0
+        attributed_api_cost = 0
         quality_improvements = []
         metrics_count = 0
+        api_calls = 0
+        unattributed_calls = 0
         
-        # Time range for filtering
-        cutoff_date = datetime.now() - timedelta(days=period_days)
-        cutoff_timestamp = cutoff_date.timestamp()
+        def count_unattributed(api_call):
+            nonlocal total_api_cost, api_calls, unattributed_calls
+            api_calls += 1
+            unattributed_calls += 1
+            total_api_cost += api_call.get('total_cost', 0.0)
         
-        # Process each metrics file
-        for metrics_file in metrics_files:
-            if not metrics_file.exists():
-                continue
+        # Reading, parsing and joining the logs happens as records are fetched
+        joined_stream = join_timing_with_api(timing_stream, api_stream,
+                                             on_unmatched=count_unattributed)
+        for joined in timed_iter('roi_read_join', joined_stream):
+            metric = joined.timing
+            try:
+                metrics_count += 1
                 
-            with open(metrics_file) as f:
-                for line in f:
-                    try:
-                        metric = json.loads(line)
-                        
-                        # Skip metrics outside our time range
-                        if metric.get('timestamp', 0) < cutoff_timestamp:
-                            continue
-                            
-                        metrics_count += 1
-                        
-                        # Calculate time savings (assuming 30% improvement)
-                        if metric.get('ai_assisted'):
-                            baseline_time = metric['duration'] / 0.7  # Assuming 30% faster with AI
-                            time_saved = baseline_time - metric['duration']
-                            total_time_saved += time_saved
-                        
-                        # Track API costs
-                        if 'api_cost' in metric:
-                            total_api_cost += metric['api_cost']
-                        
-                        # Track quality improvements
-                        if 'quality_score' in metric:
-                            quality_improvements.append(metric['quality_score'])
-                    except Exception:
-                        continue
+                # Calculate time savings from the configured improvement factor
+                if metric.get('ai_assisted'):
+                    total_time_saved += time_saved_seconds(metric['duration'], self.improvement_factor)
+                
+                # Track API costs, both logged inline and joined from API usage logs
+                if 'api_cost' in metric:
+                    total_api_cost += metric['api_cost']
+                api_calls += len(joined.api_calls)
+                attributed_api_cost += joined.api_cost
+                total_api_cost += joined.api_cost
+                
+                # Track quality improvements
+                if 'quality_score' in metric:
+                    quality_improvements.append(metric['quality_score'])
+            except (KeyError, TypeError):
+                # Records missing a duration or with non-numeric values
+                continue
         
         # Calculate financial impact
         hours_saved = total_time_saved / 3600  # Convert seconds to hours
@@ -77,10 +124,14 @@ class ROICalculator:
         
         return {
             'period_days': period_days,
+            'improvement_factor': self.improvement_factor,
             'metrics_analyzed': metrics_count,
             'total_hours_saved': round(hours_saved, 2),
             'dollar_value_saved': round(dollar_value_saved, 2),
             'total_api_cost': round(total_api_cost, 2),
+            'attributed_api_cost': round(attributed_api_cost, 2),
+            'api_calls_analyzed': api_calls,
+            'unattributed_api_calls': unattributed_calls,
             'net_savings': round(net_savings, 2),
             'roi_percentage': round(roi_percentage, 2),
             'average_quality_score': round(avg_quality, 2),
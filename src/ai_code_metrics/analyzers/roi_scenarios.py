@@ -0,0 +1,302 @@
+"""Vectorized ROI scenario analysis for AI coding assistants."""
+
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is an optional dependency
+    np = None
+
+from ai_code_metrics.storage import API_USAGE, TIMING, MetricsStore
+from ai_code_metrics.storage.jsonl import files_since, iter_jsonl
+
+from .roi_calculator import time_saved_seconds
+
+NUMPY_MISSING = ("numpy is required for ROI scenario analysis; "
+                 "install it with: pip install 'ai-code-metrics[analysis]'")
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Per-file column caches live in this directory next to the logs
+CACHE_DIR = '.roi_cache'
+
+
+def _timing_columns(path: Path | None) -> dict[str, 'np.ndarray']:
+    """Parse the ROI-relevant columns of a timing log."""
+    timestamps, durations, ai_assisted, costs, models = [], [], [], [], []
+    for metric in iter_jsonl(path) if path else ():
+        timestamps.append(metric['timestamp'])
+        durations.append(metric.get('duration', 0.0))
+        ai_assisted.append(bool(metric.get('ai_assisted')))
+        costs.append(metric.get('api_cost', np.nan))
+        models.append(metric.get('model', 'unknown'))
+    return {
+        'timestamp': np.array(timestamps, dtype=np.float64),
+        'duration': np.array(durations, dtype=np.float64),
+        'ai_assisted': np.array(ai_assisted, dtype=bool),
+        'cost': np.array(costs, dtype=np.float64),
+        'model': np.array(models, dtype=str),
+    }
+
+
+def _api_columns(path: Path | None) -> dict[str, 'np.ndarray']:
+    """Parse the ROI-relevant columns of an API usage log."""
+    timestamps, costs, models = [], [], []
+    for usage in iter_jsonl(path) if path else ():
+        timestamps.append(usage['timestamp'])
+        costs.append(usage.get('total_cost', 0.0))
+        models.append(usage.get('model', 'unknown'))
+    return {
+        'timestamp': np.array(timestamps, dtype=np.float64),
+        'cost': np.array(costs, dtype=np.float64),
+        'model': np.array(models, dtype=str),
+    }
+
+
+def _load_columns(files: list[Path], parse, cache_name: str) -> dict[str, 'np.ndarray']:
+    """Load the concatenated columns of several logs through a single cache file.
+
+    The cache stores each log's columns together with its size and mtime; only
+    logs that are new or changed since the cache was written are re-parsed.
+    """
+    if not files:
+        return parse(None)
+
+    cache_file = files[0].parent / CACHE_DIR / f'{cache_name}.npz'
+    cached: dict[str, tuple] = {}
+    if cache_file.exists():
+        try:
+            with np.load(cache_file) as data:
+                bounds = data['bounds']
+                columns = {name: data[name] for name in data.files
+                           if name not in ('names', 'keys', 'bounds')}
+                for i, name in enumerate(data['names']):
+                    cached[str(name)] = (data['keys'][i], {
+                        column: values[bounds[i]:bounds[i + 1]] for column, values in columns.items()
+                    })
+        except (OSError, ValueError, KeyError):
+            cached = {}
+
+    changed = False
+    entries = {}
+    for path in files:
+        stat = path.stat()
+        key = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        entry = cached.get(path.name)
+        if entry is None or not np.array_equal(entry[0], key):
+            entry = (key, parse(path))
+            changed = True
+        entries[path.name] = entry
+
+    if changed:
+        # Keep cached logs that were not requested this time, as long as they still exist
+        all_entries = {
+            name: entry for name, entry in cached.items()
+            if name not in entries and (cache_file.parent.parent / name).exists()
+        }
+        all_entries.update(entries)
+        _save_columns(cache_file, all_entries)
+
+    parts = [entry[1] for entry in entries.values()]
+    return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+
+
+def _save_columns(cache_file: Path, entries) -> None:
+    """Atomically write per-log columns to a single cache file."""
+    names = list(entries)
+    parts = [entries[name][1] for name in names]
+    bounds = np.cumsum([0] + [len(part['timestamp']) for part in parts])
+    try:
+        cache_file.parent.mkdir(exist_ok=True)
+        tmp_file = cache_file.with_suffix('.tmp')
+        with open(tmp_file, 'wb') as f:
+            np.savez(
+                f,
+                names=np.array(names, dtype=str),
+                keys=np.array([entries[name][0] for name in names], dtype=np.int64),
+                bounds=bounds,
+                **{column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+            )
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+@dataclass
+class ParameterRange:
+    """Triangular distribution of an uncertain ROI input."""
+    low: float
+    base: float
+    high: float
+
+    @classmethod
+    def fixed(cls, value: float) -> 'ParameterRange':
+        """A parameter with no uncertainty."""
+        return cls(value, value, value)
+
+    def sample(self, rng, size) -> 'np.ndarray':
+        """Draw ``size`` samples (an int or shape tuple)."""
+        if self.low == self.high:
+            return np.full(size, self.base, dtype=np.float64)
+        return rng.triangular(self.low, self.base, self.high, size)
+
+
+class ROIScenarioEngine:
+    """Evaluate ROI over many parameter scenarios in a single vectorized pass.
+
+    Durations of AI-assisted tasks and API costs (grouped by model) are loaded
+    once; every scenario is then a handful of array operations, so thousands of
+    scenarios cost about as much as one.
+    """
+
+    def __init__(self, durations, costs, cost_models: list[str], model_index):
+        if np is None:
+            raise ImportError(NUMPY_MISSING)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.models = cost_models
+        self.model_costs = np.bincount(
+            np.asarray(model_index, dtype=np.int64),
+            weights=np.asarray(costs, dtype=np.float64),
+            minlength=len(cost_models)
+        )
+        self.total_duration = float(self.durations.sum())
+
+    @classmethod
+    def from_logs(cls, metrics_files: list[Path], api_usage_files: list[Path],
+                  period_days: int = 30) -> 'ROIScenarioEngine':
+        """Load AI-assisted durations and per-model API costs from daily logs.
+
+        Each log file is parsed into columns once and cached alongside the
+        logs, so repeated runs only re-parse files that changed since
+        (usually just today's).
+        """
+        if np is None:
+            raise ImportError(NUMPY_MISSING)
+
+        start = (datetime.now() - timedelta(days=period_days)).timestamp()
+
+        timing = _load_columns(files_since(metrics_files, start), _timing_columns, 'timing')
+        in_range = timing['timestamp'] >= start
+        durations = timing['duration'][in_range & timing['ai_assisted']]
+        has_cost = in_range & ~np.isnan(timing['cost'])
+
+        usage = _load_columns(files_since(api_usage_files, start), _api_columns, 'api_usage')
+        in_range = usage['timestamp'] >= start
+        costs = np.concatenate([timing['cost'][has_cost], usage['cost'][in_range]])
+        models = np.concatenate([timing['model'][has_cost], usage['model'][in_range]])
+
+        cost_models, model_index = np.unique(models, return_inverse=True)
+        return cls(durations, costs, [str(m) for m in cost_models], model_index)
+
+    @classmethod
+    def from_store(cls, store: MetricsStore, period_days: int = 30) -> 'ROIScenarioEngine':
+        """Load the engine's inputs with aggregate queries against a metrics store."""
+        start = (datetime.now() - timedelta(days=period_days)).timestamp()
+
+        durations = []
+        costs = []
+        models: list[str] = []
+        for group in store.aggregate(TIMING, group_by=('ai_assisted',), start=start):
+            if group['ai_assisted']:
+                durations.append(group['total_duration'])
+            if group['total_cost']:
+                costs.append(group['total_cost'])
+                models.append('unknown')
+        for group in store.aggregate(API_USAGE, group_by=('model',), start=start):
+            costs.append(group['total_cost'])
+            models.append(group['model'] or 'unknown')
+
+        cost_models = sorted(set(models))
+        model_index = [cost_models.index(model) for model in models]
+        return cls(durations, costs, cost_models, model_index)
+
+    def evaluate(self, improvement_factors, hourly_rates, price_multipliers) -> dict[str, Any]:
+        """Evaluate arrays of scenarios element-wise.
+
+        ``price_multipliers`` is either one multiplier per scenario or a
+        ``(scenarios, models)`` matrix with an independent change per model.
+        """
+        hours_saved = time_saved_seconds(self.total_duration, np.asarray(improvement_factors)) / 3600
+        value_saved = hours_saved * np.asarray(hourly_rates)
+
+        price_multipliers = np.asarray(price_multipliers, dtype=np.float64)
+        if price_multipliers.ndim == 2:
+            api_cost = price_multipliers @ self.model_costs
+        else:
+            api_cost = price_multipliers * self.model_costs.sum()
+
+        net_savings = value_saved - api_cost
+        # Without API cost, as in ROICalculator: 0 if nothing was saved either
+        with np.errstate(divide='ignore', invalid='ignore'):
+            roi = np.where(api_cost > 0, net_savings / api_cost * 100,
+                           np.where(net_savings == 0, 0.0, np.inf))
+
+        return {
+            'hours_saved': hours_saved,
+            'dollar_value_saved': value_saved,
+            'api_cost': api_cost,
+            'net_savings': net_savings,
+            'roi_percentage': roi,
+        }
+
+    def simulate(self, improvement_factor: ParameterRange, hourly_rate: ParameterRange,
+                 price_change: ParameterRange, scenarios: int = 10_000,
+                 seed: int | None = None) -> dict[str, Any]:
+        """Monte Carlo simulation over the uncertain ROI inputs.
+
+        Price changes are sampled independently for each model.
+        """
+        rng = np.random.default_rng(seed)
+        results = self.evaluate(
+            improvement_factor.sample(rng, scenarios),
+            hourly_rate.sample(rng, scenarios),
+            price_change.sample(rng, (scenarios, len(self.models)))
+        )
+
+        summary = {
+            'scenarios': scenarios,
+            'probability_positive_net_savings': round(float((results['net_savings'] > 0).mean()), 4),
+            'percentiles': {},
+            'sensitivity': self.tornado(improvement_factor, hourly_rate, price_change),
+        }
+        for name in ('hours_saved', 'net_savings', 'roi_percentage'):
+            values = np.percentile(results[name], PERCENTILES)
+            summary['percentiles'][name] = {
+                f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, values, strict=True)
+            }
+        return summary
+
+    def tornado(self, improvement_factor: ParameterRange, hourly_rate: ParameterRange,
+                price_change: ParameterRange) -> list[dict[str, Any]]:
+        """One-at-a-time sensitivity of net savings, largest swing first."""
+        params = {
+            'improvement_factor': improvement_factor,
+            'hourly_rate': hourly_rate,
+            'price_change': price_change,
+        }
+        names = list(params)
+        # Row 0 is the base case, then a low and a high row per parameter
+        grid = np.array([[p.base for p in params.values()]] * (1 + 2 * len(names)))
+        for i, name in enumerate(names):
+            grid[1 + 2 * i, i] = params[name].low
+            grid[2 + 2 * i, i] = params[name].high
+
+        net = self.evaluate(grid[:, 0], grid[:, 1], grid[:, 2])['net_savings']
+        base = float(net[0])
+        bars = []
+        for i, name in enumerate(names):
+            low, high = float(net[1 + 2 * i]), float(net[2 + 2 * i])
+            bars.append({
+                'parameter': name,
+                'low_value': params[name].low,
+                'high_value': params[name].high,
+                'net_savings_at_low': round(low, 2),
+                'net_savings_at_high': round(high, 2),
+                'swing': round(abs(high - low), 2),
+                'base_net_savings': round(base, 2),
+            })
+        return sorted(bars, key=lambda bar: bar['swing'], reverse=True)
@@ -1,11 +1,30 @@
 """Command-line interface for AI Code Metrics."""
 
 import argparse
+import json
 import sys
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 
-from ai_code_metrics.analyzers import GitMetricsAnalyzer, ROICalculator
-from ai_code_metrics.exporters.prometheus_exporter import app as prometheus_app
+from ai_code_metrics.config import config
+from ai_code_metrics.storage import (
+    API_USAGE,
+    KINDS,
+    TIMING,
+    JsonlStore,
+    RetentionPolicy,
+    open_store,
+)
+from ai_code_metrics.storage.jsonl import log_files
+
+
+def improvement_factor(value: str) -> float:
+    """Argparse type for a fraction of task time saved, at least 0 and below 1."""
+    factor = float(value)
+    if not 0 <= factor < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 0 and less than 1, got {value}")
+    return factor
 
 
 def main():
@@ -13,15 +32,42 @@ def main():
     parser = argparse.ArgumentParser(
         description="AI Code Metrics - Measure AI coding assistant effectiveness"
     )
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the command and report time spent per stage on stderr")
+    parser.add_argument("--profiler", choices=["cprofile", "sampling", "stages"], default="cprofile",
+                        help="cProfile (pstats file), sampling of every thread (collapsed stacks), "
+                             "or stage timing only")
+    parser.add_argument("--profile-output", type=str, default=None,
+                        help="Profile file (default: ai-metrics-<command>.prof or .folded)")
+    parser.add_argument("--profile-interval", type=float, default=0.005,
+                        help="Seconds between samples of the sampling profiler")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
     # Analyze command
-    analyze_parser = subparsers.add_parser("analyze", help="Analyze Git repository")
+    analyze_parser = subparsers.add_parser(
+        "analyze", help="Analyze Git repository",
+        description="Analyze a Git repository. The report lists every commit with its "
+                    "author's name; use --anonymize before sharing it."
+    )
     analyze_parser.add_argument("--repo-path", type=str, default=".", help="Path to Git repository")
     analyze_parser.add_argument("--days", type=int, default=7, help="Number of days to analyze")
     analyze_parser.add_argument("--output", type=str, default="metrics_report.json", 
                                help="Output file path")
-    analyze_parser.add_argument("--anonymize", action="store_true", help="Anonymize sensitive data")
+    analyze_parser.add_argument("--anonymize", action="store_true",
+                               help="Anonymize author names")
+    analyze_parser.add_argument("--format", choices=["json", "ndjson"], default=None,
+                               help="Report format (default: ndjson for .ndjson/.jsonl output, else json)")
+    
+    # Dashboard command
+    dashboard_parser = subparsers.add_parser("dashboard", help="Build a static HTML dashboard")
+    dashboard_parser.add_argument("--repo-path", type=str, default=".", help="Path to Git repository")
+    dashboard_parser.add_argument("--days", type=int, default=30, help="Number of days to include")
+    dashboard_parser.add_argument("--output-dir", type=str, default="dashboard",
+                                 help="Directory to write the dashboard to")
+    dashboard_parser.add_argument("--metrics-dir", type=str, default=None,
+                                 help="Metrics for the time saved card (default: metrics_storage_path)")
+    dashboard_parser.add_argument("--anonymize", action="store_true",
+                                 help="Anonymize authors and commit messages")
     
     # Export command
     export_parser = subparsers.add_parser("export", help="Export metrics to Prometheus")
@@ -30,7 +76,11 @@ def main():
     export_parser.add_argument("--port", type=int, default=8080, 
                               help="Port to listen on")
     export_parser.add_argument("--debug", action="store_true", 
-                              help="Run in debug mode")
+                              help="Run in debug mode (uses the Flask development server)")
+    export_parser.add_argument("--server", choices=["threaded", "flask"], default="threaded",
+                              help="HTTP server to use (default: threaded keep-alive server)")
+    export_parser.add_argument("--backfill-days", type=float, default=None,
+                              help="Only ingest history from the last N days on startup")
     
     # ROI command
     roi_parser = subparsers.add_parser("roi", help="Calculate ROI")
@@ -38,51 +88,137 @@ def main():
                            help="Directory containing metrics files")
     roi_parser.add_argument("--days", type=int, default=30, 
                            help="Number of days to include in calculation")
-    roi_parser.add_argument("--hourly-rate", type=float, default=75.0,
-                           help="Developer hourly rate for ROI calculation")
+    roi_parser.add_argument("--hourly-rate", type=float, default=None,
+                           help="Developer hourly rate for ROI calculation (default: roi.hourly_rate)")
+    roi_parser.add_argument("--improvement-factor", type=improvement_factor, default=None,
+                           help="Fraction of task time saved with AI (default: roi.improvement_factor)")
+    roi_parser.add_argument("--simulate", type=int, default=0, metavar="N",
+                           help="Run N Monte Carlo scenarios over the ranges below "
+                                "(needs numpy: pip install 'ai-code-metrics[analysis]')")
+    roi_parser.add_argument("--improvement-range", type=improvement_factor, nargs=2,
+                           metavar=("LOW", "HIGH"),
+                           help="Range of improvement factors to simulate")
+    roi_parser.add_argument("--rate-range", type=float, nargs=2, metavar=("LOW", "HIGH"),
+                           help="Range of hourly rates to simulate")
+    roi_parser.add_argument("--price-range", type=float, nargs=2, metavar=("LOW", "HIGH"),
+                           default=(1.0, 1.0), help="Range of API price multipliers to simulate")
+    roi_parser.add_argument("--seed", type=int, default=None, help="Random seed for simulation")
+    roi_parser.add_argument("--db", type=str, default=None,
+                           help="Read metrics from this SQLite database instead of JSONL files")
+    
+    # Migrate command
+    migrate_parser = subparsers.add_parser("migrate", help="Import JSONL history into SQLite")
+    migrate_parser.add_argument("--metrics-dir", type=str, default=None,
+                               help="Directory containing metrics files (default: metrics_storage_path)")
+    migrate_parser.add_argument("--db", type=str, default=None,
+                               help="SQLite database to import into (default: storage.sqlite_path)")
+    
+    # Query command
+    query_parser = subparsers.add_parser("query", help="Query stored metrics")
+    query_parser.add_argument("--kind", choices=KINDS, default=TIMING, help="Kind of record to query")
+    query_parser.add_argument("--since", type=str, default=None,
+                             help="Start of the time range (ISO date or datetime)")
+    query_parser.add_argument("--until", type=str, default=None,
+                             help="End of the time range, exclusive (ISO date or datetime)")
+    query_parser.add_argument("--group-by", type=str, default=None,
+                             help="Comma-separated fields to aggregate by, e.g. day,model")
+    query_parser.add_argument("--backend", choices=["jsonl", "sqlite"], default=None,
+                             help="Storage backend (default: storage.backend)")
+    query_parser.add_argument("--path", type=str, default=None,
+                             help="Metrics directory (jsonl) or database file (sqlite)")
+    
+    # Backfill command
+    backfill_parser = subparsers.add_parser(
+        "backfill", help="Write historical metrics as OpenMetrics files for promtool"
+    )
+    backfill_parser.add_argument("--metrics-dir", type=str, default=None,
+                                help="Directory containing metrics files (default: metrics_storage_path)")
+    backfill_parser.add_argument("--output-dir", type=str, required=True,
+                                help="Directory to write one OpenMetrics file per block to")
+    backfill_parser.add_argument("--since", type=str, default=None,
+                                help="Start of the time range (ISO date or datetime)")
+    backfill_parser.add_argument("--until", type=str, default=None,
+                                help="End of the time range, exclusive (default: now)")
+    backfill_parser.add_argument("--block-hours", type=float, default=2.0,
+                                help="Hours of history per output file")
+    backfill_parser.add_argument("--step", type=float, default=60.0,
+                                help="Seconds between samples of a series")
+    backfill_parser.add_argument("--label", action="append", default=[], metavar="NAME=VALUE",
+                                help="Extra label added to every series, e.g. job=ai_metrics")
+    
+    # Compact command
+    compact_parser = subparsers.add_parser("compact", help="Compress and prune old metrics logs")
+    compact_parser.add_argument("--metrics-dir", type=str, default=None,
+                               help="Directory containing metrics files (default: metrics_storage_path)")
+    compact_parser.add_argument("--compress-after-days", type=int, default=None,
+                               help="Compress logs at least this many days old (default: retention config)")
+    compact_parser.add_argument("--codec", choices=["gzip", "lzma"], default=None,
+                               help="Compression codec (default: retention.codec)")
+    compact_parser.add_argument("--max-age-days", type=int, default=None,
+                               help="Delete logs older than this many days")
+    compact_parser.add_argument("--max-total-mb", type=float, default=None,
+                               help="Delete the oldest logs until the directory is at most this size")
     
     args = parser.parse_args()
     
+    if args.command is None:
+        parser.print_help()
+        return 1
+    
+    if args.profile:
+        from ai_code_metrics.profiling import PROFILE_SUFFIXES, profile
+        
+        output = args.profile_output or (
+            f"ai-metrics-{args.command}{PROFILE_SUFFIXES.get(args.profiler, '')}"
+        )
+        with profile(args.profiler, Path(output), args.profile_interval):
+            run_command(args)
+    else:
+        run_command(args)
+    
+    return 0
+
+
+def run_command(args):
+    """Run the subcommand selected on the command line."""
     if args.command == "analyze":
         run_analyze(args)
+    elif args.command == "dashboard":
+        run_dashboard(args)
     elif args.command == "export":
         run_export(args)
     elif args.command == "roi":
         run_roi(args)
-    else:
-        parser.print_help()
-        return 1
-    
-    return 0
+    elif args.command == "migrate":
+        run_migrate(args)
+    elif args.command == "query":
+        run_query(args)
+    elif args.command == "backfill":
+        run_backfill(args)
+    elif args.command == "compact":
+        run_compact(args)
 
 
 def run_analyze(args):
-    """Run Git repository analysis."""
+    """Run Git repository analysis, writing each commit to the report as it is analyzed."""
     try:
+        from ai_code_metrics.analyzers import GitMetricsAnalyzer
+        from ai_code_metrics.analyzers.report import CommitReport
+        from ai_code_metrics.security import CodeAnonymizer
+        
         print(f"Analyzing repository: {args.repo_path}")
         analyzer = GitMetricsAnalyzer(args.repo_path)
-        metrics = analyzer.analyze_recent_commits(days=args.days)
-        
-        # Calculate basic stats
-        total_commits = len(metrics)
-        ai_commits = sum(1 for m in metrics if m.get('ai_generated_lines', 0) > 0)
-        total_lines_added = sum(m.get('lines_added', 0) for m in metrics)
-        ai_lines = sum(m.get('ai_generated_lines', 0) for m in metrics)
-        
-        # Generate report
-        import json
-        with open(args.output, 'w') as f:
-            json.dump({
-                'repository': args.repo_path,
-                'days_analyzed': args.days,
-                'total_commits': total_commits,
-                'ai_assisted_commits': ai_commits,
-                'ai_assisted_percentage': round(ai_commits / total_commits * 100 if total_commits else 0, 2),
-                'total_lines_added': total_lines_added,
-                'ai_generated_lines': ai_lines,
-                'ai_generated_percentage': round(ai_lines / total_lines_added * 100 if total_lines_added else 0, 2),
-                'commit_data': metrics
-            }, f, indent=2)
+        anonymizer = None
+        if args.anonymize or config.get("security.anonymize", False):
+            anonymizer = CodeAnonymizer(config.get("security.salt", "change-this-salt"))
+        report_format = args.format or (
+            "ndjson" if Path(args.output).suffix in (".ndjson", ".jsonl") else "json"
+        )
+        
+        header = {'repository': args.repo_path, 'days_analyzed': args.days}
+        with CommitReport(Path(args.output), header, report_format, anonymizer) as report:
+            for commit_metrics in analyzer.iter_recent_commits(days=args.days):
+                report.write(commit_metrics)
         
         print(f"Metrics saved to {args.output}")
         
@@ -93,11 +229,66 @@ def run_analyze(args):
     return 0
 
 
+def run_dashboard(args):
+    """Build or update the static HTML dashboard."""
+    try:
+        import hashlib
+        
+        from ai_code_metrics.analyzers import (
+            CommitAnalyzer,
+            CommitCache,
+            DashboardBuilder,
+            ROICalculator,
+        )
+        from ai_code_metrics.security import CodeAnonymizer
+        
+        anonymizer = None
+        if args.anonymize or config.get("security.anonymize", False):
+            anonymizer = CodeAnonymizer(config.get("security.salt", "change-this-salt"))
+        metrics_dir = Path(args.metrics_dir) if args.metrics_dir else config.get_metrics_path()
+        
+        # Analyzed commits are cached outside the (possibly published) output directory
+        repo_key = hashlib.sha256(str(Path(args.repo_path).resolve()).encode()).hexdigest()[:12]
+        cache = CommitCache(metrics_dir / "cache" / f"commits-{repo_key}.json")
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=args.days)
+        commits = CommitAnalyzer(args.repo_path).analyze_commits(
+            since=start_date.strftime("%Y-%m-%d"), cache=cache
+        )
+        cache.save()
+        
+        roi = None
+        timing_files = log_files(metrics_dir, TIMING) if metrics_dir.exists() else []
+        if timing_files:
+            roi = ROICalculator().calculate_roi(timing_files, period_days=args.days,
+                                                api_usage_files=log_files(metrics_dir, API_USAGE))
+        
+        header = {
+            "repository": Path(args.repo_path).resolve().name,
+            "period": f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}",
+        }
+        stats = DashboardBuilder(Path(args.output_dir), anonymizer).build(commits, header, roi)
+        
+        print(f"Dashboard written to {Path(args.output_dir) / 'index.html'}")
+        print(f"Days updated: {stats['written']}, unchanged: {stats['unchanged']}, "
+              f"removed: {stats['removed']}")
+        
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    return 0
+
+
 def run_export(args):
     """Run Prometheus metrics exporter."""
     try:
+        # Flask and prometheus_client are only needed by this command
+        from ai_code_metrics.exporters.prometheus_exporter import run_exporter
+        
         print(f"Starting Prometheus exporter on {args.host}:{args.port}")
-        prometheus_app.run(host=args.host, port=args.port, debug=args.debug)
+        run_exporter(args.host, args.port, backfill_days=args.backfill_days,
+                     debug=args.debug, server=args.server)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -108,24 +299,46 @@ def run_export(args):
 def run_roi(args):
     """Run ROI calculator."""
     try:
-        metrics_dir = Path(args.metrics_dir)
-        if not metrics_dir.exists():
-            print(f"Metrics directory not found: {metrics_dir}", file=sys.stderr)
-            return 1
+        from ai_code_metrics.analyzers import ROICalculator
         
-        metrics_files = list(metrics_dir.glob("timing_*.jsonl"))
-        if not metrics_files:
-            print(f"No metrics files found in {metrics_dir}", file=sys.stderr)
-            return 1
+        calculator = ROICalculator(hourly_rate=args.hourly_rate,
+                                   improvement_factor=args.improvement_factor)
         
-        calculator = ROICalculator(hourly_rate=args.hourly_rate)
-        roi_data = calculator.calculate_roi(metrics_files, period_days=args.days)
+        if args.db or config.get("storage.backend") == "sqlite":
+            with open_store("sqlite", Path(args.db) if args.db else None) as store:
+                if args.simulate:
+                    from ai_code_metrics.analyzers import ROIScenarioEngine  # imports numpy
+                    engine = ROIScenarioEngine.from_store(store, period_days=args.days)
+                    return run_roi_simulation(args, calculator, engine)
+                roi_data = calculator.calculate_roi_from_store(store, period_days=args.days)
+        else:
+            metrics_dir = Path(args.metrics_dir)
+            if not metrics_dir.exists():
+                print(f"Metrics directory not found: {metrics_dir}", file=sys.stderr)
+                return 1
+            
+            metrics_files = log_files(metrics_dir, TIMING)
+            if not metrics_files:
+                print(f"No metrics files found in {metrics_dir}", file=sys.stderr)
+                return 1
+            
+            api_usage_files = log_files(metrics_dir, API_USAGE)
+            
+            if args.simulate:
+                from ai_code_metrics.analyzers import ROIScenarioEngine  # imports numpy
+                engine = ROIScenarioEngine.from_logs(metrics_files, api_usage_files,
+                                                     period_days=args.days)
+                return run_roi_simulation(args, calculator, engine)
+            
+            roi_data = calculator.calculate_roi(metrics_files, period_days=args.days,
+                                                api_usage_files=api_usage_files)
         
         print("\nROI Analysis:")
         print(f"Period: {args.days} days")
         print(f"Total hours saved: {roi_data['total_hours_saved']}")
         print(f"Dollar value saved: ${roi_data['dollar_value_saved']}")
-        print(f"API cost: ${roi_data['total_api_cost']}")
+        print(f"API cost: ${roi_data['total_api_cost']} "
+              f"(${roi_data['attributed_api_cost']} attributed to tracked functions)")
         print(f"Net savings: ${roi_data['net_savings']}")
         print(f"ROI: {roi_data['roi_percentage']}%")
         
@@ -136,5 +349,131 @@ def run_roi(args):
     return 0
 
 
+def run_roi_simulation(args, calculator, engine):
+    """Run a Monte Carlo ROI simulation and print percentiles and sensitivity."""
+    from ai_code_metrics.analyzers import ParameterRange
+    
+    def parameter(value_range, base):
+        if not value_range:
+            return ParameterRange.fixed(base)
+        low, high = sorted(value_range)
+        return ParameterRange(low, min(max(base, low), high), high)
+    
+    summary = engine.simulate(
+        improvement_factor=parameter(args.improvement_range, calculator.improvement_factor),
+        hourly_rate=parameter(args.rate_range, calculator.hourly_rate),
+        price_change=parameter(args.price_range, 1.0),
+        scenarios=args.simulate,
+        seed=args.seed
+    )
+    
+    print(f"\nROI Simulation ({summary['scenarios']} scenarios, {args.days} days):")
+    for name, values in summary['percentiles'].items():
+        row = "  ".join(f"{p}={v}" for p, v in values.items())
+        print(f"{name:>16}: {row}")
+    print(f"P(net savings > 0): {summary['probability_positive_net_savings']}")
+    
+    print("\nSensitivity of net savings:")
+    for bar in summary['sensitivity']:
+        print(f"{bar['parameter']:>20}: ${bar['net_savings_at_low']} .. ${bar['net_savings_at_high']} "
+              f"(swing ${bar['swing']})")
+    
+    return 0
+
+
+def run_migrate(args):
+    """Import JSONL metrics history into the SQLite store."""
+    try:
+        metrics_dir = Path(args.metrics_dir) if args.metrics_dir else config.get_metrics_path()
+        with open_store("sqlite", Path(args.db) if args.db else None) as store:
+            imported = store.import_jsonl(JsonlStore(metrics_dir))
+        
+        for kind, count in imported.items():
+            print(f"Imported {count} {kind} records")
+        print(f"Database: {store.db_path}")
+        
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    return 0
+
+
+def run_query(args):
+    """Print stored records, or aggregates of them, as JSON lines."""
+    def timestamp(value):
+        return datetime.fromisoformat(value).timestamp() if value else None
+    
+    try:
+        group_by = tuple(f.strip() for f in args.group_by.split(",")) if args.group_by else None
+        with open_store(args.backend, Path(args.path) if args.path else None) as store:
+            start, end = timestamp(args.since), timestamp(args.until)
+            if group_by:
+                rows = store.aggregate(args.kind, group_by=group_by, start=start, end=end)
+            else:
+                rows = store.iter_records(args.kind, start=start, end=end)
+            for row in rows:
+                print(json.dumps(row))
+        
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    return 0
+
+
+def run_backfill(args):
+    """Write historical metrics logs as OpenMetrics blocks."""
+    try:
+        from ai_code_metrics.exporters.backfill import OpenMetricsBackfill
+        
+        metrics_dir = Path(args.metrics_dir) if args.metrics_dir else config.get_metrics_path()
+        start = datetime.fromisoformat(args.since).timestamp() if args.since else None
+        # Default to now so history does not overlap samples the exporter is about to scrape
+        end = datetime.fromisoformat(args.until).timestamp() if args.until else time.time()
+        extra_labels = dict(label.split("=", 1) for label in args.label)
+        
+        backfill = OpenMetricsBackfill(Path(args.output_dir), block_seconds=args.block_hours * 3600,
+                                       step_seconds=args.step, extra_labels=extra_labels)
+        files = backfill.run(log_files(metrics_dir, TIMING), log_files(metrics_dir, API_USAGE),
+                             start=start, end=end)
+        
+        print(f"Wrote {backfill.samples} samples to {len(files)} files in {args.output_dir}")
+        if files:
+            print("Import each file with:")
+            print(f"  promtool tsdb create-blocks-from openmetrics {files[0]} <prometheus data dir>")
+        
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    return 0
+
+
+def run_compact(args):
+    """Compress old metrics logs and delete those past retention."""
+    try:
+        metrics_dir = Path(args.metrics_dir) if args.metrics_dir else config.get_metrics_path()
+        policy = RetentionPolicy.from_config(config.get("retention", {}))
+        if args.compress_after_days is not None:
+            policy.compress_after_days = args.compress_after_days
+        if args.codec:
+            policy.codec = args.codec
+        if args.max_age_days is not None:
+            policy.max_age_days = args.max_age_days
+        if args.max_total_mb is not None:
+            policy.max_total_bytes = int(args.max_total_mb * 1024 * 1024)
+        
+        summary = policy.apply(metrics_dir)
+        print(f"Compressed {summary['compressed']} files, deleted {summary['deleted']} days, "
+              f"freed {summary['bytes_freed'] / 1024 / 1024:.1f} MB")
+        
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    
+    return 0
+
+
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
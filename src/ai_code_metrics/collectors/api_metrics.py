@@ -1,22 +1,48 @@
 """API usage tracking for AI coding assistants."""
 
-import json
 import time
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Any
 
-import tiktoken
-
+from ai_code_metrics.collectors.timing_metrics import current_span_id
 from ai_code_metrics.config import config
+from ai_code_metrics.exporters.multiprocess import PrometheusSink, default_sink
+from ai_code_metrics.storage import API_USAGE, MetricsStore, open_store
+
+
+@lru_cache(maxsize=32)
+def _encoding(model: str):
+    """The tiktoken encoding for a model, or None if it has none.
+
+    Loaded once per process, failures included. tiktoken is imported on
+    first use, since importing it and building an encoding are slow and
+    most processes never estimate tokens.
+    """
+    try:
+        import tiktoken
+
+        if model.startswith('claude'):
+            return tiktoken.get_encoding('cl100k_base')  # Claude models
+        return tiktoken.encoding_for_model(model)  # OpenAI models
+    except Exception:
+        return None
 
 
 class APIUsageTracker:
     """Tracks API usage and costs for AI coding assistants."""
     
-    def __init__(self):
+    def __init__(self, store: MetricsStore | None = None, sink: PrometheusSink | None = None):
+        """Log to ``store`` (default: the configured backend).
+
+        As with ``MetricsCollector``, a sink (configured or explicit) updates
+        metrics directly, and the store then only serves as an audit trail.
+        """
         self.usage_log = []
         self.metrics_path = config.get_metrics_path()
-        self.metrics_path.mkdir(exist_ok=True)
+        self.sink = sink or default_sink()
+        if store is None and (self.sink is None or config.get('prometheus.audit_log', True)):
+            store = open_store()
+        self.store = store
     
     def track_api_call(self, model: str, provider: str = 'anthropic'):
         """Decorator to track API calls, estimate token usage and calculate costs."""
@@ -37,7 +63,7 @@ class APIUsageTracker:
                 cost = self._calculate_cost(model, usage_data)
                 
                 # Log metrics
-                self._log_usage({
+                usage = {
                     'timestamp': time.time(),
                     'model': model,
                     'provider': provider,
@@ -46,7 +72,11 @@ class APIUsageTracker:
                     'total_cost': cost,
                     'duration': time.time() - start_time,
                     'function': func.__name__
-                })
+                }
+                span_id = current_span_id()
+                if span_id is not None:
+                    usage['span_id'] = span_id
+                self._log_usage(usage)
                 
                 return response
             return wrapper
@@ -54,16 +84,14 @@ class APIUsageTracker:
     
     def _estimate_tokens(self, text: str, model: str) -> int:
         """Estimate token count for a given text and model."""
-        try:
-            if model.startswith('claude'):
-                encoding = tiktoken.encoding_for_model('cl100k_base')  # Claude models
-            else:
-                encoding = tiktoken.encoding_for_model(model)  # OpenAI models
-                
-            return len(encoding.encode(text))
-        except Exception:
-            # Rough estimate: 4 chars = 1 token
-            return len(text) // 4
+        encoding = _encoding(model)
+        if encoding is not None:
+            try:
+                return len(encoding.encode(text))
+            except Exception:
+                pass
+        # Rough estimate: 4 chars = 1 token
+        return len(text) // 4
     
     def _extract_usage(self, response: Any, provider: str) -> dict[str, int]:
         """Extract token usage from API response."""
@@ -97,10 +125,8 @@ class APIUsageTracker:
         """Log API usage data."""
         self.usage_log.append(data)
         
-        # Also persist to file
-        date_str = time.strftime('%Y-%m-%d')
-        metrics_file = self.metrics_path / f'api_usage_{date_str}.jsonl'
-        
-        with open(metrics_file, 'a') as f:
-            json.dump(data, f)
-            f.write('\n')
\ No newline at end of file
+        if self.sink is not None:
+            self.sink.record_api_usage(data)
+        # Also persist to the configured backend
+        if self.store is not None:
+            self.store.append(API_USAGE, data)
\ No newline at end of file
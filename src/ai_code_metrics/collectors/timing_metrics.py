@@ -1,12 +1,26 @@
 """Timing metrics collection for AI coding assistants."""
 
-import json
 import threading
 import time
+import uuid
+from contextvars import ContextVar
 from dataclasses import asdict, dataclass
 from functools import wraps
 from pathlib import Path
 
+from ai_code_metrics.config import config
+from ai_code_metrics.exporters.multiprocess import PrometheusSink, default_sink
+from ai_code_metrics.storage import TIMING, JsonlStore, MetricsStore, open_store
+
+# Span of the innermost tracked function running in the current context, so
+# that API usage recorded inside it can be correlated with its timing record.
+_current_span: ContextVar[str | None] = ContextVar('ai_metrics_span', default=None)
+
+
+def current_span_id() -> str | None:
+    """Return the span ID of the innermost tracked function, if any."""
+    return _current_span.get()
+
 
 @dataclass
 class TimingContext:
@@ -16,14 +30,26 @@ class TimingContext:
     ai_assisted: bool = False
     iterations: int = 0
     success: bool = False
+    span_id: str | None = None
 
 
 class MetricsCollector:
     """Collects timing metrics for AI-assisted and manual coding tasks."""
     
-    def __init__(self, storage_path: Path = None):
-        self.storage_path = storage_path or Path.home() / '.ai_metrics'
-        self.storage_path.mkdir(exist_ok=True)
+    def __init__(self, storage_path: Path = None, store: MetricsStore | None = None,
+                 sink: PrometheusSink | None = None):
+        """Initialize with a metrics directory or an explicit storage backend.
+
+        Without either, the backend configured under ``storage`` is used.
+        With ``prometheus.multiprocess_dir`` set (or an explicit ``sink``),
+        metrics are also updated directly in this process, and records are
+        only stored as an audit trail if ``prometheus.audit_log`` is on.
+        """
+        self.sink = sink or default_sink()
+        if store is None and (self.sink is None or storage_path or config.get('prometheus.audit_log', True)):
+            store = JsonlStore(storage_path) if storage_path else open_store()
+        self.store = store
+        self.storage_path = storage_path or getattr(store, 'storage_path', None)
         self._local = threading.local()
         
     def track_function(self, ai_assisted: bool = False):
@@ -34,8 +60,10 @@ class MetricsCollector:
                 context = TimingContext(
                     function_name=func.__name__,
                     start_time=time.perf_counter(),
-                    ai_assisted=ai_assisted
+                    ai_assisted=ai_assisted,
+                    span_id=uuid.uuid4().hex[:16]
                 )
+                token = _current_span.set(context.span_id)
                 
                 try:
                     result = func(*args, **kwargs)
@@ -46,23 +74,21 @@ class MetricsCollector:
                     raise
                 finally:
                     end_time = time.perf_counter()
+                    _current_span.reset(token)
                     self._store_timing_metric(context, end_time)
             
             return wrapper
         return decorator
     
     def _store_timing_metric(self, context: TimingContext, end_time: float):
-        """Store timing metrics to a file."""
+        """Store timing metrics in the configured backend."""
         metric = {
             **asdict(context),
             'duration': end_time - context.start_time,
             'timestamp': time.time()
         }
         
-        # Append to daily file
-        date_str = time.strftime('%Y-%m-%d')
-        metrics_file = self.storage_path / f'timing_{date_str}.jsonl'
-        
-        with open(metrics_file, 'a') as f:
-            json.dump(metric, f)
-            f.write('\n')
\ No newline at end of file
+        if self.sink is not None:
+            self.sink.record_timing(metric)
+        if self.store is not None:
+            self.store.append(TIMING, metric)
\ No newline at end of file
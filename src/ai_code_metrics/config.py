@@ -1,9 +1,16 @@
 """Configuration handling for AI Code Metrics."""
 
+import copy
 import json
+import threading
+import time
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
+# Seconds between checks of the config file for changes
+RELOAD_INTERVAL = 1.0
+
 
 class Config:
     """Configuration manager for AI Code Metrics."""
@@ -12,7 +19,43 @@ class Config:
         "metrics_storage_path": str(Path.home() / ".ai_metrics"),
         "prometheus": {
             "host": "0.0.0.0",
-            "port": 8080
+            "port": 8080,
+            "poll_interval_seconds": 1.0,
+            "checkpoint_path": None,
+            "checkpoint_interval_seconds": 10.0,
+            "exposition_max_age_seconds": 5.0,
+            "git_repos": [],
+            "git_interval_seconds": 300.0,
+            "git_backfill_days": 30,
+            "response_time_buckets": None,  # default spans 1ms to 5 minutes; see GET /buckets
+            "quantiles": {
+                "quantiles": [0.5, 0.9, 0.99],
+                "windows": [300, 3600],  # seconds
+                "slots": 10,
+                "relative_accuracy": 0.01,
+                "max_bins": 2048
+            },
+            "cardinality": {
+                "max_values": 100,  # per label of each metric
+                "limits": {}  # e.g. {"ai_coding_requests_total": {"operation": {"max_values": 500, "allowlist": []}}}
+            },
+            # Set to have collectors count events in prometheus_client multiprocess
+            # files in this directory, which the exporter reads at scrape time
+            "multiprocess_dir": None,
+            "audit_log": True,  # whether collectors counting directly still log records
+            "ingest": {
+                "token": None,  # bearer token remote collectors must send to POST /ingest
+                # Without a token POST /ingest is refused unless this is set
+                "allow_unauthenticated": False,
+                "max_batch_bytes": 10485760,  # after decompression
+                "idempotency_keys": 10000
+            },
+            # Metrics roots to serve from one exporter, by tenant name, e.g.
+            # {"team-a": {"metrics_dir": "/data/team-a", "max_series": 5000,
+            #  "cardinality": {"max_values": 20}}}; entries override the
+            # settings above, except git_repos and checkpoint_path
+            "tenants": {},
+            "max_series": None  # per tenant, across all exported metrics
         },
         "models": {
             # Current pricing as of May 2024 - per 1M tokens
@@ -27,19 +70,116 @@ class Config:
             "hourly_rate": 75.0,
             "improvement_factor": 0.3  # 30% improvement with AI
         },
+        "storage": {
+            "backend": "jsonl",  # or "sqlite", or "remote" to send to an exporter
+            "sqlite_path": None,
+            "remote": {
+                "url": None,  # e.g. "http://metrics.internal:8080"
+                "token": None,
+                "batch_size": 500,
+                "flush_interval_seconds": 5.0,
+                "max_pending": 100000
+            }
+        },
+        "retention": {
+            "enabled": True,
+            "compress_after_days": 1,
+            "codec": "gzip",  # or "lzma"
+            "max_age_days": None,
+            "max_total_mb": None,
+            "interval_seconds": 3600
+        },
         "security": {
             "anonymize": False,
             "salt": "change-this-salt"
         }
     }
     
-    def __init__(self, config_path: Path | None = None):
-        """Initialize configuration with optional custom path."""
+    def __init__(self, config_path: Path | None = None, reload_interval: float = RELOAD_INTERVAL):
+        """Initialize configuration with optional custom path.
+
+        Nothing is read until the first lookup. After that, the file's mtime
+        is checked at most every ``reload_interval`` seconds and the
+        configuration reloaded when it changes.
+        """
         self.config_path = config_path or Path.home() / ".ai_metrics" / "config.json"
-        self.config = self._load_config()
+        self.reload_interval = reload_interval
+        self._config: dict[str, Any] | None = None
+        # Every key and dotted key prefix, e.g. "prometheus" and "prometheus.port"
+        self._flat: dict[str, Any] = {}
+        self._stamp: tuple[int, int] | None = None
+        self._next_check = 0.0
+        self._subscribers: list[Callable[[Config], None]] = []
+        self._lock = threading.RLock()
+    
+    @property
+    def config(self) -> dict[str, Any]:
+        """The merged configuration as a nested dict."""
+        self.refresh()
+        return self._config
+    
+    def refresh(self) -> bool:
+        """Load the configuration, or reload it if the file changed.
+
+        Returns whether it was reloaded; subscribers are notified of reloads
+        but not of the first load.
+        """
+        if self._config is not None and time.monotonic() < self._next_check:
+            return False
+        with self._lock:
+            if self._config is not None and time.monotonic() < self._next_check:
+                return False
+            self._next_check = time.monotonic() + self.reload_interval
+            stamp = self._file_stamp()
+            if self._config is not None and stamp == self._stamp:
+                return False
+            first = self._config is None
+            self._stamp = stamp
+            self._use(self._load_config())
+        if not first:
+            self._notify()
+        return not first
+    
+    def subscribe(self, callback: Callable[["Config"], None]) -> Callable[["Config"], None]:
+        """Call ``callback(config)`` whenever the configuration changes."""
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+    
+    def unsubscribe(self, callback: Callable[["Config"], None]) -> None:
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def _notify(self) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"Config subscriber error: {e}")
+    
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = self.config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _use(self, config: dict[str, Any]) -> None:
+        """Make ``config`` current and compile its dotted-key lookup table."""
+        flat: dict[str, Any] = {}
+        
+        def flatten(section: dict[str, Any], prefix: str) -> None:
+            for key, value in section.items():
+                flat[prefix + key] = value
+                if isinstance(value, dict):
+                    flatten(value, f"{prefix}{key}.")
+        
+        flatten(config, "")
+        self._config, self._flat = config, flat
     
     def _load_config(self) -> dict[str, Any]:
-        """Load configuration from file or use defaults."""
+        """Load configuration from file, or use defaults if there is none."""
         if self.config_path.exists():
             try:
                 with open(self.config_path) as f:
@@ -48,15 +188,11 @@ class Config:
                     return self._merge_configs(self.DEFAULT_CONFIG, user_config)
             except Exception as e:
                 print(f"Error loading config: {e}")
-                return self.DEFAULT_CONFIG.copy()
-        else:
-            # Create default config
-            self.save_config(self.DEFAULT_CONFIG)
-            return self.DEFAULT_CONFIG.copy()
+        return copy.deepcopy(self.DEFAULT_CONFIG)
     
     def _merge_configs(self, default: dict[str, Any], user: dict[str, Any]) -> dict[str, Any]:
         """Recursively merge user config with default config."""
-        result = default.copy()
+        result = copy.deepcopy(default)
         
         for key, value in user.items():
             if key in result and isinstance(result[key], dict) and isinstance(value, dict):
@@ -73,35 +209,31 @@ class Config:
             json.dump(config, f, indent=2)
     
     def get(self, key: str, default: Any = None) -> Any:
-        """Get configuration value."""
-        # Support nested keys like "prometheus.port"
-        keys = key.split('.')
-        value = self.config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-                
-        return value
+        """Get configuration value by key or dotted path, like "prometheus.port"."""
+        self.refresh()
+        return self._flat.get(key, default)
     
     def set(self, key: str, value: Any) -> None:
         """Set configuration value and save."""
-        keys = key.split('.')
-        config = self.config
-        
-        # Navigate to the right nesting level
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        
-        # Set the value
-        config[keys[-1]] = value
-        
-        # Save the updated config
-        self.save_config(self.config)
+        with self._lock:
+            config = copy.deepcopy(self.config)
+            keys = key.split('.')
+            section = config
+            
+            # Navigate to the right nesting level
+            for k in keys[:-1]:
+                if not isinstance(section.get(k), dict):
+                    section[k] = {}
+                section = section[k]
+            
+            # Set the value
+            section[keys[-1]] = value
+            
+            # Save the updated config
+            self.save_config(config)
+            self._stamp = self._file_stamp()
+            self._use(config)
+        self._notify()
         
     def get_metrics_path(self) -> Path:
         """Get the metrics storage path."""
@@ -109,10 +241,10 @@ class Config:
     
     def update_model_pricing(self, model_data: dict[str, dict[str, float]]) -> None:
         """Update model pricing information."""
-        current_models = self.get("models", {})
+        current_models = dict(self.get("models", {}))
         current_models.update(model_data)
         self.set("models", current_models)
 
 
-# Global config instance
-config = Config()
\ No newline at end of file
+# Global config instance; the file is read on first lookup
+config = Config()
@@ -0,0 +1,203 @@
+"""Backfill historical metrics logs into Prometheus via OpenMetrics files.
+
+History is replayed in timestamp order through the same counters and
+histogram the exporter maintains, and the cumulative values are written as
+timestamped samples. Output is split into one file per block of
+``block_seconds`` so that each can be imported with
+``promtool tsdb create-blocks-from openmetrics``.
+"""
+
+import heapq
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from prometheus_client.utils import floatToGoString
+
+from ai_code_metrics.storage import API_USAGE, TIMING
+from ai_code_metrics.storage.jsonl import iter_sorted_records
+
+from .cardinality import DEFAULT_MAX_VALUES, LabelLimiter
+from .events import event_metrics
+
+# Unregistered copies of the exporter's event metrics, for their names, labels
+# and buckets; importing the exporter itself would load Flask
+ai_requests_total, ai_response_time, api_cost_total = event_metrics()
+
+DEFAULT_BLOCK_SECONDS = 2 * 3600
+DEFAULT_STEP_SECONDS = 60.0
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class OpenMetricsBackfill:
+    """Replay JSONL history into per-block OpenMetrics files.
+
+    Each series is sampled at most once per ``step_seconds`` of log time, when
+    it changed. Memory holds one value per series (label values are bounded
+    by a per-label limit, as in the exporter) plus the samples of the current
+    block, which OpenMetrics needs grouped by series; it does not grow with
+    the length of the history.
+    """
+
+    def __init__(self, output_dir: Path, block_seconds: float = DEFAULT_BLOCK_SECONDS,
+                 step_seconds: float = DEFAULT_STEP_SECONDS,
+                 extra_labels: dict[str, str] | None = None,
+                 max_label_values: int = DEFAULT_MAX_VALUES):
+        self.output_dir = Path(output_dir)
+        self.block_seconds = block_seconds
+        self.step_seconds = step_seconds
+        self.extra_labels = dict(extra_labels or {})
+        self.max_label_values = max_label_values
+
+        self.counters: dict[tuple[str, tuple], float] = {}
+        # labels -> [per-bucket counts, sum]
+        self.histograms: dict[tuple, list] = {}
+        self.bounds = list(ai_response_time._upper_bounds)
+        self._dirty: dict[tuple[str, tuple], float] = {}
+        self._limiters: dict[tuple[str, str], LabelLimiter] = {}
+
+        self._block_start: float | None = None
+        self._step_end: float | None = None
+        # Newest timestamp replayed so far; see run()
+        self._now = float('-inf')
+        # family -> series -> sample lines of the current block
+        self._block: dict[str, dict[str, list[str]]] = {}
+        self.files: list[Path] = []
+        self.samples = 0
+
+    def _label(self, metric, label: str, value) -> str:
+        key = (metric._name, label)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = LabelLimiter(self.max_label_values)
+        return limiter.value(str(value))
+
+    def run(self, timing_files: Iterable[Path], api_usage_files: Iterable[Path],
+            start: float | None = None, end: float | None = None) -> list[Path]:
+        """Write blocks for all records in ``[start, end)``; returns the files written."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        for kind, record in self._merged(timing_files, api_usage_files, start, end):
+            # Records written further out of order than the merge tolerates are
+            # counted at the newest time seen, so no series goes back in time
+            self._now = timestamp = max(record['timestamp'], self._now)
+            if self._step_end is not None and timestamp >= self._step_end:
+                self._flush()
+            if self._block_start is not None and timestamp >= self._block_start + self.block_seconds:
+                self._flush()
+                self._close_block()
+            if self._block_start is None:
+                self._block_start = timestamp - timestamp % self.block_seconds
+            if self._step_end is None:
+                self._step_end = timestamp - timestamp % self.step_seconds + self.step_seconds
+
+            if kind == TIMING:
+                self._add_timing(record)
+            else:
+                self._add_api_usage(record)
+
+        self._flush()
+        self._close_block()
+        return self.files
+
+    def _merged(self, timing_files, api_usage_files, start, end) -> Iterator[tuple[str, dict]]:
+        def tagged(kind, files):
+            for record in iter_sorted_records(files, start=start, end=end):
+                yield record['timestamp'], kind, record
+
+        streams = [tagged(TIMING, timing_files), tagged(API_USAGE, api_usage_files)]
+        for _, kind, record in heapq.merge(*streams, key=lambda item: (item[0], item[1])):
+            yield kind, record
+
+    def _add_timing(self, metric: dict[str, Any]) -> None:
+        if 'function_name' not in metric:
+            return
+        model = metric.get('model', 'unknown')
+        labels = (self._label(ai_requests_total, 'model', model),
+                  metric.get('language', 'unknown'),
+                  self._label(ai_requests_total, 'operation', metric['function_name']))
+        self._inc(ai_requests_total, labels, 1.0)
+        self._observe(model, metric['function_name'], metric)
+
+    def _add_api_usage(self, usage: dict[str, Any]) -> None:
+        if 'model' not in usage:
+            return
+        labels = (self._label(api_cost_total, 'model', usage['model']),
+                  self._label(api_cost_total, 'provider', usage.get('provider', 'unknown')))
+        self._inc(api_cost_total, labels, max(usage.get('total_cost', 0.0), 0.0))
+        self._observe(usage['model'], usage.get('function', 'api_call'), usage)
+
+    def _inc(self, metric, labels: tuple, amount: float) -> None:
+        key = (metric._name, labels)
+        self.counters[key] = self.counters.get(key, 0.0) + amount
+        self._dirty[key] = self._now
+
+    def _observe(self, model: str, operation: str, record: dict[str, Any]) -> None:
+        labels = (self._label(ai_response_time, 'model', model),
+                  self._label(ai_response_time, 'operation', operation))
+        duration = max(record.get('duration', 0.0), 0.0)
+        state = self.histograms.get(labels)
+        if state is None:
+            state = self.histograms[labels] = [[0] * len(self.bounds), 0.0]
+        for i, bound in enumerate(self.bounds):
+            if duration <= bound:
+                state[0][i] += 1
+                break
+        state[1] += duration
+        self._dirty[(ai_response_time._name, labels)] = self._now
+
+    def _flush(self) -> None:
+        """Write a sample for every series changed in the current step."""
+        for (name, labels), timestamp in self._dirty.items():
+            lines = self._block.setdefault(name, {}).setdefault(labels, [])
+            ts = f'{timestamp:.3f}'
+            if name == ai_response_time._name:
+                label_names = ai_response_time._labelnames + tuple(self.extra_labels)
+                values = labels + tuple(self.extra_labels.values())
+                counts, total = self.histograms[labels]
+                cumulative = 0
+                for bound, count in zip(self.bounds, counts, strict=True):
+                    cumulative += count
+                    bucket_labels = _labels(label_names + ('le',), values + (floatToGoString(bound),))
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative} {ts}\n')
+                series = _labels(label_names, values)
+                lines.append(f'{name}_count{series} {cumulative} {ts}\n')
+                lines.append(f'{name}_sum{series} {floatToGoString(total)} {ts}\n')
+                self.samples += len(self.bounds) + 2
+            else:
+                metric = ai_requests_total if name == ai_requests_total._name else api_cost_total
+                series = _labels(metric._labelnames + tuple(self.extra_labels),
+                                 labels + tuple(self.extra_labels.values()))
+                lines.append(f'{name}_total{series} {floatToGoString(self.counters[(name, labels)])} {ts}\n')
+                self.samples += 1
+        self._dirty.clear()
+        self._step_end = None
+
+    def _close_block(self) -> None:
+        """Write the current block as one OpenMetrics file, series by series."""
+        if self._block_start is None:
+            return
+        path = self.output_dir / f'block_{int(self._block_start)}.om'
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w') as out:
+            for metric, kind in ((ai_requests_total, 'counter'), (api_cost_total, 'counter'),
+                                 (ai_response_time, 'histogram')):
+                family = self._block.pop(metric._name, None)
+                if not family:
+                    continue
+                out.write(f'# HELP {metric._name} {metric._documentation}\n')
+                out.write(f'# TYPE {metric._name} {kind}\n')
+                for lines in family.values():
+                    out.writelines(lines)
+            out.write('# EOF\n')
+        os.replace(tmp_path, path)
+        self.files.append(path)
+        self._block_start = None
@@ -0,0 +1,119 @@
+"""Bounding the number of label values a metric can create series for."""
+
+from collections.abc import Callable, Iterable
+
+OTHER = 'other'
+DEFAULT_MAX_VALUES = 100
+
+# Volume is tracked for this many times more values than can be admitted
+SKETCH_FACTOR = 4
+
+# A newcomer displaces the least-used admitted value once it has been seen
+# this many times more often, so near-ties do not churn series
+EVICTION_RATIO = 2.0
+
+
+class LabelLimiter:
+    """Admit at most ``max_values`` distinct values of one label.
+
+    Allowlisted values always pass. Other values are admitted until the limit
+    is reached; after that they are reported as ``other``, unless their volume
+    (estimated with a space-saving sketch) grows well past that of the least
+    used admitted value, which is then evicted in their favour and reported
+    to ``on_evict`` so its series can be dropped. With ``evict`` off, admitted
+    values are kept for good, for series that cannot be dropped.
+    """
+
+    def __init__(self, max_values: int = DEFAULT_MAX_VALUES, allowlist: Iterable[str] = (),
+                 on_evict: Callable[[str], None] | None = None, evict: bool = True):
+        self.max_values = max_values
+        self.allowlist = frozenset(allowlist)
+        self.on_evict = on_evict
+        self.evict = evict
+        self.admitted: dict[str, int] = {}
+        self.overflowed = 0
+        self.evicted = 0
+        self._sketch: dict[str, int] = {}
+        self._sketch_capacity = max(max_values * SKETCH_FACTOR, 1)
+        self._weakest: str | None = None
+
+    def value(self, label_value: str) -> str:
+        """The label value to record ``label_value`` under."""
+        if label_value in self.allowlist:
+            return label_value
+        if label_value in self.admitted:
+            self.admitted[label_value] += 1
+            if label_value == self._weakest:
+                self._weakest = None  # may no longer be the least used
+            return label_value
+        if len(self.admitted) < self.max_values:
+            self._admit(label_value, self._sketch.pop(label_value, 0) + 1)
+            return label_value
+        if not self.evict:
+            self.overflowed += 1
+            return OTHER
+
+        count = self._observe(label_value)
+        weakest = self._weakest_admitted()
+        if weakest is not None and count > EVICTION_RATIO * self.admitted[weakest]:
+            del self.admitted[weakest]
+            self._weakest = None
+            self.evicted += 1
+            self._sketch.pop(label_value, None)
+            self._admit(label_value, count)
+            if self.on_evict:
+                self.on_evict(weakest)
+            return label_value
+
+        self.overflowed += 1
+        return OTHER
+
+    def _admit(self, label_value: str, count: int) -> None:
+        self.admitted[label_value] = count
+        if self._weakest is not None and count < self.admitted[self._weakest]:
+            self._weakest = label_value
+
+    def _weakest_admitted(self) -> str | None:
+        if self._weakest not in self.admitted:
+            self._weakest = min(self.admitted, key=self.admitted.get, default=None)
+        return self._weakest
+
+    def _observe(self, label_value: str) -> int:
+        """Count a value that is not admitted; returns its estimated volume."""
+        count = self._sketch.get(label_value)
+        if count is None:
+            if len(self._sketch) >= self._sketch_capacity:
+                # Space-saving: the newcomer inherits the smallest count
+                smallest = min(self._sketch, key=self._sketch.get)
+                count = self._sketch.pop(smallest)
+            else:
+                count = 0
+        count += 1
+        self._sketch[label_value] = count
+        return count
+
+    def state(self) -> dict[str, int]:
+        """Admitted values and their volumes, for checkpointing."""
+        return dict(self.admitted)
+
+    def restore(self, admitted: dict[str, int]) -> None:
+        """Re-admit values saved with ``state()``."""
+        for label_value, count in admitted.items():
+            if len(self.admitted) >= self.max_values:
+                break
+            self.admitted[label_value] = count
+        self._weakest = None
+
+
+def label_limits(settings: dict, metric_name: str, label: str) -> tuple[int, list[str]]:
+    """``max_values`` and ``allowlist`` for one metric label.
+
+    ``settings`` is the ``prometheus.cardinality`` config section, whose
+    ``limits`` map a metric name (with or without ``_total``) to per-label
+    settings overriding the global ``max_values``.
+    """
+    limits = settings.get('limits', {})
+    metric_limits = limits.get(metric_name) or limits.get(f'{metric_name}_total') or {}
+    label_settings = metric_limits.get(label, {})
+    return (label_settings.get('max_values', settings.get('max_values', DEFAULT_MAX_VALUES)),
+            label_settings.get('allowlist', []))
@@ -0,0 +1,103 @@
+"""Persistent exporter state: log offsets and metric values.
+
+The exporter periodically writes a checkpoint holding, for every log it has
+read, how far it got and which file that was (inode and size), together with a
+snapshot of its metrics taken at the same moment. On restart the snapshot is
+loaded back into the registry and reading resumes at the saved offsets, so
+counters continue where they stopped instead of being rebuilt from the logs.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+
+CHECKPOINT_VERSION = 1
+CHECKPOINT_FILE = '.exporter_checkpoint.json'
+
+
+def file_identity(path: Path) -> dict[str, int]:
+    """Inode and size of a file, used to tell whether it was replaced."""
+    stat = path.stat()
+    return {'inode': stat.st_ino, 'size': stat.st_size}
+
+
+def snapshot_metrics(metrics) -> dict[str, list[dict[str, Any]]]:
+    """Current values of counters, gauges and histograms, by metric name."""
+    snapshot = {}
+    for metric in metrics:
+        name = metric._name
+        children = []
+        if isinstance(metric, Histogram):
+            series: dict[tuple, dict[str, Any]] = {}
+            for family in metric.collect():
+                for sample in family.samples:
+                    labels = {k: v for k, v in sample.labels.items() if k != 'le'}
+                    child = series.setdefault(tuple(sorted(labels.items())),
+                                              {'labels': labels, 'buckets': [], 'sum': 0.0})
+                    if sample.name.endswith('_bucket'):
+                        child['buckets'].append(sample.value)
+                    elif sample.name.endswith('_sum'):
+                        child['sum'] = sample.value
+            for child in series.values():
+                # Store per-bucket counts rather than cumulative ones
+                cumulative = child['buckets']
+                child['buckets'] = [c - p for c, p in zip(cumulative, [0.0] + cumulative[:-1], strict=True)]
+                children.append(child)
+        else:
+            suffix = '_total' if isinstance(metric, Counter) else ''
+            for family in metric.collect():
+                for sample in family.samples:
+                    if sample.name == name + suffix:
+                        children.append({'labels': sample.labels, 'value': sample.value})
+        snapshot[name] = children
+    return snapshot
+
+
+def restore_metrics(metrics, snapshot: dict[str, list[dict[str, Any]]]) -> None:
+    """Add snapshotted values to metrics, which should not have been updated yet."""
+    for metric in metrics:
+        for child_state in snapshot.get(metric._name, []):
+            labels = child_state['labels']
+            child = metric.labels(**labels) if labels else metric
+            if isinstance(metric, Histogram):
+                buckets = child_state['buckets']
+                if len(buckets) != len(child._buckets):
+                    continue  # bucket layout changed since the snapshot
+                for bucket, count in zip(child._buckets, buckets, strict=True):
+                    bucket.inc(count)
+                child._sum.inc(child_state['sum'])
+            elif isinstance(metric, Gauge):
+                child.set(child_state['value'])
+            else:
+                child.inc(child_state['value'])
+
+
+class Checkpoint:
+    """Atomically written JSON checkpoint file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> dict[str, Any] | None:
+        """Read the checkpoint, or None if it is missing or unreadable."""
+        try:
+            with open(self.path) as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION:
+            return None
+        return state
+
+    def save(self, state: dict[str, Any]) -> None:
+        """Write the checkpoint so readers see either the old or the new state."""
+        state = {'version': CHECKPOINT_VERSION, **state}
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,37 @@
+"""Metrics updated once per collected event.
+
+Defined in one place so the exporter, which counts events read from the
+logs, and ``PrometheusSink``, which counts them in the collecting process,
+expose identical series.
+"""
+
+from prometheus_client import Counter, Histogram
+
+from ai_code_metrics.config import config
+
+# Tracked functions take microseconds while model calls take minutes
+DEFAULT_RESPONSE_TIME_BUCKETS = [0.001, 0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0]
+
+
+def event_metrics(registry=None) -> tuple[Counter, Histogram, Counter]:
+    """Create the request counter, response time histogram and cost counter."""
+    requests_total = Counter(
+        'ai_coding_requests_total',
+        'Total AI assistant requests',
+        ['model', 'language', 'operation'],
+        registry=registry
+    )
+    response_time = Histogram(
+        'ai_coding_response_time_seconds',
+        'AI request response time',
+        ['model', 'operation'],
+        buckets=config.get('prometheus.response_time_buckets') or DEFAULT_RESPONSE_TIME_BUCKETS,
+        registry=registry
+    )
+    cost_total = Counter(
+        'ai_coding_api_cost_dollars',
+        'Total API costs in dollars',
+        ['model', 'provider'],
+        registry=registry
+    )
+    return requests_total, response_time, cost_total
@@ -0,0 +1,113 @@
+"""Incremental ingestion of git history for the Prometheus exporter."""
+
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from pathlib import PurePosixPath
+from typing import Any
+
+import git
+
+from ai_code_metrics.analyzers import CommitPatternMatcher, GitMetricsAnalyzer
+
+DEFAULT_GIT_BACKFILL_DAYS = 30
+
+# File extensions and the language label their lines are counted under
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.jsx': 'javascript',
+    '.ts': 'typescript',
+    '.tsx': 'typescript',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.java': 'java',
+    '.kt': 'kotlin',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.c': 'c',
+    '.h': 'c',
+    '.cc': 'cpp',
+    '.cpp': 'cpp',
+    '.hpp': 'cpp',
+    '.cs': 'csharp',
+    '.swift': 'swift',
+    '.scala': 'scala',
+    '.sh': 'shell',
+    '.sql': 'sql',
+    '.md': 'markdown',
+    '.yml': 'yaml',
+    '.yaml': 'yaml',
+    '.json': 'json',
+    '.html': 'html',
+    '.css': 'css',
+}
+
+
+def file_language(path: str) -> str:
+    """Language label for a file path, from its extension."""
+    return EXTENSION_LANGUAGES.get(PurePosixPath(path).suffix.lower(), 'other')
+
+
+class GitIngester:
+    """Walk a repository's history since the last commit seen.
+
+    The first walk covers the last ``backfill_days`` days; later walks only
+    visit commits reachable from HEAD but not from the previous HEAD. When
+    the previous HEAD is gone because history was rewritten, the date window
+    is walked again, skipping commits authored before the last one ingested.
+    """
+
+    def __init__(self, repo_path: str, backfill_days: float = DEFAULT_GIT_BACKFILL_DAYS):
+        self.repo_path = str(repo_path)
+        self.backfill_days = backfill_days
+        self.analyzer = GitMetricsAnalyzer(self.repo_path)
+
+    def head(self) -> str | None:
+        """SHA of the current HEAD, or None for an empty repository."""
+        try:
+            return self.analyzer.repo.head.commit.hexsha
+        except ValueError:
+            return None
+
+    def new_commits(self, last_sha: str | None,
+                    last_authored: float | None = None) -> Iterator[dict[str, Any]]:
+        """Per-language line counts of commits after ``last_sha``, oldest first.
+
+        ``last_authored`` is the newest author time already ingested; it only
+        filters the date-window fallback, since rebased commits keep their
+        author time but not their SHA.
+        """
+        repo = self.analyzer.repo
+        head = self.head()
+        if head is None or head == last_sha:
+            return
+
+        commits = None
+        if last_sha:
+            try:
+                commits = list(repo.iter_commits(f'{last_sha}..{head}'))
+            except (git.GitCommandError, git.BadName, ValueError):
+                commits = None  # history was rewritten; fall back to a date window
+        if commits is None:
+            since = datetime.now() - timedelta(days=self.backfill_days)
+            commits = [
+                commit for commit in repo.iter_commits(head, since=since)
+                if last_authored is None or commit.authored_date > last_authored
+            ]
+
+        for commit in reversed(commits):
+            yield self._commit_lines(commit)
+
+    def _commit_lines(self, commit) -> dict[str, Any]:
+        """Lines added per language and the message quality of one commit."""
+        lines: dict[str, int] = {}
+        for path, stats in commit.stats.files.items():
+            language = file_language(str(path))
+            lines[language] = lines.get(language, 0) + stats.get('insertions', 0)
+        return {
+            'commit_hash': commit.hexsha,
+            'authored_at': commit.authored_date,
+            'ai_assisted': CommitPatternMatcher.identify_ai_assistant(commit.message) is not None,
+            'lines_by_language': lines,
+            'commit_message_quality': self.analyzer._score_commit_message(commit.message),
+        }
@@ -0,0 +1,100 @@
+"""Decoding and deduplication of record batches posted to the exporter.
+
+A batch is NDJSON, optionally gzipped, with one ``{"kind": ..., "record":
+{...}}`` object per line, as sent by ``RemoteStore``. Each batch carries an
+``Idempotency-Key`` header that stays the same across retries, so a batch
+whose response was lost is only stored once.
+"""
+
+import json
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+from ai_code_metrics.storage import KINDS
+
+DEFAULT_MAX_BATCH_BYTES = 10 * 1024 * 1024
+DEFAULT_IDEMPOTENCY_KEYS = 10_000
+MAX_KEY_LENGTH = 128
+
+
+class IngestError(ValueError):
+    """A batch that cannot be accepted; ``status`` is the HTTP status to send."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def decode_batch(body: bytes, content_encoding: str = '',
+                 max_bytes: int = DEFAULT_MAX_BATCH_BYTES) -> list[tuple[str, dict[str, Any]]]:
+    """Parse a posted batch into ``(kind, record)`` pairs.
+
+    The whole batch is rejected if any line is invalid, so a client never has
+    to work out which part of a batch was stored.
+    """
+    if len(body) > max_bytes:
+        raise IngestError('Batch too large', status=413)
+    if content_encoding == 'gzip':
+        try:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            data = decompressor.decompress(body, max_bytes + 1)
+        except zlib.error as e:
+            raise IngestError(f'Invalid gzip body: {e}') from e
+        if len(data) > max_bytes or decompressor.unconsumed_tail:
+            raise IngestError('Batch too large', status=413)
+    elif content_encoding in ('', 'identity'):
+        data = body
+    else:
+        raise IngestError(f'Unsupported Content-Encoding: {content_encoding}', status=415)
+
+    records = []
+    for number, line in enumerate(data.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise IngestError(f'Line {number}: {e}') from e
+        kind = item.get('kind') if isinstance(item, dict) else None
+        record = item.get('record') if isinstance(item, dict) else None
+        if kind not in KINDS:
+            raise IngestError(f'Line {number}: unknown record kind {kind!r}')
+        if (not isinstance(record, dict) or isinstance(record.get('timestamp'), bool)
+                or not isinstance(record.get('timestamp'), int | float)):
+            raise IngestError(f'Line {number}: record without a numeric timestamp')
+        records.append((kind, record))
+    return records
+
+
+class IdempotencyKeys:
+    """Responses to the most recently accepted batches, by idempotency key.
+
+    Bounded to ``max_keys`` entries, least recently used first out; a client
+    retrying for longer than it takes that many other batches to arrive
+    can be stored twice.
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_IDEMPOTENCY_KEYS):
+        self.max_keys = max_keys
+        self._results: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+        return result
+
+    def add(self, key: str, result: dict[str, Any]) -> None:
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_keys:
+            self._results.popitem(last=False)
+
+    def state(self) -> dict[str, dict[str, Any]]:
+        """Keys and responses, oldest first, for checkpointing."""
+        return dict(self._results)
+
+    def restore(self, state: dict[str, dict[str, Any]]) -> None:
+        for key, result in state.items():
+            self.add(key, result)
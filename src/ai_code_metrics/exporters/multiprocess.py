@@ -0,0 +1,257 @@
+"""Updating the exporter's metrics directly from collecting processes.
+
+Collectors normally log events that the exporter later reads back and
+counts. With ``prometheus.multiprocess_dir`` (or ``PROMETHEUS_MULTIPROC_DIR``)
+set, each collecting process instead counts its events itself in
+prometheus_client's memory-mapped per-process files, which the exporter sums
+at scrape time. Logged records are then only an audit trail; they carry
+``EMITTED_FIELD`` so the exporter does not count them a second time.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ai_code_metrics.config import config
+
+from .cardinality import LabelLimiter, label_limits
+
+if TYPE_CHECKING:
+    from prometheus_client.metrics_core import Metric
+
+MULTIPROC_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+# Set on records whose metrics were already updated in the collecting process
+EMITTED_FIELD = 'emitted'
+
+
+def multiprocess_dir() -> Path | None:
+    """Directory shared by collectors and the exporter, if direct emission is on."""
+    configured = os.environ.get(MULTIPROC_ENV) or config.get('prometheus.multiprocess_dir')
+    return Path(configured).expanduser() if configured else None
+
+
+_local = threading.local()
+
+
+def file_value_class(path: Path, process_identifier=os.getpid):
+    """A prometheus_client value class keeping values in per-process files in ``path``.
+
+    The same as ``prometheus_client.values.MultiProcessValue``, which writes
+    the same files, except that the directory is given here instead of being
+    read from ``PROMETHEUS_MULTIPROC_DIR`` whenever a file is opened.
+    """
+    from prometheus_client.mmap_dict import MmapedDict, mmap_key
+
+    files = {}
+    values = []
+    pid = {'value': process_identifier()}
+    lock = threading.Lock()
+
+    class FileValue:
+        """A float backed by this process's file for its metric type."""
+
+        _multiprocess = True
+
+        def __init__(self, typ, metric_name, name, labelnames, labelvalues, help_text,
+                     multiprocess_mode='', **kwargs):
+            self._params = typ, metric_name, name, labelnames, labelvalues, help_text, multiprocess_mode
+            with lock:
+                self._check_for_pid_change()
+                self._reset()
+                values.append(self)
+
+        def _reset(self):
+            typ, metric_name, name, labelnames, labelvalues, help_text, multiprocess_mode = self._params
+            file_prefix = f'{typ}_{multiprocess_mode}' if typ == 'gauge' else typ
+            if file_prefix not in files:
+                files[file_prefix] = MmapedDict(os.path.join(path, f"{file_prefix}_{pid['value']}.db"))
+            self._file = files[file_prefix]
+            self._key = mmap_key(metric_name, name, labelnames, labelvalues, help_text)
+            self._value, self._timestamp = self._file.read_value(self._key)
+
+        def _check_for_pid_change(self):
+            # After a fork the child writes its own files
+            actual_pid = process_identifier()
+            if pid['value'] != actual_pid:
+                pid['value'] = actual_pid
+                for f in files.values():
+                    f.close()
+                files.clear()
+                for value in values:
+                    value._reset()
+
+        def inc(self, amount):
+            with lock:
+                self._check_for_pid_change()
+                self._value += amount
+                self._timestamp = 0.0
+                self._file.write_value(self._key, self._value, self._timestamp)
+
+        def set(self, value, timestamp=None):
+            with lock:
+                self._check_for_pid_change()
+                self._value = value
+                self._timestamp = timestamp or 0.0
+                self._file.write_value(self._key, self._value, self._timestamp)
+
+        def set_exemplar(self, exemplar):
+            return
+
+        def get(self):
+            with lock:
+                self._check_for_pid_change()
+                return self._value
+
+        def get_exemplar(self):
+            return None
+
+    return FileValue
+
+
+class _ValueClassSelector:
+    """Stand-in for prometheus_client's value class.
+
+    prometheus_client picks one value class for the whole process when it is
+    first imported. This lets a sink back just the values it creates with
+    files, while every other metric in the process keeps the class it had.
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __call__(self, *args, **kwargs):
+        value_class = getattr(_local, 'value_class', None) or self.default
+        return value_class(*args, **kwargs)
+
+
+class PrometheusSink:
+    """Count collected events in this process's multiprocess metric files.
+
+    Use ``default_sink()``: values are keyed by metric and labels within a
+    process, so two sinks in one process would overwrite each other's counts.
+    Label values are bounded per process as the exporter bounds them, except
+    that admitted values are never evicted, since their series cannot be
+    removed from the files.
+    """
+
+    def __init__(self, path: Path):
+        # Collectors import this module; prometheus_client is only loaded
+        # once direct emission is actually configured
+        from prometheus_client import values
+
+        from .events import event_metrics
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        current = values.ValueClass
+        if isinstance(current, _ValueClassSelector):
+            current = current.default
+        else:
+            values.ValueClass = _ValueClassSelector(current)
+        # Already file-backed if the variable was set before prometheus_client
+        # was imported; its files must then be shared, not opened twice
+        self._value_class = current if getattr(current, '_multiprocess', False) else file_value_class(self.path)
+
+        self.requests_total, self.response_time, self.cost_total = event_metrics()
+        self._limiters: dict[tuple[str, str], LabelLimiter] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _file_backed(self):
+        """Create label children inside this block with file-backed values."""
+        with self._lock:
+            _local.value_class = self._value_class
+            try:
+                yield
+            finally:
+                _local.value_class = None
+
+    def _label(self, metric, label: str, value) -> str:
+        key = (metric._name, label)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            max_values, allowlist = label_limits(config.get('prometheus.cardinality', {}), metric._name, label)
+            limiter = self._limiters[key] = LabelLimiter(max_values, allowlist, evict=False)
+        return limiter.value(str(value))
+
+    def record_timing(self, metric: dict[str, Any]) -> None:
+        """Count a timing record the way the exporter counts logged ones."""
+        model = metric.get('model', 'unknown')
+        operation = metric['function_name']
+        with self._file_backed():
+            self.requests_total.labels(
+                model=self._label(self.requests_total, 'model', model),
+                language=metric.get('language', 'unknown'),
+                operation=self._label(self.requests_total, 'operation', operation)
+            ).inc()
+            self._observe(model, operation, metric)
+        metric[EMITTED_FIELD] = True
+
+    def record_api_usage(self, usage: dict[str, Any]) -> None:
+        """Count an API usage record the way the exporter counts logged ones."""
+        with self._file_backed():
+            self.cost_total.labels(
+                model=self._label(self.cost_total, 'model', usage['model']),
+                provider=self._label(self.cost_total, 'provider', usage.get('provider', 'unknown'))
+            ).inc(max(usage.get('total_cost', 0.0), 0.0))
+            self._observe(usage['model'], usage.get('function', 'api_call'), usage)
+        usage[EMITTED_FIELD] = True
+
+    def _observe(self, model: str, operation: str, record: dict[str, Any]) -> None:
+        self.response_time.labels(
+            model=self._label(self.response_time, 'model', model),
+            operation=self._label(self.response_time, 'operation', operation)
+        ).observe(max(record.get('duration', 0.0), 0.0))
+
+
+class MergedCollector:
+    """The families of several collectors, with samples of one series summed.
+
+    Used at scrape time to add the values collecting processes wrote to the
+    exporter's own, which come from records logged by other means.
+    """
+
+    def __init__(self, *collectors):
+        self.collectors = collectors
+
+    def collect(self) -> list['Metric']:
+        from prometheus_client.metrics_core import Metric
+
+        families: dict[str, tuple[Metric, dict[tuple, Any]]] = {}
+        for collector in self.collectors:
+            for family in collector.collect():
+                merged = families.get(family.name)
+                if merged is None:
+                    merged = families[family.name] = (
+                        Metric(family.name, family.documentation, family.type, family.unit), {}
+                    )
+                samples = merged[1]
+                for sample in family.samples:
+                    key = (sample.name, tuple(sorted(sample.labels.items())))
+                    previous = samples.get(key)
+                    samples[key] = sample if previous is None else previous._replace(
+                        value=previous.value + sample.value
+                    )
+        for family, samples in families.values():
+            family.samples = list(samples.values())
+        return [family for family, _ in families.values()]
+
+
+_sink: PrometheusSink | None = None
+_sink_lock = threading.Lock()
+
+
+def default_sink() -> PrometheusSink | None:
+    """This process's sink, or None if direct emission is not configured."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            path = multiprocess_dir()
+            if path is None:
+                return None
+            _sink = PrometheusSink(path)
+        return _sink
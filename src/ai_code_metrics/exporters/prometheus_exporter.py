@@ -1,114 +1,1194 @@
 """Prometheus metrics exporter for AI coding metrics."""
 
-import json
+import atexit
+import gzip
+import hmac
+import sys
+import threading
+import time
+import warnings
+from collections import deque
+from datetime import date
 from pathlib import Path
 
-from flask import Flask, Response
-from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from flask import Flask, Response, jsonify, request
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    ProcessCollector,
+    generate_latest,
+    values,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from ai_code_metrics.config import config
+from ai_code_metrics.profiling import stage
+from ai_code_metrics.storage import API_USAGE, TIMING, JsonlStore, RetentionPolicy, RetentionWorker
+from ai_code_metrics.storage.index import TimeIndex
+from ai_code_metrics.storage.jsonl import (
+    COMPRESSED_SUFFIXES,
+    is_compressed,
+    iter_jsonl_offsets,
+    log_file_date,
+    log_files,
+    logical_path,
+)
+
+from .cardinality import OTHER, LabelLimiter, label_limits
+from .checkpoint import (
+    CHECKPOINT_FILE,
+    Checkpoint,
+    file_identity,
+    restore_metrics,
+    snapshot_metrics,
+)
+from .events import event_metrics
+from .git_ingest import DEFAULT_GIT_BACKFILL_DAYS, GitIngester
+from .ingest import (
+    DEFAULT_IDEMPOTENCY_KEYS,
+    DEFAULT_MAX_BATCH_BYTES,
+    MAX_KEY_LENGTH,
+    IdempotencyKeys,
+    IngestError,
+    decode_batch,
+)
+from .multiprocess import EMITTED_FIELD, MergedCollector, multiprocess_dir
+from .server import serve
+from .sketch import (
+    DEFAULT_MAX_BINS,
+    DEFAULT_RELATIVE_ACCURACY,
+    DDSketch,
+    WindowedSketch,
+    suggest_buckets,
+)
+from .tailer import LogTailer
+from .tenants import TenantCollector, merge_expositions
 
 app = Flask(__name__)
 registry = CollectorRegistry()
 
-# Define metrics
-ai_requests_total = Counter(
-    'ai_coding_requests_total',
-    'Total AI assistant requests',
-    ['model', 'language', 'operation'],
-    registry=registry
-)
+# With PROMETHEUS_MULTIPROC_DIR set when prometheus_client was imported, every
+# value is backed by a file there; the exporter sums those files at scrape
+# time, so its own values must stay in memory
+if getattr(values.ValueClass, '_multiprocess', False):
+    values.ValueClass = values.MutexValue
 
-ai_response_time = Histogram(
-    'ai_coding_response_time_seconds',
-    'AI request response time',
-    ['model', 'operation'],
-    buckets=[0.1, 0.5, 1.0, 2.5, 5.0, 10.0],
-    registry=registry
-)
+DEFAULT_QUANTILES = [0.5, 0.9, 0.99]
+DEFAULT_QUANTILE_WINDOWS = [300, 3600]
 
-code_quality_score = Gauge(
-    'ai_coding_quality_score',
-    'Code quality score (0-100)',
-    ['language', 'metric_type'],
-    registry=registry
-)
+# Labels whose values a series budget never folds into ``other``
+BUDGET_EXEMPT_LABELS = frozenset({'ai_assisted', 'metric_type'})
 
-api_cost_total = Counter(
-    'ai_coding_api_cost_dollars',
-    'Total API costs in dollars',
-    ['model', 'provider'],
-    registry=registry
-)
+class ExporterMetrics:
+    """The metrics one exporter maintains, in a registry of their own.
 
-lines_generated = Counter(
-    'ai_coding_lines_generated_total',
-    'Total lines of code generated',
-    ['language', 'ai_assisted'],
-    registry=registry
-)
+    Each tenant of a multi-tenant exporter gets its own, so tenants are
+    serialized, checkpointed and bounded independently of each other.
+    """
+    
+    def __init__(self, registry: CollectorRegistry):
+        self.registry = registry
+        self.ai_requests_total, self.ai_response_time, self.api_cost_total = event_metrics(registry)
+        
+        self.response_time_quantile = Gauge(
+            'ai_coding_response_time_quantile_seconds',
+            'AI request response time quantiles over a sliding window',
+            ['model', 'operation', 'window', 'quantile'],
+            registry=registry
+        )
+        
+        self.code_quality_score = Gauge(
+            'ai_coding_quality_score',
+            'Code quality score (0-100)',
+            ['language', 'metric_type'],
+            registry=registry
+        )
+        
+        self.lines_generated = Counter(
+            'ai_coding_lines_generated_total',
+            'Total lines of code generated',
+            ['language', 'ai_assisted'],
+            registry=registry
+        )
+        
+        # Exporter self-metrics
+        self.exporter_bytes_read_total = Counter(
+            'ai_coding_exporter_bytes_read_total',
+            'Bytes of metrics logs read by the exporter',
+            ['kind'],
+            registry=registry
+        )
+        
+        self.exporter_lines_read_total = Counter(
+            'ai_coding_exporter_lines_read_total',
+            'Records parsed from metrics logs',
+            ['kind'],
+            registry=registry
+        )
+        
+        self.exporter_parse_errors_total = Counter(
+            'ai_coding_exporter_parse_errors_total',
+            'Lines in metrics logs that could not be parsed',
+            ['kind'],
+            registry=registry
+        )
+        
+        self.exporter_update_duration = Histogram(
+            'ai_coding_exporter_update_duration_seconds',
+            'Time spent ingesting new log lines and git commits per poll',
+            buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0],
+            registry=registry
+        )
+        
+        self.exporter_serialization_duration = Histogram(
+            'ai_coding_exporter_serialization_duration_seconds',
+            'Time spent serializing the registry for scrapes',
+            buckets=[0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0],
+            registry=registry
+        )
+        
+        self.exporter_ingest_lag = Gauge(
+            'ai_coding_exporter_ingest_lag_seconds',
+            'Wall-clock time since the newest record ingested from each log',
+            ['kind', 'file'],
+            registry=registry
+        )
+        
+        self.exporter_backlog_bytes = Gauge(
+            'ai_coding_exporter_backlog_bytes',
+            'Bytes written to each log that have not been ingested yet',
+            ['kind', 'file'],
+            registry=registry
+        )
+        
+        self.exporter_registry_series = Gauge(
+            'ai_coding_exporter_registry_series',
+            'Number of samples in the last exposition',
+            registry=registry
+        )
+        
+        self.exporter_series = Gauge(
+            'ai_coding_exporter_series',
+            'Number of series exported per metric',
+            ['metric'],
+            registry=registry
+        )
+        
+        self.label_overflow_total = Counter(
+            'ai_coding_exporter_label_overflow_total',
+            'Label values folded into the "other" bucket by the cardinality limit',
+            ['metric', 'label'],
+            registry=registry
+        )
+        
+        self.label_evictions_total = Counter(
+            'ai_coding_exporter_label_evictions_total',
+            'Admitted label values evicted in favour of busier ones',
+            ['metric', 'label'],
+            registry=registry
+        )
+        
+        self.series_budget_overflow_total = Counter(
+            'ai_coding_exporter_series_budget_overflow_total',
+            'Records folded into "other" series because the series budget was spent',
+            ['metric'],
+            registry=registry
+        )
+        
+        # Metrics whose values are saved in and restored from the checkpoint
+        self.checkpointed = (self.ai_requests_total, self.ai_response_time, self.code_quality_score,
+                             self.api_cost_total, self.lines_generated, self.label_overflow_total,
+                             self.label_evictions_total, self.exporter_bytes_read_total,
+                             self.exporter_lines_read_total, self.exporter_parse_errors_total,
+                             self.series_budget_overflow_total)
+        
+        # Metrics whose series are counted in ai_coding_exporter_series and
+        # against the series budget
+        self.data = (self.ai_requests_total, self.ai_response_time, self.response_time_quantile,
+                     self.code_quality_score, self.api_cost_total, self.lines_generated)
+
+
+default_metrics = ExporterMetrics(registry)
+ProcessCollector(registry=registry)
+
+# Process metrics for a multi-tenant exporter, whose tenants' registries are
+# merged at scrape time and leave the default registry unused
+process_registry = CollectorRegistry()
+ProcessCollector(registry=process_registry)
+
+# The single-root exporter's metrics, under their module-level names
+ai_requests_total = default_metrics.ai_requests_total
+ai_response_time = default_metrics.ai_response_time
+api_cost_total = default_metrics.api_cost_total
+response_time_quantile = default_metrics.response_time_quantile
+code_quality_score = default_metrics.code_quality_score
+lines_generated = default_metrics.lines_generated
+exporter_bytes_read_total = default_metrics.exporter_bytes_read_total
+exporter_lines_read_total = default_metrics.exporter_lines_read_total
+exporter_parse_errors_total = default_metrics.exporter_parse_errors_total
+exporter_update_duration = default_metrics.exporter_update_duration
+exporter_serialization_duration = default_metrics.exporter_serialization_duration
+exporter_ingest_lag = default_metrics.exporter_ingest_lag
+exporter_backlog_bytes = default_metrics.exporter_backlog_bytes
+exporter_registry_series = default_metrics.exporter_registry_series
+exporter_series = default_metrics.exporter_series
+label_overflow_total = default_metrics.label_overflow_total
+label_evictions_total = default_metrics.label_evictions_total
+series_budget_overflow_total = default_metrics.series_budget_overflow_total
+CHECKPOINTED_METRICS = default_metrics.checkpointed
+DATA_METRICS = default_metrics.data
+
+
+def _before(record, cutoff: float) -> bool:
+    """Whether a record is timestamped before ``cutoff``."""
+    timestamp = record.get('timestamp')
+    return isinstance(timestamp, (int, float)) and timestamp < cutoff
 
 
 class MetricsExporter:
     """Exports AI coding metrics to Prometheus."""
     
-    def __init__(self, metrics_dir: Path = None):
+    def __init__(self, metrics_dir: Path = None, backfill_days: float | None = None,
+                 checkpoint_path: Path | None = None, tenant: str | None = None,
+                 settings: dict | None = None):
+        """Initialize the exporter.
+
+        With ``backfill_days`` set, files seen for the first time are only
+        ingested from that many days ago onwards, found via their time index,
+        instead of from the beginning of history.
+
+        Offsets and metric values are checkpointed to ``checkpoint_path``
+        (default: ``prometheus.checkpoint_path``, or a file in the metrics
+        directory) and restored before the first ingestion.
+
+        A ``tenant`` exporter keeps its metrics in a registry of its own,
+        exposed with a ``tenant`` label, and takes its settings from
+        ``settings`` (its entry in ``prometheus.tenants``) before
+        ``prometheus.*``.
+        """
+        self.tenant = tenant
+        self.settings = settings or {}
+        self.metrics = default_metrics if tenant is None else ExporterMetrics(CollectorRegistry())
         self.metrics_dir = metrics_dir or Path.home() / '.ai_metrics'
+        self._checkpoint_path = checkpoint_path or self.settings.get('checkpoint_path')
+        self.checkpoint_interval = self._setting('checkpoint_interval_seconds', 10.0)
+        self._restored = False
+        self._last_checkpoint = 0.0
         self.last_processed = {}
+        # Per kind, the newest day whose compressed log has been read to the end
+        self.compacted_through = {}
         
-    def update_metrics(self):
-        """Read metrics files and update Prometheus metrics."""
-        # Process timing metrics
-        self._process_timing_metrics()
+        # Git repositories are walked every git_interval seconds, from the last
+        # commit seen in each; message quality is averaged per language
+        self.git_repos = [str(repo) for repo in self._setting('git_repos', [], inherit=False)]
+        self.git_interval = self._setting('git_interval_seconds', 300.0)
+        self.git_backfill_days = self._setting('git_backfill_days', DEFAULT_GIT_BACKFILL_DAYS)
+        self.git_shas: dict[str, str] = {}
+        # Newest author time ingested per repository, to skip commits already
+        # counted when a rewritten history sends the walk back to the date window
+        self.git_authored: dict[str, float] = {}
+        self.git_quality: dict[str, list[float]] = {}
+        self._git_ingesters: dict[str, GitIngester] = {}
+        self._last_git_walk: float | None = None
+        # Walks run outside the ingestion lock, one at a time; the commits they
+        # find wait here until applied, and each repository's walk resumes
+        # after the last commit queued from it
+        self._git_walk_lock = threading.Lock()
+        self._git_pending: deque[tuple[str, dict]] = deque()
+        self._git_walked: dict[str, str] = {}
+        self._git_walked_authored: dict[str, float] = {}
         
-        # Process git metrics
-        self._process_git_metrics()
+        # Per (metric, label) bounds on label values taken from records
+        self.label_limiters: dict[tuple[str, str], LabelLimiter] = {}
+        self._limiter_state: dict[str, dict[str, int]] = {}
+        # Bound on the series of all data metrics together; records that would
+        # open a series beyond it are recorded under ``other`` label values
+        self.max_series = self._setting('max_series', None)
         
-        # Process API usage
-        self._process_api_metrics()
+        # Per (model, operation), one sketch of response times per window
+        quantile_settings = self._setting('quantiles', {})
+        self.quantiles = quantile_settings.get('quantiles', DEFAULT_QUANTILES)
+        self.quantile_windows = quantile_settings.get('windows', DEFAULT_QUANTILE_WINDOWS)
+        self.sketch_slots = quantile_settings.get('slots', 10)
+        self.sketch_accuracy = quantile_settings.get('relative_accuracy', DEFAULT_RELATIVE_ACCURACY)
+        self.sketch_max_bins = quantile_settings.get('max_bins', DEFAULT_MAX_BINS)
+        self.response_time_sketches: dict[tuple[str, str], list[WindowedSketch]] = {}
+        self._quantile_slot: int | None = None
         
-    def _process_timing_metrics(self):
-        """Process timing metrics from log files."""
-        for metrics_file in self.metrics_dir.glob('timing_*.jsonl'):
-            last_pos = self.last_processed.get(str(metrics_file), 0)
-            
-            with open(metrics_file) as f:
-                f.seek(last_pos)
-                for line in f:
-                    if line.strip():
-                        metric = json.loads(line)
-                        
-                        # Update Prometheus metrics
-                        ai_requests_total.labels(
-                            model='claude',
-                            language='python',
-                            operation=metric['function_name']
-                        ).inc()
-                        
-                        ai_response_time.labels(
-                            model='claude',
-                            operation=metric['function_name']
-                        ).observe(metric['duration'])
+        # Timestamp of the newest record ingested from each log, for lag
+        self.newest_ingested: dict[str, float] = {}
+        # ... and per kind across all logs, which is where the store's rows begin
+        self.newest_logged: dict[str, float] = {}
+        
+        # With collectors writing to SQLite (storage.backend), rows appended
+        # to the database are ingested too, tracked per kind by row id. Rows
+        # timestamped at or before ``floor`` are history imported from logs
+        # that were read already (ai-metrics migrate), so they are skipped.
+        self.store_path = self._store_path()
+        self.store_rows: dict[str, dict[str, float]] = {}
+        self._store = None
+        # Self-metrics change continuously, so the exposition is rebuilt at
+        # least this often even when nothing was ingested
+        self.exposition_max_age = self._setting('exposition_max_age_seconds', 5.0)
+        self._exposition_time = 0.0
+        self.backfill_since = time.time() - backfill_days * 86400 if backfill_days else None
+        
+        # Batches posted to /ingest are appended to the logs this exporter
+        # tails; responses are remembered by idempotency key for retries
+        self.ingest_keys = IdempotencyKeys(
+            config.get('prometheus.ingest.idempotency_keys', DEFAULT_IDEMPOTENCY_KEYS)
+        )
+        self._ingest_store: JsonlStore | None = None
+        
+        # Collecting processes may count their events themselves (see
+        # PrometheusSink); their files are added to the registry per scrape
+        self.multiprocess_dir = multiprocess_dir() if tenant is None else None
+        self._scrape_registry = None
+        if self.multiprocess_dir is not None:
+            self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+            # prometheus_client warns about removing series whenever the
+            # variable is set, though the exporter's own values are in memory
+            warnings.filterwarnings('ignore', r'(Clearing|Removal of) labels has not been implemented',
+                                    UserWarning, 'prometheus_client')
+            self._scrape_registry = MergedCollector(
+                self.metrics.registry, MultiProcessCollector(None, str(self.multiprocess_dir))
+            )
+        
+        # Only one thread ingests at a time; offsets are only touched under it
+        self._lock = threading.Lock()
+        # Bumped whenever ingestion changes the registry
+        self.generation = 0
+        # (generation, exposition, gzipped exposition or None)
+        self._exposition: tuple[int, bytes, bytes | None] | None = None
+        
+    def _setting(self, key: str, default=None, inherit: bool = True):
+        """A ``prometheus.*`` setting, overridden by this tenant's settings.
+
+        Sections (dicts) are merged key by key. Settings that name resources
+        of one metrics root, such as ``git_repos``, are not inherited.
+        """
+        value = config.get(f'prometheus.{key}', default) if inherit or self.tenant is None else default
+        if key in self.settings:
+            own = self.settings[key]
+            value = {**value, **own} if isinstance(value, dict) and isinstance(own, dict) else own
+        return value
+    
+    def reload_settings(self) -> None:
+        """Re-read the settings that can change without a restart.
+
+        Label limits, quantile windows and the checkpoint path keep the
+        values they were created with.
+        """
+        if self.tenant is not None:
+            self.settings = (config.get('prometheus.tenants') or {}).get(self.tenant, self.settings)
+        self.checkpoint_interval = self._setting('checkpoint_interval_seconds', 10.0)
+        self.git_repos = [str(repo) for repo in self._setting('git_repos', [], inherit=False)]
+        self.git_interval = self._setting('git_interval_seconds', 300.0)
+        self.exposition_max_age = self._setting('exposition_max_age_seconds', 5.0)
+        self.max_series = self._setting('max_series', None)
+    
+    def update_metrics(self) -> int:
+        """Read metrics files and update Prometheus metrics.
+
+        Returns the number of records ingested. Concurrent callers are
+        serialized, so every line is counted exactly once.
+        """
+        # Picks up edits to the config file, notifying reload_settings
+        config.refresh()
+        if not self._restored:
+            with self._lock:
+                if not self._restored:
+                    self._restore_checkpoint()
+        
+        # Walking repositories can take seconds, so scrapes and log ingestion
+        # only wait for the commits found to be applied
+        with stage('git_walk') as walking:
+            walking.items = self._walk_git()
+        
+        with self._lock:
+            with self.metrics.exporter_update_duration.time():
+                # Process timing metrics
+                with stage('ingest_timing') as ingesting:
+                    ingested = ingesting.items = self._process_timing_metrics()
+                
+                # Process git metrics
+                with stage('ingest_git') as ingesting:
+                    count = ingesting.items = self._process_git_metrics()
+                    ingested += count
                 
-                self.last_processed[str(metrics_file)] = f.tell()
+                # Process API usage
+                with stage('ingest_api') as ingesting:
+                    count = ingesting.items = self._process_api_metrics()
+                    ingested += count
+            
+            # Quantiles move as the windows slide, even without new records
+            changed = bool(ingested)
+            now = time.time()
+            slot = self._quantile_slot_at(now)
+            if changed or slot != self._quantile_slot:
+                self._quantile_slot = slot
+                changed = self._refresh_quantiles(now) or changed
+            
+            if (changed or self._exposition is None
+                    or time.monotonic() - self._exposition_time >= self.exposition_max_age):
+                self._update_pipeline_metrics(now)
+                self._serialize()
+            if ingested and time.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+                self._save_checkpoint()
+        return ingested
     
-    def _process_git_metrics(self):
-        """Process git metrics from log files."""
-        # Implementation for git metrics processing
-        pass
+    def _serialize(self) -> None:
+        """Rebuild the cached exposition; called with the lock held."""
+        with self.metrics.exporter_serialization_duration.time(), stage('serialize', items=1):
+            collector = self.metrics.registry
+            if self.tenant is not None:
+                collector = TenantCollector(collector, self.tenant)
+            body = generate_latest(collector)
+        self.metrics.exporter_registry_series.set(
+            sum(1 for line in body.splitlines() if line and not line.startswith(b'#'))
+        )
+        self.generation += 1
+        self._exposition = (self.generation, body, None)
+        self._exposition_time = time.monotonic()
     
-    def _process_api_metrics(self):
+    def _update_pipeline_metrics(self, now: float) -> None:
+        """Refresh series counts and per-log lag and backlog gauges."""
+        for metric in self.metrics.data:
+            self.metrics.exporter_series.labels(metric=metric._name).set(len(metric._metrics))
+        
+        self.metrics.exporter_ingest_lag.clear()
+        self.metrics.exporter_backlog_bytes.clear()
+        for key in list(self.newest_ingested):
+            if key not in self.last_processed:
+                del self.newest_ingested[key]  # deleted, or compressed and fully read
+        for key, offset in self.last_processed.items():
+            path = Path(key)
+            kind = TIMING if path.name.startswith(f'{TIMING}_') else API_USAGE
+            if key in self.newest_ingested:
+                self.metrics.exporter_ingest_lag.labels(kind=kind, file=path.name).set(
+                    max(now - self.newest_ingested[key], 0.0)
+                )
+            try:
+                self.metrics.exporter_backlog_bytes.labels(kind=kind, file=path.name).set(
+                    max(path.stat().st_size - offset, 0)
+                )
+            except OSError:
+                pass
+    
+    @property
+    def checkpoint_path(self) -> Path:
+        """Where offsets and metric values are checkpointed."""
+        configured = self._checkpoint_path
+        if configured is None and self.tenant is None:
+            configured = config.get('prometheus.checkpoint_path')
+        return Path(configured) if configured else self.metrics_dir / CHECKPOINT_FILE
+    
+    def save_checkpoint(self) -> None:
+        """Checkpoint the current offsets and metric values, e.g. on shutdown."""
+        with self._lock:
+            if self._restored:
+                self._save_checkpoint()
+    
+    def _save_checkpoint(self) -> None:
+        offsets = {}
+        for key, offset in self.last_processed.items():
+            path = Path(key)
+            identity = file_identity(path) if path.exists() else {'inode': None, 'size': None}
+            offsets[key] = {'offset': offset, **identity}
+        
+        Checkpoint(self.checkpoint_path).save({
+            'offsets': offsets,
+            'compacted_through': {kind: day.isoformat() for kind, day in self.compacted_through.items()},
+            'newest_logged': self.newest_logged,
+            'store': {'path': str(self.store_path), 'rows': self.store_rows} if self.store_path else None,
+            'git_shas': self.git_shas,
+            'git_authored': self.git_authored,
+            'git_quality': self.git_quality,
+            'label_limits': {
+                f'{name}:{label}': limiter.state()
+                for (name, label), limiter in self.label_limiters.items()
+            },
+            'ingest_keys': self.ingest_keys.state(),
+            'metrics': snapshot_metrics(self.metrics.checkpointed),
+        })
+        self._last_checkpoint = time.monotonic()
+    
+    def _restore_checkpoint(self) -> None:
+        """Resume from the last checkpoint, keeping only offsets still valid."""
+        self._restored = True
+        state = Checkpoint(self.checkpoint_path).load()
+        if state is None:
+            return
+        
+        for key, entry in state.get('offsets', {}).items():
+            path = Path(key)
+            if path.exists():
+                identity = file_identity(path)
+                # A different inode or a shorter file means the log was replaced
+                if identity['inode'] != entry['inode'] or identity['size'] < entry['offset']:
+                    continue
+            elif not any(path.with_name(path.name + suffix).exists() for suffix in COMPRESSED_SUFFIXES):
+                continue
+            self.last_processed[key] = entry['offset']
+        
+        self.compacted_through.update({
+            kind: date.fromisoformat(day) for kind, day in state.get('compacted_through', {}).items()
+        })
+        self.newest_logged.update(state.get('newest_logged', {}))
+        store_state = state.get('store') or {}
+        if self.store_path is not None and store_state.get('path') == str(self.store_path):
+            self.store_rows.update(store_state.get('rows', {}))
+        self.git_shas.update(state.get('git_shas', {}))
+        self.git_authored.update(state.get('git_authored', {}))
+        self.git_quality.update(state.get('git_quality', {}))
+        self._limiter_state = state.get('label_limits', {})
+        self.ingest_keys.restore(state.get('ingest_keys', {}))
+        restore_metrics(self.metrics.checkpointed, state.get('metrics', {}))
+    
+    def ingest(self, records: list[tuple[str, dict]], key: str | None = None) -> dict:
+        """Store a batch of posted ``(kind, record)`` pairs and ingest it.
+
+        Records are appended to today's logs, so they reach the registry the
+        same way local ones do and are counted once however they arrived. A
+        batch whose idempotency ``key`` was seen before is not stored again;
+        the original response is returned instead. The key is checkpointed
+        right after the batch is written, so a crash in between can at worst
+        store a retried batch twice, never lose one. The ``emitted`` flag is
+        dropped from posted records: it only says a collector's own sink
+        counted them, in multiprocess files this exporter does not read.
+        """
+        with self._lock:
+            if not self._restored:
+                self._restore_checkpoint()
+            if key is not None:
+                previous = self.ingest_keys.get(key)
+                if previous is not None:
+                    return {**previous, 'duplicate': True}
+            
+            if self._ingest_store is None:
+                self._ingest_store = JsonlStore(self.metrics_dir)
+            counts = dict.fromkeys((TIMING, API_USAGE), 0)
+            for kind, record in records:
+                record.pop(EMITTED_FIELD, None)
+                self._ingest_store.append(kind, record)
+                counts[kind] += 1
+            result = {'accepted': len(records), **counts}
+            if key is not None:
+                self.ingest_keys.add(key, result)
+                self._save_checkpoint()
+        
+        self.update_metrics()
+        return {**result, 'duplicate': False}
+    
+    def latest_exposition(self) -> tuple[int, bytes] | None:
+        """The cached exposition and its generation, without waiting for ingestion."""
+        cached = self._exposition
+        return None if cached is None else cached[:2]
+    
+    def exposition(self, compress: bool = False) -> bytes:
+        """The registry in text format as of the last ingestion.
+
+        Serialized once per change by the ingesting thread, so scrapes are
+        served from memory; the gzipped form is built on first request. With
+        a multiprocess directory, values counted by collecting processes
+        change without ingestion, so every scrape is serialized afresh.
+        """
+        if self._scrape_registry is not None:
+            with self.metrics.exporter_serialization_duration.time():
+                body = generate_latest(self._scrape_registry)
+                return gzip.compress(body, compresslevel=6) if compress else body
+        
+        cached = self._exposition
+        if cached is None:
+            with self._lock:
+                if self._exposition is None:
+                    self._serialize()
+                cached = self._exposition
+        generation, body, compressed = cached
+        if not compress:
+            return body
+        if compressed is None:
+            with self.metrics.exporter_serialization_duration.time():
+                compressed = gzip.compress(body, compresslevel=6)
+            with self._lock:
+                if self._exposition is not None and self._exposition[0] == generation:
+                    self._exposition = (generation, body, compressed)
+        return compressed
+        
+    def _observe_response_time(self, model: str, operation: str, record,
+                               histogram: bool = True) -> None:
+        """Record a response time in the histogram and the windowed sketches."""
+        model = self._label(self.metrics.ai_response_time, 'model', model)
+        operation = self._label(self.metrics.ai_response_time, 'operation', operation)
+        duration = max(record.get('duration', 0.0), 0.0)
+        if histogram:
+            self._child(self.metrics.ai_response_time, model=model, operation=operation).observe(duration)
+        
+        key = (model, operation)
+        sketches = self.response_time_sketches.get(key)
+        if sketches is None and self._over_budget():
+            key = (OTHER, OTHER)
+            sketches = self.response_time_sketches.get(key)
+        if sketches is None:
+            sketches = self.response_time_sketches[key] = [
+                WindowedSketch(window, self.sketch_slots, self.sketch_accuracy, self.sketch_max_bins)
+                for window in self.quantile_windows
+            ]
+        now = time.time()
+        for sketch in sketches:
+            sketch.add(duration, record.get('timestamp', now), now)
+    
+    def _quantile_slot_at(self, now: float) -> int | None:
+        if not self.quantile_windows:
+            return None
+        return int(now // (min(self.quantile_windows) / self.sketch_slots))
+    
+    def _refresh_quantiles(self, now: float) -> bool:
+        """Recompute quantile gauges from the sketches; returns whether any exist."""
+        had_series = bool(self.metrics.response_time_quantile._metrics)
+        self.metrics.response_time_quantile.clear()
+        for key, sketches in list(self.response_time_sketches.items()):
+            model, operation = key
+            live = False
+            for window, sketch in zip(self.quantile_windows, sketches, strict=True):
+                merged = sketch.merged(now)
+                if not merged.count:
+                    continue
+                live = True
+                for q in self.quantiles:
+                    self.metrics.response_time_quantile.labels(
+                        model=model, operation=operation, window=f'{window:g}s', quantile=f'{q:g}'
+                    ).set(merged.quantile(q))
+            if not live:
+                del self.response_time_sketches[key]  # nothing observed within any window
+        return had_series or bool(self.response_time_sketches)
+    
+    def suggested_buckets(self) -> dict[str, list[float]]:
+        """Histogram buckets fitted to recent response times, overall and per model.
+
+        Uses the longest configured window.
+        """
+        overall = DDSketch(self.sketch_accuracy, self.sketch_max_bins)
+        by_model: dict[str, DDSketch] = {}
+        with self._lock:
+            if self.quantile_windows:
+                longest = self.quantile_windows.index(max(self.quantile_windows))
+                now = time.time()
+                for (model, _), sketches in self.response_time_sketches.items():
+                    merged = sketches[longest].merged(now)
+                    overall.merge(merged)
+                    by_model.setdefault(model, DDSketch(self.sketch_accuracy, self.sketch_max_bins)).merge(merged)
+        suggestions = {'all': suggest_buckets(overall)}
+        suggestions.update({model: suggest_buckets(sketch) for model, sketch in by_model.items()})
+        return suggestions
+    
+    def _process_timing_metrics(self) -> int:
+        """Process timing metrics from log files."""
+        def ingest(metric):
+            if 'function_name' not in metric:
+                return False
+            if self._emitted(metric):
+                # Counted by the collecting process; only the sketches need it
+                self._observe_response_time(metric.get('model', 'unknown'), metric['function_name'],
+                                            metric, histogram=False)
+                return True
+            
+            # Update Prometheus metrics
+            requests_total = self.metrics.ai_requests_total
+            self._child(
+                requests_total,
+                model=self._label(requests_total, 'model', metric.get('model', 'unknown')),
+                language=metric.get('language', 'unknown'),
+                operation=self._label(requests_total, 'operation', metric['function_name'])
+            ).inc()
+            
+            self._observe_response_time(metric.get('model', 'unknown'), metric['function_name'], metric)
+            return True
+        
+        return self._process_logs(TIMING, ingest)
+    
+    def _process_api_metrics(self) -> int:
         """Process API usage metrics from log files."""
-        # Implementation for API metrics processing
-        pass
+        def ingest(usage):
+            if 'model' not in usage:
+                return False
+            if self._emitted(usage):
+                self._observe_response_time(usage['model'], usage.get('function', 'api_call'),
+                                            usage, histogram=False)
+                return True
+            
+            cost_total = self.metrics.api_cost_total
+            self._child(
+                cost_total,
+                model=self._label(cost_total, 'model', usage['model']),
+                provider=self._label(cost_total, 'provider', usage.get('provider', 'unknown'))
+            ).inc(max(usage.get('total_cost', 0.0), 0.0))
+            
+            self._observe_response_time(usage['model'], usage.get('function', 'api_call'), usage)
+            return True
+        
+        return self._process_logs(API_USAGE, ingest)
+    
+    def _emitted(self, record) -> bool:
+        """Whether a logged record's metrics are already in the multiprocess files."""
+        return self.multiprocess_dir is not None and bool(record.get(EMITTED_FIELD))
+    
+    def _label(self, metric, label: str, value) -> str:
+        """Label value to record under, folding excess values into ``other``."""
+        key = (metric._name, label)
+        limiter = self.label_limiters.get(key)
+        if limiter is None:
+            limiter = self.label_limiters[key] = self._make_limiter(metric, label)
+        value = str(value)
+        limited = limiter.value(value)
+        if limited == OTHER and value != OTHER:
+            self.metrics.label_overflow_total.labels(metric=metric._name, label=label).inc()
+        return limited
+    
+    def _over_budget(self) -> bool:
+        """Whether the data metrics hold as many series as ``max_series`` allows."""
+        return (self.max_series is not None
+                and sum(len(metric._metrics) for metric in self.metrics.data) >= self.max_series)
+    
+    def _child(self, metric, **labels):
+        """``metric.labels(**labels)``, folded into ``other`` once the budget is spent.
+
+        Labels that do not come from records (``BUDGET_EXEMPT_LABELS``) keep
+        their values, so the folded series stay distinguishable.
+        """
+        if self.max_series is not None:
+            key = tuple(str(labels[name]) for name in metric._labelnames)
+            if key not in metric._metrics and self._over_budget():
+                self.metrics.series_budget_overflow_total.labels(metric=metric._name).inc()
+                labels = {
+                    name: value if name in BUDGET_EXEMPT_LABELS else OTHER
+                    for name, value in labels.items()
+                }
+        return metric.labels(**labels)
+    
+    def _make_limiter(self, metric, label: str) -> LabelLimiter:
+        """Limiter configured by ``prometheus.cardinality`` for one metric label."""
+        max_values, allowlist = label_limits(self._setting('cardinality', {}), metric._name, label)
+        
+        def drop_series(value):
+            self.metrics.label_evictions_total.labels(metric=metric._name, label=label).inc()
+            position = metric._labelnames.index(label)
+            for labelvalues in list(metric._metrics):
+                if labelvalues[position] == value:
+                    metric.remove(*labelvalues)
+        
+        limiter = LabelLimiter(max_values, allowlist, on_evict=drop_series)
+        limiter.restore(self._limiter_state.get(f'{metric._name}:{label}', {}))
+        return limiter
+    
+    def _process_logs(self, kind: str, ingest) -> int:
+        """Feed lines appended to a kind's logs since the last call to ``ingest``.
+
+        ``ingest`` returns whether it used the record; the number used is returned.
+        """
+        ingested = 0
+        parse_errors = self.metrics.exporter_parse_errors_total.labels(kind=kind)
+        for metrics_file in self._pending_files(kind):
+            start = read_through = self._start_offset(metrics_file)
+            lines = 0
+            newest = None
+            # A compressed log has no time index to seek with, so records
+            # before the backfill point are dropped as they are read
+            cutoff = None
+            if (self.backfill_since is not None and is_compressed(metrics_file)
+                    and str(logical_path(metrics_file)) not in self.last_processed):
+                cutoff = self.backfill_since
+            
+            def skip_malformed(line, offset):
+                nonlocal read_through
+                read_through = offset
+                parse_errors.inc()
+            
+            # A trailing line without a newline is still being written; the
+            # offset stays before it so the next poll reads it once complete
+            for record, offset in iter_jsonl_offsets(metrics_file, start, on_error=skip_malformed):
+                read_through = offset
+                lines += 1
+                if cutoff is not None and _before(record, cutoff):
+                    continue
+                if ingest(record):
+                    ingested += 1
+                    timestamp = record['timestamp']
+                    if isinstance(timestamp, (int, float)) and (newest is None or timestamp > newest):
+                        newest = timestamp
+            
+            if read_through > start:
+                self.metrics.exporter_bytes_read_total.labels(kind=kind).inc(read_through - start)
+                self.metrics.exporter_lines_read_total.labels(kind=kind).inc(lines)
+            if newest is not None:
+                key = str(logical_path(metrics_file))
+                self.newest_ingested[key] = max(newest, self.newest_ingested.get(key, newest))
+                self.newest_logged[kind] = max(newest, self.newest_logged.get(kind, newest))
+            self._mark_processed(kind, metrics_file, read_through)
+        if self.store_path is not None:
+            ingested += self._process_store(kind, ingest)
+        return ingested
+    
+    def _store_path(self) -> Path | None:
+        """The SQLite database collectors write to, if that is the configured backend."""
+        if config.get('storage.backend', 'jsonl') != 'sqlite':
+            return None
+        configured = config.get('storage.sqlite_path') if self.tenant is None else None
+        return Path(configured) if configured else self.metrics_dir / 'metrics.db'
+    
+    def _process_store(self, kind: str, ingest) -> int:
+        """Feed rows appended to the SQLite store since the last call to ``ingest``."""
+        if self._store is None:
+            if not self.store_path.exists():
+                return 0
+            from ai_code_metrics.storage.sqlite import SQLiteStore
+            self._store = SQLiteStore(self.store_path)
+        
+        position = self.store_rows.get(kind)
+        if position is None:
+            floor = max((t for t in (self.backfill_since, self.newest_logged.get(kind)) if t is not None),
+                        default=None)
+            position = self.store_rows[kind] = {'id': 0, 'floor': floor}
+        
+        ingested = rows = 0
+        floor = position['floor']
+        for row_id, record in self._store.iter_rows(kind, position['id']):
+            position['id'] = row_id
+            rows += 1
+            timestamp = record.get('timestamp')
+            if floor is not None and isinstance(timestamp, (int, float)) and timestamp <= floor:
+                continue
+            if ingest(record):
+                ingested += 1
+        self.metrics.exporter_lines_read_total.labels(kind=kind).inc(rows)
+        return ingested
+    
+    def _pending_files(self, kind: str) -> list[Path]:
+        """Logs of a kind that may hold unread lines.
+
+        Offsets are kept per logical (uncompressed) file name, so a log that
+        retention compresses is resumed at the same point inside the archive.
+        Compressed logs at or before the watermark were already read to the
+        end and are skipped without being opened, as are logs never read
+        from days before the backfill point.
+        """
+        files = []
+        watermark = self.compacted_through.get(kind)
+        backfill_day = date.fromtimestamp(self.backfill_since) if self.backfill_since else None
+        for path in log_files(self.metrics_dir, kind):
+            day = log_file_date(path)
+            if is_compressed(path) and watermark and day and day <= watermark:
+                continue
+            if (backfill_day and day and day < backfill_day
+                    and str(logical_path(path)) not in self.last_processed):
+                continue
+            files.append(path)
+        
+        # Forget offsets of logs that retention has deleted
+        live = {str(logical_path(path)) for path in files}
+        for key in [k for k in self.last_processed if Path(k).name.startswith(f'{kind}_')]:
+            if key not in live:
+                del self.last_processed[key]
+        return files
+    
+    def _mark_processed(self, kind: str, metrics_file: Path, offset: int) -> None:
+        """Remember how far a log has been read."""
+        key = str(logical_path(metrics_file))
+        if is_compressed(metrics_file):
+            # A compressed log no longer grows: advance the watermark instead
+            self.last_processed.pop(key, None)
+            day = log_file_date(metrics_file)
+            if day and day > self.compacted_through.get(kind, day.min):
+                self.compacted_through[kind] = day
+        else:
+            self.last_processed[key] = offset
+    
+    def _start_offset(self, metrics_file: Path) -> int:
+        """Offset to resume reading a file from."""
+        last_pos = self.last_processed.get(str(logical_path(metrics_file)))
+        if last_pos is not None:
+            return last_pos
+        if self.backfill_since is None or is_compressed(metrics_file):
+            return 0
+        try:
+            return TimeIndex(metrics_file).byte_range(self.backfill_since, None)[0]
+        except OSError:
+            return 0
+    
+    def _walk_git(self) -> int:
+        """Queue commits made since the last walk; returns how many were found."""
+        if not self.git_repos:
+            return 0
+        with self._git_walk_lock:
+            now = time.monotonic()
+            if self._last_git_walk is not None and now - self._last_git_walk < self.git_interval:
+                return 0
+            self._last_git_walk = now
+            
+            found = 0
+            for repo_path in self.git_repos:
+                try:
+                    ingester = self._git_ingesters.get(repo_path)
+                    if ingester is None:
+                        ingester = self._git_ingesters[repo_path] = GitIngester(
+                            repo_path, self.git_backfill_days
+                        )
+                    last_sha = self._git_walked.get(repo_path) or self.git_shas.get(repo_path)
+                    last_authored = max(self._git_walked_authored.get(repo_path, 0),
+                                        self.git_authored.get(repo_path, 0)) or None
+                    for commit in ingester.new_commits(last_sha, last_authored):
+                        self._git_pending.append((repo_path, commit))
+                        self._git_walked[repo_path] = commit['commit_hash']
+                        self._git_walked_authored[repo_path] = max(
+                            self._git_walked_authored.get(repo_path, 0), commit['authored_at']
+                        )
+                        found += 1
+                except Exception as e:
+                    print(f"Error reading git repository {repo_path}: {e}")
+            return found
+    
+    def _process_git_metrics(self) -> int:
+        """Apply the commits queued by walks; called with the lock held."""
+        ingested = 0
+        while self._git_pending:
+            repo_path, commit = self._git_pending.popleft()
+            self._ingest_commit(commit)
+            self.git_shas[repo_path] = commit['commit_hash']
+            self.git_authored[repo_path] = max(self.git_authored.get(repo_path, 0),
+                                               commit['authored_at'])
+            ingested += 1
+        return ingested
+    
+    def _ingest_commit(self, commit) -> None:
+        ai_assisted = str(commit['ai_assisted']).lower()
+        for language, lines in commit['lines_by_language'].items():
+            if lines:
+                self._child(self.metrics.lines_generated, language=language,
+                            ai_assisted=ai_assisted).inc(lines)
+            
+            total = self.git_quality.setdefault(language, [0.0, 0])
+            total[0] += commit['commit_message_quality']
+            total[1] += 1
+            self._child(
+                self.metrics.code_quality_score,
+                language=language,
+                metric_type='commit_message'
+            ).set(round(total[0] / total[1], 2))
 
 
 exporter = MetricsExporter()
 
+# With prometheus.tenants set, each tenant's metrics root is served by an
+# exporter of its own and the single-root exporter above stays idle
+tenants: dict[str, MetricsExporter] = {
+    name: MetricsExporter(
+        Path(settings['metrics_dir']).expanduser() if settings.get('metrics_dir')
+        else Path.home() / '.ai_metrics' / name,
+        tenant=name,
+        settings=settings,
+    )
+    for name, settings in (config.get('prometheus.tenants') or {}).items()
+}
+tailers: dict[str | None, LogTailer] = {}
+_tailer_lock = threading.Lock()
+# (generation of each tenant's exposition, merged exposition, gzipped or None)
+_merged_exposition: tuple[tuple, bytes, bytes | None] | None = None
+
+
+def exporters() -> dict[str | None, MetricsExporter]:
+    """The exporters serving this process, by tenant (None without tenants)."""
+    return dict(tenants) if tenants else {None: exporter}
+
+
+@config.subscribe
+def _reload_settings(_config) -> None:
+    for shard in exporters().values():
+        shard.reload_settings()
+
+
+def start_tailer(poll_interval: float | None = None) -> dict[str | None, LogTailer]:
+    """Start ingesting logs in the background, once per process.
+
+    Each tenant gets a tailer of its own, polling at its own interval unless
+    ``poll_interval`` is given, so a tenant with a large backlog only delays
+    its own ingestion.
+    """
+    with _tailer_lock:
+        for name, shard in exporters().items():
+            running = tailers.get(name)
+            if running is None or not running.is_alive():
+                interval = poll_interval
+                if interval is None:
+                    interval = shard._setting('poll_interval_seconds', 1.0)
+                tailers[name] = LogTailer(shard, interval, name=f'ai-metrics-tailer-{name}' if name else None)
+                tailers[name].start()
+        atexit.register(stop_tailer)
+        return dict(tailers)
+
+
+def start_exporter(backfill_days: float | None = None) -> None:
+    """Start the background work of every exporter before serving requests.
+
+    Each tenant's metrics root (or the one metrics root) gets a retention
+    worker, unless ``retention.enabled`` is off, and a tailer. With
+    ``backfill_days``, logs seen for the first time are read from that many
+    days ago.
+    """
+    for shard in exporters().values():
+        if backfill_days:
+            shard.backfill_since = time.time() - backfill_days * 86400
+        if config.get('retention.enabled', True):
+            RetentionWorker(
+                RetentionPolicy.from_config(config.get('retention', {})),
+                shard.metrics_dir,
+                interval=config.get('retention.interval_seconds', 3600)
+            ).start()
+    start_tailer()
+
+
+def run_exporter(host: str, port: int, backfill_days: float | None = None,
+                 debug: bool = False, server: str = 'threaded') -> None:
+    """Start the exporter and serve it until shutdown.
+
+    ``server='flask'`` or ``debug`` uses the Flask development server;
+    otherwise the keep-alive server is used, with request bodies limited to
+    ``prometheus.ingest.max_batch_bytes``.
+    """
+    warn_unauthenticated_ingest()
+    start_exporter(backfill_days)
+    if debug or server == 'flask':
+        app.run(host=host, port=port, debug=debug)
+        stop_tailer()
+    else:
+        serve(app, host=host, port=port, on_shutdown=stop_tailer,
+              max_body_bytes=config.get('prometheus.ingest.max_batch_bytes',
+                                        DEFAULT_MAX_BATCH_BYTES))
+
+
+def stop_tailer() -> None:
+    """Stop background ingestion and checkpoint what has been ingested."""
+    with _tailer_lock:
+        for name, running in list(tailers.items()):
+            running.stop()
+            del tailers[name]
+            exporters()[name].save_checkpoint()
+        atexit.unregister(stop_tailer)
+
+
+def tenant_exposition(compress: bool = False) -> bytes:
+    """Every tenant's cached exposition merged into one, plus process metrics.
+
+    Tenants that have not finished their first ingestion are left out rather
+    than waited for. The merge is cached until a tenant's exposition changes.
+    """
+    global _merged_exposition
+    latest = {name: shard.latest_exposition() for name, shard in tenants.items()}
+    generations = tuple((name, cached[0]) for name, cached in latest.items() if cached is not None)
+    cached = _merged_exposition
+    if cached is None or cached[0] != generations:
+        body = merge_expositions(
+            [cached_body for _, cached_body in filter(None, latest.values())]
+        )
+        cached = _merged_exposition = (generations, body, None)
+    body = cached[1] + generate_latest(process_registry)
+    return gzip.compress(body, compresslevel=6) if compress else body
+
+
+def _exposition_response(body: bytes, compress: bool) -> Response:
+    response = Response(body, mimetype='text/plain')
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
 @app.route('/metrics')
 def metrics():
     """Endpoint that serves the Prometheus metrics."""
-    exporter.update_metrics()
-    return Response(generate_latest(registry), mimetype='text/plain')
+    if not tailers:
+        start_tailer()
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if tenants:
+        return _exposition_response(tenant_exposition(compress), compress)
+    return _exposition_response(exporter.exposition(compress), compress)
+
+
+@app.route('/metrics/<tenant>')
+def tenant_metrics(tenant):
+    """One tenant's metrics, serialized with its ``tenant`` label."""
+    if tenant not in tenants:
+        return Response('unknown tenant\n', status=404, mimetype='text/plain')
+    if not tailers:
+        start_tailer()
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    return _exposition_response(tenants[tenant].exposition(compress), compress)
+
+
+def warn_unauthenticated_ingest() -> None:
+    """Warn on stderr if anyone who can reach the exporter may post records."""
+    if config.get('prometheus.ingest.allow_unauthenticated') and not config.get('prometheus.ingest.token'):
+        print("Warning: POST /ingest accepts records without authentication; "
+              "set prometheus.ingest.token to require a bearer token", file=sys.stderr)
+
+
+@app.route('/ingest', methods=['POST'])
+@app.route('/ingest/<tenant>', methods=['POST'])
+def ingest(tenant=None):
+    """Accept a batch of records from a remote collector (see RemoteStore).
+
+    With tenants configured, batches are posted to ``/ingest/<tenant>``.
+    """
+    token = config.get('prometheus.ingest.token')
+    if not token and not config.get('prometheus.ingest.allow_unauthenticated'):
+        return jsonify({'error': 'Set prometheus.ingest.token to accept batches'}), 403
+    authorization = request.headers.get('Authorization', '').encode()
+    if token and not hmac.compare_digest(authorization, f'Bearer {token}'.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+    target = exporters().get(tenant)
+    if target is None:
+        if tenant is None:
+            return jsonify({'error': 'Post to /ingest/<tenant>'}), 400
+        return jsonify({'error': f'Unknown tenant: {tenant}'}), 404
+    key = request.headers.get('Idempotency-Key') or None
+    if key is not None and len(key) > MAX_KEY_LENGTH:
+        return jsonify({'error': 'Idempotency-Key too long'}), 400
+    max_bytes = config.get('prometheus.ingest.max_batch_bytes', DEFAULT_MAX_BATCH_BYTES)
+    if (request.content_length or 0) > max_bytes:
+        return jsonify({'error': 'Batch too large'}), 413
+    try:
+        records = decode_batch(
+            request.get_data(cache=False),
+            request.headers.get('Content-Encoding', ''),
+            max_bytes,
+        )
+    except IngestError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(target.ingest(records, key))
+
+
+@app.route('/healthz')
+def healthz():
+    """Liveness check that fails if background ingestion has died."""
+    stopped = sorted(str(name) for name, running in tailers.items() if not running.is_alive())
+    if stopped:
+        message = f"ingestion stopped: {', '.join(stopped)}" if tenants else 'ingestion stopped'
+        return Response(message + '\n', status=503, mimetype='text/plain')
+    return Response('ok\n', mimetype='text/plain')
+
+
+@app.route('/buckets')
+@app.route('/buckets/<tenant>')
+def buckets(tenant=None):
+    """Histogram bucket layouts fitted to recently observed response times."""
+    if tenant is None and tenants:
+        return jsonify({name: shard.suggested_buckets() for name, shard in tenants.items()})
+    target = exporters().get(tenant)
+    if target is None:
+        return jsonify({'error': 'Unknown tenant'}), 404
+    return jsonify(target.suggested_buckets())
 
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
+    run_exporter('0.0.0.0', 8080)
@@ -0,0 +1,153 @@
+"""Threaded HTTP/1.1 server for the exporter's WSGI app."""
+
+import io
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Idle keep-alive connections are closed after this many seconds
+DEFAULT_KEEPALIVE_TIMEOUT = 30.0
+
+# Larger request bodies are refused before being read
+DEFAULT_MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class WSGIRequestHandler(BaseHTTPRequestHandler):
+    """Serve requests on a persistent connection by calling a WSGI app."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ai-metrics-exporter'
+
+    def do_GET(self):
+        self._run_wsgi()
+
+    def do_POST(self):
+        self._run_wsgi()
+
+    def do_HEAD(self):
+        self._run_wsgi()
+
+    def _content_length(self) -> int | None:
+        """The declared body length, or None after refusing the request.
+
+        The body is left unread when refused, so the connection is closed.
+        Chunked bodies are not decoded; clients must send a Content-Length.
+        """
+        if self.headers.get('Transfer-Encoding'):
+            self.send_error(411, 'Content-Length required')
+            return None
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, 'Invalid Content-Length')
+            return None
+        if length > self.server.max_body_bytes:
+            self.send_error(413, 'Request body too large')
+            return None
+        return length
+
+    def _environ(self, length: int) -> dict:
+        path, _, query = self.path.partition('?')
+        body = self.rfile.read(length) if length else b''
+        environ = {
+            'REQUEST_METHOD': self.command,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote(path, 'latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.server.server_address[0],
+            'SERVER_PORT': str(self.server.server_address[1]),
+            'SERVER_PROTOCOL': self.request_version,
+            'REMOTE_ADDR': self.client_address[0],
+            'CONTENT_TYPE': self.headers.get('Content-Type', ''),
+            'CONTENT_LENGTH': str(length) if length else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in self.headers.items():
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            if key not in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def _run_wsgi(self):
+        length = self._content_length()
+        if length is None:
+            return
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = headers
+            return lambda data: None  # legacy write() is not supported
+
+        result = self.server.app(self._environ(length), start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        code, _, reason = response['status'].partition(' ')
+        self.send_response(int(code), reason)
+        has_length = False
+        for name, value in response['headers']:
+            if name.lower() == 'content-length':
+                has_length = True
+            self.send_header(name, value)
+        if not has_length:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Requests are not logged; scrapes would flood the output."""
+
+
+class ExporterServer(ThreadingHTTPServer):
+    """One thread per connection, with keep-alive and a bounded idle time."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, app, host: str = '0.0.0.0', port: int = 8080,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+                 max_body_bytes: int = DEFAULT_MAX_BODY_BYTES):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        handler = type('Handler', (WSGIRequestHandler,), {'timeout': keepalive_timeout})
+        super().__init__((host, port), handler)
+
+
+def serve(app, host: str = '0.0.0.0', port: int = 8080, on_shutdown=None,
+          max_body_bytes: int = DEFAULT_MAX_BODY_BYTES) -> None:
+    """Serve ``app`` until SIGINT or SIGTERM, then run ``on_shutdown``.
+
+    The listening socket is closed before ``on_shutdown`` (e.g. flushing the
+    exporter checkpoint) is called, so no new work arrives while it runs.
+    """
+    server = ExporterServer(app, host, port, max_body_bytes=max_body_bytes)
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return, so it cannot run
+        # on the thread that is serving
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        server.serve_forever()
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        server.server_close()
+        if on_shutdown is not None:
+            on_shutdown()
@@ -0,0 +1,142 @@
+"""Mergeable streaming quantile sketches for latency metrics."""
+
+import math
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+
+# Values at or below this are counted as zero
+MIN_POSITIVE_VALUE = 1e-9
+
+# Quantiles that bucket boundaries are suggested at
+SUGGESTION_QUANTILES = (0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999)
+
+
+class DDSketch:
+    """Quantile sketch with a relative error guarantee (DDSketch).
+
+    Values are counted in logarithmically sized bins, so any quantile is
+    returned within ``relative_accuracy`` of the true value whether it is a
+    microsecond or a minute. When more than ``max_bins`` bins are in use the
+    lowest ones are merged, trading accuracy at the bottom for bounded memory.
+    Sketches with the same accuracy can be merged exactly.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_bins = max_bins
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: int = 1) -> None:
+        """Add ``weight`` occurrences of ``value``."""
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= MIN_POSITIVE_VALUE:
+            self.zero_count += weight
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.bins[key] = self.bins.get(key, 0) + weight
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: 'DDSketch') -> None:
+        """Add all values of another sketch with the same accuracy."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, weight in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + weight
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        self.bins[keys[excess]] += sum(self.bins.pop(key) for key in keys[:excess])
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile ``q`` (0 to 1), or NaN when empty."""
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return max(self.min, 0.0)
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class WindowedSketch:
+    """Sketch of the values observed over a sliding time window.
+
+    The window is split into ``slots`` sub-sketches by timestamp; slots that
+    fall out of the window are dropped and the rest are merged on read.
+    """
+
+    def __init__(self, window_seconds: float, slots: int = 10,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        self.window_seconds = window_seconds
+        self.slots = slots
+        self.slot_seconds = window_seconds / slots
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._slots: dict[int, DDSketch] = {}
+
+    def _first_live_slot(self, now: float) -> int:
+        return int(now // self.slot_seconds) - self.slots + 1
+
+    def add(self, value: float, timestamp: float, now: float) -> None:
+        """Add a value observed at ``timestamp``; values already outside the window are ignored."""
+        slot = int(timestamp // self.slot_seconds)
+        if slot < self._first_live_slot(now):
+            return
+        sketch = self._slots.get(slot)
+        if sketch is None:
+            self.expire(now)
+            sketch = self._slots[slot] = DDSketch(self.relative_accuracy, self.max_bins)
+        sketch.add(value)
+
+    def expire(self, now: float) -> None:
+        """Drop slots that have left the window."""
+        first = self._first_live_slot(now)
+        for slot in [slot for slot in self._slots if slot < first]:
+            del self._slots[slot]
+
+    def merged(self, now: float) -> DDSketch:
+        """One sketch of every value currently in the window."""
+        self.expire(now)
+        merged = DDSketch(self.relative_accuracy, self.max_bins)
+        for sketch in self._slots.values():
+            merged.merge(sketch)
+        return merged
+
+
+def _round_significant(value: float, digits: int = 2) -> float:
+    if value <= 0:
+        return 0.0
+    return round(value, digits - 1 - math.floor(math.log10(value)))
+
+
+def suggest_buckets(sketch: DDSketch, quantiles=SUGGESTION_QUANTILES) -> list[float]:
+    """Histogram bucket boundaries that spread the sketched values evenly."""
+    bounds = {_round_significant(sketch.quantile(q)) for q in quantiles} if sketch.count else set()
+    return sorted(bound for bound in bounds if bound > 0)
@@ -0,0 +1,38 @@
+"""Background ingestion of metrics logs for the Prometheus exporter."""
+
+import threading
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class LogTailer(threading.Thread):
+    """Poll the metrics logs and feed new lines into the exporter's registry.
+
+    Scrapes then only serialize whatever the registry holds, so their latency
+    no longer depends on how much has been logged since the previous scrape.
+    """
+
+    def __init__(self, exporter, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 name: str | None = None):
+        super().__init__(name=name or 'ai-metrics-tailer', daemon=True)
+        self.exporter = exporter
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.poll()
+            self._stop_event.wait(self.poll_interval)
+
+    def poll(self):
+        """Ingest everything appended since the last poll."""
+        try:
+            self.exporter.update_metrics()
+        except Exception as e:
+            print(f"Tailer error: {e}")
+
+    def stop(self, timeout: float | None = None):
+        """Stop polling and wait for the current poll to finish."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,70 @@
+"""Serving several metrics roots, one per tenant, from one exporter.
+
+Each tenant has its own ``MetricsExporter`` with its own registry, label
+limits and series budget, ingested by its own tailer. Its exposition gains a
+``tenant`` label and is cached on its own; a scrape of the whole exporter
+concatenates the cached expositions family by family instead of serializing
+anything, so a tenant that is slow to ingest never holds up the others.
+"""
+
+from collections.abc import Iterable
+
+from prometheus_client.metrics_core import Metric
+
+TENANT_LABEL = 'tenant'
+
+
+class TenantCollector:
+    """A collector's families with a ``tenant`` label added to every sample."""
+
+    def __init__(self, collector, tenant: str):
+        self.collector = collector
+        self.tenant = tenant
+
+    def collect(self) -> list[Metric]:
+        families = []
+        for family in self.collector.collect():
+            labelled = Metric(family.name, family.documentation, family.type, family.unit)
+            labelled.samples = [
+                sample._replace(labels={TENANT_LABEL: self.tenant, **sample.labels})
+                for sample in family.samples
+            ]
+            families.append(labelled)
+        return families
+
+
+def split_families(body: bytes) -> list[tuple[bytes, bytes, bytes]]:
+    """Split a text exposition into ``(name, HELP/TYPE lines, sample lines)``.
+
+    A family starts at each line beginning with ``# HELP``; other comment
+    lines belong to the header of the family they follow.
+    """
+    families = []
+    name = header = samples = None
+    for line in body.splitlines(keepends=True):
+        if line.startswith(b'# HELP '):
+            if name is not None:
+                families.append((name, b''.join(header), b''.join(samples)))
+            name = line[len(b'# HELP '):].split(b' ', 1)[0].rstrip(b'\n')
+            header, samples = [line], []
+        elif name is not None:
+            (header if line.startswith(b'#') else samples).append(line)
+    if name is not None:
+        families.append((name, b''.join(header), b''.join(samples)))
+    return families
+
+
+def merge_expositions(bodies: Iterable[bytes]) -> bytes:
+    """One exposition holding every family of ``bodies``, each stated once.
+
+    Families of the same name must have the same help and type, as they do
+    in expositions of identically defined registries; the first is kept.
+    """
+    merged: dict[bytes, tuple[bytes, list[bytes]]] = {}
+    for body in bodies:
+        for name, header, samples in split_families(body):
+            family = merged.get(name)
+            if family is None:
+                family = merged[name] = (header, [])
+            family[1].append(samples)
+    return b''.join(header + b''.join(samples) for header, samples in merged.values())
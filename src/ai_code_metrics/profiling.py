@@ -0,0 +1,249 @@
+"""Per-stage timing and whole-command profiling.
+
+Code marks its stages with ``stage(name)`` (or ``timed_iter`` for the time
+spent fetching items from an iterator). While a ``StageTimer`` is active,
+each stage accumulates wall time, CPU time of the thread running it, calls
+and items; otherwise ``stage`` returns a shared no-op and costs next to
+nothing. ``profile`` activates a timer for a whole command and optionally
+runs cProfile or a sampling profiler alongside it.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+PROFILERS = ('cprofile', 'sampling', 'stages')
+
+# Suffix of the file each profiler writes
+PROFILE_SUFFIXES = {'cprofile': '.prof', 'sampling': '.folded'}
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_active: 'StageTimer | None' = None
+
+
+class Stage:
+    """One timed run of a stage; add to ``items`` as they are processed."""
+
+    __slots__ = ('timer', 'name', 'items', '_wall', '_cpu')
+
+    def __init__(self, timer: 'StageTimer', name: str, items: int = 0):
+        self.timer = timer
+        self.name = name
+        self.items = items
+
+    def __enter__(self) -> 'Stage':
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.timer.record(self.name, time.perf_counter() - self._wall,
+                          time.thread_time() - self._cpu, self.items)
+
+
+class _NullStage:
+    """Stand-in for ``Stage`` while no timer is active."""
+
+    __slots__ = ()
+    items = 0
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def __setattr__(self, name, value) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class StageTimer:
+    """Totals per stage name, safe to record into from several threads."""
+
+    def __init__(self):
+        # name -> [calls, items, wall seconds, cpu seconds]
+        self.stages: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, wall: float, cpu: float, items: int = 0) -> None:
+        with self._lock:
+            totals = self.stages.get(name)
+            if totals is None:
+                totals = self.stages[name] = [0, 0, 0.0, 0.0]
+            totals[0] += 1
+            totals[1] += items
+            totals[2] += wall
+            totals[3] += cpu
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """Totals per stage, in the order stages first ran."""
+        with self._lock:
+            return {
+                name: {
+                    'calls': calls,
+                    'items': items,
+                    'wall_s': round(wall, 6),
+                    'cpu_s': round(cpu, 6),
+                    'items_per_second': round(items / wall, 1) if items and wall else None,
+                }
+                for name, (calls, items, wall, cpu) in self.stages.items()
+            }
+
+    def format(self) -> str:
+        """The report as a table, one line per stage."""
+        lines = [f"{'stage':<20} {'calls':>8} {'items':>9} {'wall':>10} {'cpu':>10} {'items/s':>11}"]
+        for name, totals in self.report().items():
+            rate = totals['items_per_second']
+            lines.append(
+                f"{name:<20} {totals['calls']:>8} {totals['items']:>9} {totals['wall_s']:>9.3f}s "
+                f"{totals['cpu_s']:>9.3f}s {rate if rate is not None else '':>11}"
+            )
+        return '\n'.join(lines)
+
+
+def stage(name: str, items: int = 0) -> Stage | _NullStage:
+    """Context manager timing a stage into the active timer, if any."""
+    timer = _active
+    return _NULL_STAGE if timer is None else Stage(timer, name, items)
+
+
+def timed_iter(name: str, iterable: Iterable) -> Iterator:
+    """Yield from ``iterable``, timing each fetch as one item of a stage."""
+    timer = _active
+    if timer is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with Stage(timer, name, 1) as fetch:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                fetch.items = 0
+                return
+        yield item
+
+
+def stage_report() -> dict[str, dict[str, Any]] | None:
+    """The active timer's report, or None if stages are not being timed."""
+    timer = _active
+    return None if timer is None else timer.report()
+
+
+@contextmanager
+def timing(timer: StageTimer | None = None) -> Iterator[StageTimer]:
+    """Activate ``timer`` (or a new one) for the duration of the block."""
+    global _active
+    previous, _active = _active, timer or StageTimer()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+class SamplingProfiler:
+    """Samples the stacks of every thread from a background thread.
+
+    Stacks are counted in the collapsed format read by flame graph tools:
+    ``thread;outer;...;inner count``, one line per distinct stack.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write(self, path: Path) -> None:
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, limit: int = 15) -> list[tuple[str, int]]:
+        """Functions most often on top of a stack, with their sample counts."""
+        leaves: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+@contextmanager
+def profile(profiler: str = 'cprofile', output: Path | None = None,
+            interval: float = DEFAULT_SAMPLE_INTERVAL) -> Iterator[StageTimer]:
+    """Time stages for the block, and profile it with ``profiler``.
+
+    ``cprofile`` writes pstats data (for ``python -m pstats`` or snakeviz)
+    and profiles only the calling thread; ``sampling`` writes collapsed
+    stacks of every thread; ``stages`` only times stages. Summaries go to
+    stderr when the block ends.
+    """
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler: {profiler}")
+    # Only imported when profiling; analyzers import this module for ``stage``
+    import cProfile
+    import pstats
+
+    cprofiler = cProfile.Profile() if profiler == 'cprofile' else None
+    sampler = SamplingProfiler(interval) if profiler == 'sampling' else None
+
+    with timing() as timer:
+        if cprofiler is not None:
+            cprofiler.enable()
+        if sampler is not None:
+            sampler.start()
+        try:
+            yield timer
+        finally:
+            if cprofiler is not None:
+                cprofiler.disable()
+            if sampler is not None:
+                sampler.stop()
+
+    if cprofiler is not None:
+        cprofiler.dump_stats(output)
+        print(f"\ncProfile data written to {output}; top functions by cumulative time:",
+              file=sys.stderr)
+        pstats.Stats(cprofiler, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
+    if sampler is not None:
+        sampler.write(output)
+        print(f"\n{sampler.samples} samples written to {output}; most sampled functions:",
+              file=sys.stderr)
+        for function, count in sampler.top():
+            print(f"{count:>8}  {function}", file=sys.stderr)
+    if timer.stages:
+        print(f"\nStages:\n{timer.format()}", file=sys.stderr)
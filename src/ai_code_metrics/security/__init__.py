@@ -1,6 +1,12 @@
 """Security utilities for AI code metrics framework."""
 
+from ai_code_metrics._lazy import lazy_attributes
+
 from .anonymizer import CodeAnonymizer
-from .secrets import SecureConfig
 
-__all__ = ['SecureConfig', 'CodeAnonymizer']
\ No newline at end of file
+__all__ = ['SecureConfig', 'CodeAnonymizer']
+
+# SecureConfig needs cryptography, which anonymizing code does not
+_LAZY = {'SecureConfig': '.secrets'}
+
+__getattr__, __dir__ = lazy_attributes(globals(), _LAZY)
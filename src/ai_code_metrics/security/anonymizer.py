@@ -1,52 +1,112 @@
 """Code anonymization utilities for privacy protection."""
 
 import hashlib
+import hmac
+import keyword
+import os
 import re
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# Identifiers left as they are: Python keywords and names every codebase shares
+KEPT_IDENTIFIERS = frozenset(keyword.kwlist) | frozenset(keyword.softkwlist) | {'self', 'super'}
+
+# Splitting on a capture group puts identifiers at the odd indexes; like
+# Python's, identifiers may contain any letters, not only ASCII ones
+_IDENTIFIER_RE = re.compile(r'\b([^\W\d]\w*)\b')
+
+# Every run of letters, digits and underscores in free text
+_WORD_RE = re.compile(r'\w+')
+
+DEFAULT_MAX_REPLACEMENTS = 100_000
+
+# Batches smaller than this many characters are not worth a process pool
+PARALLEL_MIN_CHARS = 1_000_000
 
 
 class CodeAnonymizer:
-    """Anonymizes code snippets for privacy protection."""
-    
-    def __init__(self, salt: str = "your-secret-salt"):
+    """Anonymizes code snippets for privacy protection.
+
+    Identifiers are replaced by a keyed HMAC of their name, so the same
+    identifier maps to the same replacement in every process using the same
+    salt. The most recently used ``max_replacements`` mappings are memoized.
+    """
+
+    def __init__(self, salt: str = "your-secret-salt",
+                 max_replacements: int = DEFAULT_MAX_REPLACEMENTS):
         self.salt = salt
-        self.replacements = {}
-        
+        self.max_replacements = max_replacements
+        self._key = salt.encode()
+        self._get_replacement = lru_cache(maxsize=max_replacements)(self._replacement)
+        self._get_word_replacement = lru_cache(maxsize=max_replacements)(self._digest)
+
     def anonymize_code_snippet(self, code: str) -> str:
         """Anonymize variable and function names in code."""
-        # Replace variable names
-        code = re.sub(r'\b([a-zA-Z_][a-zA-Z0-9_]*)\b', 
-                     lambda m: self._get_replacement(m.group(1)), 
-                     code)
-        return code
-    
-    def _get_replacement(self, identifier: str) -> str:
-        """Get consistent replacement for an identifier."""
-        # Keep common keywords
-        if identifier in ['def', 'class', 'import', 'from', 'return', 
-                         'if', 'else', 'for', 'while', 'try', 'except',
-                         'and', 'or', 'not', 'is', 'in', 'as', 'with',
-                         'True', 'False', 'None', 'self', 'super', 'pass',
-                         'break', 'continue', 'raise', 'assert', 'lambda']:
+        parts = _IDENTIFIER_RE.split(code)
+        parts[1::2] = map(self._get_replacement, parts[1::2])
+        return ''.join(parts)
+
+    def anonymize_text(self, text: str) -> str:
+        """Anonymize free text, such as a commit message.
+
+        Unlike code, every word is replaced, including numbers (issue
+        references) and words that happen to be keywords; only punctuation
+        and whitespace are kept.
+        """
+        return _WORD_RE.sub(lambda match: self._get_word_replacement(match.group()), text)
+
+    def anonymize_value(self, value: str) -> str:
+        """Replace a whole value, such as an author name or email address."""
+        return self._get_replacement(value)
+
+    def anonymize_batch(self, snippets: Iterable[str], workers: int | None = None) -> list[str]:
+        """Anonymize many snippets, across worker processes for large batches.
+
+        ``workers`` defaults to the CPU count; batches under
+        ``PARALLEL_MIN_CHARS`` are always anonymized in this process.
+        """
+        snippets = list(snippets)
+        workers = workers or os.cpu_count() or 1
+        if workers < 2 or len(snippets) < 2 or sum(map(len, snippets)) < PARALLEL_MIN_CHARS:
+            return [self.anonymize_code_snippet(snippet) for snippet in snippets]
+
+        chunk_size = max(1, len(snippets) // (workers * 4))
+        with ProcessPoolExecutor(workers, initializer=_init_worker,
+                                 initargs=(self.salt, self.max_replacements)) as pool:
+            return list(pool.map(_anonymize_in_worker, snippets, chunksize=chunk_size))
+
+    def _replacement(self, identifier: str) -> str:
+        """Consistent replacement for an identifier; memoized per instance."""
+        if identifier in KEPT_IDENTIFIERS:
             return identifier
-        
-        # Get consistent hash-based replacement
-        if identifier not in self.replacements:
-            hash_val = hashlib.sha256(
-                f"{identifier}{self.salt}".encode()
-            ).hexdigest()[:8]
-            self.replacements[identifier] = f"var_{hash_val}"
-        
-        return self.replacements[identifier]
-        
+        return self._digest(identifier)
+
+    def _digest(self, name: str) -> str:
+        digest = hmac.new(self._key, name.encode(), hashlib.sha256).hexdigest()
+        return f"var_{digest[:8]}"
+
     def anonymize_file_path(self, path: str) -> str:
         """Anonymize a file path."""
         parts = path.split('/')
         anonymized_parts = []
-        
+
         for part in parts:
             if part and part[0] not in ('/', '.', '_'):
                 anonymized_parts.append(self._get_replacement(part))
             else:
                 anonymized_parts.append(part)
-                
-        return '/'.join(anonymized_parts)
\ No newline at end of file
+
+        return '/'.join(anonymized_parts)
+
+
+_worker_anonymizer: CodeAnonymizer | None = None
+
+
+def _init_worker(salt: str, max_replacements: int) -> None:
+    global _worker_anonymizer
+    _worker_anonymizer = CodeAnonymizer(salt, max_replacements)
+
+
+def _anonymize_in_worker(snippet: str) -> str:
+    return _worker_anonymizer.anonymize_code_snippet(snippet)
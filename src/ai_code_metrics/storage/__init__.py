@@ -0,0 +1,51 @@
+"""Storage backends for AI code metrics framework."""
+
+from pathlib import Path
+
+from ai_code_metrics._lazy import lazy_attributes
+from ai_code_metrics.config import config
+
+from .base import API_USAGE, KINDS, TIMING, MetricsStore, UnsupportedOperationError
+from .jsonl import JsonlStore
+from .retention import RetentionPolicy, RetentionWorker
+
+__all__ = ['MetricsStore', 'JsonlStore', 'SQLiteStore', 'RemoteStore', 'open_store',
+           'UnsupportedOperationError', 'RetentionPolicy', 'RetentionWorker',
+           'TIMING', 'API_USAGE', 'KINDS']
+
+# Backends whose dependencies (sqlite3, urllib.request) are slow to import
+# are only imported when first used
+_LAZY = {'SQLiteStore': '.sqlite', 'RemoteStore': '.remote'}
+
+__getattr__, __dir__ = lazy_attributes(globals(), _LAZY)
+
+
+def open_store(backend: str | None = None, path: Path | None = None) -> MetricsStore:
+    """Open the configured metrics store.
+
+    ``backend`` defaults to the ``storage.backend`` config value ("jsonl",
+    "sqlite" or "remote"). For JSONL ``path`` is the metrics directory; for
+    SQLite it is the database file, defaulting to ``storage.sqlite_path`` or
+    ``metrics.db`` inside the metrics directory. The remote backend sends
+    records to the exporter at ``storage.remote.url``.
+    """
+    backend = backend or config.get("storage.backend", "jsonl")
+    if backend == "jsonl":
+        return JsonlStore(path or config.get_metrics_path())
+    if backend == "sqlite":
+        db_path = path or config.get("storage.sqlite_path") or config.get_metrics_path() / "metrics.db"
+        from .sqlite import SQLiteStore
+        return SQLiteStore(Path(db_path))
+    if backend == "remote":
+        settings = config.get("storage.remote", {})
+        if not settings.get("url"):
+            raise ValueError("storage.remote.url must be set for the remote backend")
+        from .remote import RemoteStore
+        return RemoteStore(
+            settings["url"],
+            token=settings.get("token"),
+            batch_size=settings.get("batch_size", 500),
+            flush_interval=settings.get("flush_interval_seconds", 5.0),
+            max_pending=settings.get("max_pending", 100_000),
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,72 @@
+"""Storage backend interface for collected metrics."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from typing import Any
+
+# Record kinds written by the collectors
+TIMING = 'timing'
+API_USAGE = 'api_usage'
+KINDS = (TIMING, API_USAGE)
+
+# Fields each kind can be grouped by in aggregate queries, besides 'day'
+GROUP_FIELDS = {
+    TIMING: ('function_name', 'ai_assisted', 'success'),
+    API_USAGE: ('model', 'provider', 'function'),
+}
+
+
+class UnsupportedOperationError(Exception):
+    """The store cannot perform this operation, e.g. a query on a write-only store."""
+
+
+class MetricsStore(ABC):
+    """Append-only store of timing and API usage records.
+
+    Stores that only forward records elsewhere set ``readable`` to False and
+    raise ``UnsupportedOperationError`` from ``iter_records`` and ``aggregate``.
+    """
+
+    readable = True
+
+    @abstractmethod
+    def append(self, kind: str, record: dict[str, Any]) -> None:
+        """Store a record of the given kind."""
+
+    def flush(self) -> None:  # noqa: B027 - unbuffered stores have nothing to flush
+        """Persist any buffered records."""
+
+    def close(self) -> None:
+        """Flush and release resources."""
+        self.flush()
+
+    @abstractmethod
+    def iter_records(self, kind: str, start: float | None = None,
+                     end: float | None = None) -> Iterator[dict[str, Any]]:
+        """Yield records with ``start <= timestamp < end`` in timestamp order.
+
+        Raises ``UnsupportedOperationError`` if the store is not readable.
+        """
+
+    @abstractmethod
+    def aggregate(self, kind: str, group_by: tuple[str, ...] = (),
+                  start: float | None = None, end: float | None = None) -> list[dict[str, Any]]:
+        """Count records and sum their duration and cost per group.
+
+        Raises ``UnsupportedOperationError`` if the store is not readable.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def check_query(kind: str, group_by: tuple[str, ...]) -> None:
+    """Validate a query's kind and grouping fields."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown record kind: {kind}")
+    for field in group_by:
+        if field != 'day' and field not in GROUP_FIELDS[kind]:
+            raise ValueError(f"Cannot group {kind} records by {field}")
@@ -0,0 +1,199 @@
+"""Sidecar time indexes for seeking into daily JSONL logs.
+
+Each ``<kind>_<date>.jsonl`` log may have a ``<kind>_<date>.jsonl.idx`` file
+next to it: a fixed-size header followed by ``(bucket start, byte offset)``
+entries. An entry is added whenever a line lands in a later time bucket than
+any line before it, so every line before an entry's offset belongs to an
+earlier bucket. Readers binary-search the entries to skip straight to a time
+window instead of parsing the log from byte 0.
+"""
+
+import json
+import mmap
+import os
+import struct
+from bisect import bisect_right
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+INDEX_SUFFIX = '.idx'
+DEFAULT_BUCKET_SECONDS = 60
+
+_MAGIC = b'AIMIDX1\0'
+_HEADER = struct.Struct('<8sq')  # magic, bucket width in seconds
+_ENTRY = struct.Struct('<qq')    # bucket start, byte offset of first line in it
+
+# Lines may be written slightly out of timestamp order (see
+# DEFAULT_REORDER_SLACK); reading stops this far past the end of a window.
+END_SLACK = 5.0
+
+
+def index_path(log_path: Path) -> Path:
+    """Path of the sidecar index for a log file."""
+    return log_path.with_name(log_path.name + INDEX_SUFFIX)
+
+
+class TimeIndex:
+    """Bucketed timestamp-to-offset index for one JSONL log."""
+
+    def __init__(self, log_path: Path, bucket_seconds: int = DEFAULT_BUCKET_SECONDS):
+        self.log_path = Path(log_path)
+        self.path = index_path(self.log_path)
+        self.bucket_seconds = bucket_seconds
+        self._last_bucket: int | None = None
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds) * self.bucket_seconds
+
+    def _read_last_bucket(self) -> int | None:
+        """Bucket of the newest entry on disk, or None if there are none."""
+        try:
+            with open(self.path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    return None
+                _, self.bucket_seconds = _HEADER.unpack(header)
+                size = f.seek(0, os.SEEK_END)
+                if size < _HEADER.size + _ENTRY.size:
+                    return None
+                f.seek(size - (size - _HEADER.size) % _ENTRY.size - _ENTRY.size)
+                return _ENTRY.unpack(f.read(_ENTRY.size))[0]
+        except FileNotFoundError:
+            return None
+
+    def _append_entry(self, bucket: int, offset: int) -> None:
+        with open(self.path, 'ab') as f:
+            if f.tell() == 0:
+                f.write(_HEADER.pack(_MAGIC, self.bucket_seconds))
+            f.write(_ENTRY.pack(bucket, offset))
+        self._last_bucket = bucket
+
+    def note_append(self, timestamp: float, offset: int) -> None:
+        """Record that a line with ``timestamp`` was written at ``offset``.
+
+        Cheap in the common case: the index file is only touched when the
+        line falls into a newer bucket than this process last saw.
+        """
+        bucket = self._bucket(timestamp)
+        if self._last_bucket is not None and bucket <= self._last_bucket:
+            return
+
+        if not self.path.exists():
+            # A log written before it was indexed gets a full index first
+            if offset > 0:
+                self.build(end=offset)
+            self._last_bucket = self._read_last_bucket()
+        else:
+            # Another process may have moved the index on since we last looked
+            self._last_bucket = self._read_last_bucket()
+
+        if self._last_bucket is None or bucket > self._last_bucket:
+            self._append_entry(bucket, offset)
+
+    def build(self, end: int | None = None) -> None:
+        """(Re)build the index by scanning the log up to byte ``end``."""
+        entries = bytearray(_HEADER.pack(_MAGIC, self.bucket_seconds))
+        last_bucket = None
+        offset = 0
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if end is not None and offset >= end:
+                    break
+                if line.endswith(b'\n') and line.strip():
+                    try:
+                        bucket = self._bucket(json.loads(line)['timestamp'])
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        bucket = None
+                    if bucket is not None and (last_bucket is None or bucket > last_bucket):
+                        entries += _ENTRY.pack(bucket, offset)
+                        last_bucket = bucket
+                offset += len(line)
+
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_bytes(bytes(entries))
+        os.replace(tmp_path, self.path)
+        self._last_bucket = last_bucket
+
+    def _load(self) -> tuple[list[int], list[int]] | None:
+        """Read the index's buckets and offsets, or None if it is missing or stale."""
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size or data[:len(_MAGIC)] != _MAGIC:
+            return None
+        self.bucket_seconds = _HEADER.unpack_from(data)[1]
+        usable = len(data) - (len(data) - _HEADER.size) % _ENTRY.size
+        buckets, offsets = [], []
+        for bucket, offset in _ENTRY.iter_unpack(data[_HEADER.size:usable]):
+            buckets.append(bucket)
+            offsets.append(offset)
+        # An offset past the end means the log was replaced after indexing
+        if offsets and offsets[-1] >= self.log_path.stat().st_size:
+            return None
+        return buckets, offsets
+
+    def _entries(self) -> tuple[list[int], list[int]]:
+        """Load the index's entries, (re)building it if it is missing or stale."""
+        entries = self._load()
+        if entries is None:
+            self.build()
+            entries = self._load() or ([], [])
+        return entries
+
+    def byte_range(self, start: float | None, end: float | None) -> tuple[int, int | None]:
+        """Byte range of the log that holds every line in ``[start, end)``.
+
+        The start offset steps back one entry so a racing writer that indexed
+        a line slightly out of order cannot cause records to be skipped.
+        """
+        buckets, offsets = self._entries()
+        first = 0
+        if start is not None:
+            i = bisect_right(buckets, self._bucket(start)) - 2
+            first = offsets[i] if i >= 0 else 0
+        last = None
+        if end is not None:
+            i = bisect_right(buckets, end + END_SLACK)
+            last = offsets[i] if i < len(offsets) else None
+        return first, last
+
+
+def iter_jsonl_window(path: Path, start: float | None = None,
+                      end: float | None = None) -> Iterator[dict[str, Any]]:
+    """Yield complete records of a log whose timestamps fall in ``[start, end)``.
+
+    The log is memory-mapped and only the byte range the sidecar index points
+    at is parsed. Records are yielded in file order.
+    """
+    first, last = 0, None
+    if start is not None or end is not None:
+        try:
+            first, last = TimeIndex(path).byte_range(start, end)
+        except OSError:
+            pass  # e.g. a read-only directory where the index cannot be built
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = first
+            stop = size if last is None else min(last, size)
+            while pos < stop:
+                newline = mm.find(b'\n', pos, size)
+                if newline < 0:
+                    break  # trailing line still being written
+                line = mm[pos:newline]
+                pos = newline + 1
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(record, dict) or 'timestamp' not in record:
+                    continue
+                timestamp = record['timestamp']
+                if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                    yield record
@@ -0,0 +1,246 @@
+"""Daily JSONL file storage for collected metrics."""
+
+import gzip
+import heapq
+import json
+import lzma
+import re
+import time
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+from .base import API_USAGE, TIMING, MetricsStore, check_query
+from .index import TimeIndex, iter_jsonl_window
+
+# Records are written with the wall-clock time at which the call finished, so
+# lines from concurrent writers can land in a file slightly out of order.
+DEFAULT_REORDER_SLACK = 5.0
+
+_LOG_DATE_RE = re.compile(r'_(\d{4}-\d{2}-\d{2})\.jsonl')
+
+# Suffixes of compressed logs and the module that reads them
+COMPRESSED_SUFFIXES = {'.gz': gzip, '.xz': lzma}
+
+
+def is_compressed(path: Path) -> bool:
+    """Whether a log file has been compressed by retention."""
+    return path.suffix in COMPRESSED_SUFFIXES
+
+
+def logical_path(path: Path) -> Path:
+    """The uncompressed ``.jsonl`` path a (possibly compressed) log stands for."""
+    return path.with_suffix('') if is_compressed(path) else path
+
+
+def open_log(path: Path):
+    """Open a log for binary reading, decompressing it transparently."""
+    codec = COMPRESSED_SUFFIXES.get(path.suffix)
+    return codec.open(path, 'rb') if codec else open(path, 'rb')
+
+
+def log_files(directory: Path, kind: str) -> list[Path]:
+    """Daily logs of a kind in a directory, plain or compressed, oldest first.
+
+    If a day exists both plain and compressed (lines appended after it was
+    compacted), the compressed file comes first.
+    """
+    files = [
+        path for path in directory.glob(f'{kind}_*.jsonl*')
+        if path.suffix == '.jsonl' or is_compressed(path)
+    ]
+    return sorted(files, key=lambda p: (logical_path(p).name, not is_compressed(p)))
+
+
+def log_file_date(path: Path) -> date | None:
+    """Return the day a daily log file covers, parsed from its name."""
+    match = _LOG_DATE_RE.search(path.name)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), '%Y-%m-%d').date()
+
+
+def files_in_range(files: Iterable[Path], start: float | None,
+                   end: float | None = None) -> list[Path]:
+    """Drop daily log files entirely outside ``[start, end)`` without opening them.
+
+    A one-day margin on each side covers records written just after midnight
+    and differences between the file name (local date) and record timestamps.
+    """
+    first_day = datetime.fromtimestamp(start).date().toordinal() - 1 if start is not None else None
+    last_day = datetime.fromtimestamp(end).date().toordinal() + 1 if end is not None else None
+    selected = []
+    for path in files:
+        day = log_file_date(path)
+        if day is not None:
+            if first_day is not None and day.toordinal() < first_day:
+                continue
+            if last_day is not None and day.toordinal() > last_day:
+                continue
+        selected.append(path)
+    return selected
+
+
+def files_since(files: Iterable[Path], start: float | None) -> list[Path]:
+    """Drop daily log files that end before ``start`` without opening them."""
+    return files_in_range(files, start)
+
+
+def iter_jsonl_offsets(path: Path, offset: int = 0,
+                       on_error: Callable[[bytes, int], None] | None = None
+                       ) -> Iterator[tuple[dict[str, Any], int]]:
+    """Yield ``(record, offset after its line)`` from a JSONL file.
+
+    Reading starts at byte ``offset`` and stops at a trailing line without a
+    newline, which is a record still being written. Blank lines are skipped,
+    as are malformed ones after being passed to ``on_error`` with the offset
+    after them. Compressed logs are decompressed on the fly, with offsets
+    counted in uncompressed bytes.
+    """
+    with open_log(path) as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict) and 'timestamp' in record:
+                yield record, offset
+            elif on_error is not None:
+                on_error(line, offset)
+
+
+def iter_jsonl(path: Path, offset: int = 0) -> Iterator[dict[str, Any]]:
+    """Yield complete records from a JSONL file, starting at byte ``offset``."""
+    for record, _ in iter_jsonl_offsets(path, offset):
+        yield record
+
+
+def iter_sorted_records(files: Iterable[Path],
+                        start: float | None = None,
+                        slack: float = DEFAULT_REORDER_SLACK,
+                        end: float | None = None) -> Iterator[dict[str, Any]]:
+    """Stream records with ``start <= timestamp < end`` in timestamp order.
+
+    Files are read one at a time in name (i.e. date) order and passed through a
+    small reorder buffer, so memory is bounded by the number of records written
+    within ``slack`` seconds of each other rather than by the size of the logs.
+    With a time range, each file's sidecar index is used to read only the
+    part of it that can hold records in the range.
+    """
+    heap: list[tuple[float, int, dict[str, Any]]] = []
+    seq = 0
+    newest = float('-inf')
+
+    ordered = sorted(files_in_range(files, start, end),
+                     key=lambda p: (logical_path(p).name, not is_compressed(p)))
+    for path in ordered:
+        if not path.exists():
+            continue
+        if is_compressed(path):
+            # Compressed logs have no index; stream and filter them instead
+            records = (
+                r for r in iter_jsonl(path)
+                if (start is None or r['timestamp'] >= start) and (end is None or r['timestamp'] < end)
+            )
+        else:
+            records = iter_jsonl_window(path, start, end)
+        for record in records:
+            timestamp = record['timestamp']
+            heapq.heappush(heap, (timestamp, seq, record))
+            seq += 1
+            newest = max(newest, timestamp)
+            while heap and heap[0][0] <= newest - slack:
+                yield heapq.heappop(heap)[2]
+
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+
+def _day(timestamp: float) -> str:
+    """Local calendar day of a timestamp, matching the daily file names."""
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
+
+
+def aggregate_records(kind: str, records: Iterable[dict[str, Any]],
+                      group_by: tuple[str, ...] = ()) -> list[dict[str, Any]]:
+    """Group records in Python the way ``MetricsStore.aggregate`` specifies."""
+    check_query(kind, group_by)
+    groups: dict[tuple, dict[str, Any]] = {}
+    for record in records:
+        key = tuple(
+            _day(record['timestamp']) if field == 'day' else record.get(field)
+            for field in group_by
+        )
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                **dict(zip(group_by, key, strict=True)),
+                'count': 0,
+                'total_duration': 0.0,
+                'total_cost': 0.0,
+            }
+            if kind == API_USAGE:
+                group.update(input_tokens=0, output_tokens=0)
+        group['count'] += 1
+        group['total_duration'] += record.get('duration', 0.0)
+        if kind == TIMING:
+            group['total_cost'] += record.get('api_cost', 0.0)
+        else:
+            group['total_cost'] += record.get('total_cost', 0.0)
+            group['input_tokens'] += record.get('input_tokens', 0)
+            group['output_tokens'] += record.get('output_tokens', 0)
+    return [groups[key] for key in sorted(groups, key=repr)]
+
+
+class JsonlStore(MetricsStore):
+    """Append records to one JSONL file per kind and day."""
+
+    def __init__(self, storage_path: Path, index: bool = True):
+        self.storage_path = Path(storage_path)
+        self.storage_path.mkdir(exist_ok=True)
+        self.index = index
+        # Sidecar indexes of the files currently being appended to
+        self._indexes: dict[Path, TimeIndex] = {}
+
+    def append(self, kind: str, record: dict[str, Any]) -> None:
+        """Append a record to today's file for its kind, updating its index."""
+        date_str = time.strftime('%Y-%m-%d')
+        metrics_file = self.storage_path / f'{kind}_{date_str}.jsonl'
+        line = (json.dumps(record) + '\n').encode()
+
+        # A single write keeps concurrent appenders from interleaving lines
+        with open(metrics_file, 'ab') as f:
+            f.write(line)
+            offset = f.tell() - len(line)
+
+        if self.index:
+            time_index = self._indexes.get(metrics_file)
+            if time_index is None:
+                # Only today's files are appended to; forget earlier days
+                self._indexes = {
+                    path: idx for path, idx in self._indexes.items() if date_str in path.name
+                }
+                time_index = self._indexes[metrics_file] = TimeIndex(metrics_file)
+            time_index.note_append(record['timestamp'], offset)
+
+    def files(self, kind: str) -> list[Path]:
+        """All daily files of a kind, plain or compressed, oldest first."""
+        return log_files(self.storage_path, kind)
+
+    def iter_records(self, kind: str, start: float | None = None,
+                     end: float | None = None) -> Iterator[dict[str, Any]]:
+        """Stream records in timestamp order, seeking via files' time indexes."""
+        check_query(kind, ())
+        yield from iter_sorted_records(self.files(kind), start=start, end=end)
+
+    def aggregate(self, kind: str, group_by: tuple[str, ...] = (),
+                  start: float | None = None, end: float | None = None) -> list[dict[str, Any]]:
+        """Aggregate by scanning the files in the requested range."""
+        return aggregate_records(kind, self.iter_records(kind, start, end), group_by)
@@ -0,0 +1,177 @@
+"""Write-only storage that sends records to a remote exporter over HTTP."""
+
+import atexit
+import gzip
+import json
+import random
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import deque
+from collections.abc import Iterator
+from typing import Any
+
+from .base import MetricsStore, UnsupportedOperationError, check_query
+
+# HTTP statuses worth retrying; any other error means the batch is rejected
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+def encode_batch(records: list[tuple[str, dict[str, Any]]]) -> bytes:
+    """Gzipped NDJSON body for a batch of ``(kind, record)`` pairs."""
+    lines = ''.join(json.dumps({'kind': kind, 'record': record}) + '\n' for kind, record in records)
+    return gzip.compress(lines.encode(), compresslevel=6)
+
+
+class RemoteStore(MetricsStore):
+    """Batch records and POST them to an exporter's ``/ingest`` endpoint.
+
+    Appends only buffer; a background thread sends a batch once
+    ``batch_size`` records are pending or ``flush_interval`` seconds have
+    passed, and on close/exit. Each batch gets an idempotency key when it is
+    cut and keeps it through retries, so the exporter stores it once even if
+    a response is lost. Batches that cannot be delivered stay queued, up to
+    ``max_pending`` records, after which the oldest are dropped.
+
+    Records cannot be read back: query the exporter's store instead.
+    """
+
+    readable = False
+
+    def __init__(self, url: str, token: str | None = None, batch_size: int = 500,
+                 flush_interval: float = 5.0, timeout: float = 10.0, max_retries: int = 5,
+                 backoff: float = 0.5, max_pending: int = 100_000):
+        self.url = url.rstrip('/')
+        # An exporter's base URL, its /ingest endpoint, or a tenant's /ingest/<tenant>
+        if '/ingest' not in urllib.parse.urlsplit(self.url).path:
+            self.url += '/ingest'
+        self.token = token
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        # Serializes sending, so batches arrive in the order they were cut
+        self._send_lock = threading.Lock()
+        self._pending: list[tuple[str, dict[str, Any]]] = []
+        # (idempotency key, records) cut but not yet delivered
+        self._batches: deque[tuple[str, list[tuple[str, dict[str, Any]]]]] = deque()
+        self._queued = 0
+        self.sent = 0
+        self.dropped = 0
+
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ai-metrics-remote', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, kind: str, record: dict[str, Any]) -> None:
+        """Buffer a record for the next batch."""
+        check_query(kind, ())
+        with self._lock:
+            self._pending.append((kind, record))
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+
+    def _cut(self) -> None:
+        """Move pending records into keyed batches; called with the lock held."""
+        while self._pending:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            self._batches.append((uuid.uuid4().hex, batch))
+            self._queued += len(batch)
+        while self._queued > self.max_pending and len(self._batches) > 1:
+            _, batch = self._batches.popleft()
+            self._queued -= len(batch)
+            self.dropped += len(batch)
+
+    def flush(self) -> None:
+        """Send every buffered record, retrying failed batches."""
+        self._flush(self.max_retries)
+
+    def _flush(self, retries: int) -> None:
+        with self._send_lock:
+            with self._lock:
+                self._cut()
+            while True:
+                with self._lock:
+                    if not self._batches:
+                        return
+                    key, batch = self._batches[0]
+                delivered = self._send(key, batch, retries)
+                if delivered is None:
+                    return  # still queued for the next flush
+                with self._lock:
+                    self._batches.popleft()
+                    self._queued -= len(batch)
+                    if delivered:
+                        self.sent += len(batch)
+                    else:
+                        self.dropped += len(batch)
+
+    def _send(self, key: str, batch: list[tuple[str, dict[str, Any]]], retries: int) -> bool | None:
+        """POST one batch, retrying with exponential backoff.
+
+        Returns True once it is stored, False if the exporter rejected it
+        (resending cannot succeed) and None if it should be tried again later.
+        """
+        body = encode_batch(batch)
+        headers = {
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip',
+            'Idempotency-Key': key,
+        }
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = self.backoff * 2 ** (attempt - 1)
+                if self._closed.wait(delay * random.uniform(0.5, 1.0)):
+                    return None
+            request = urllib.request.Request(self.url, data=body, headers=headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                return True
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUSES:
+                    print(f"Remote store rejected {len(batch)} records: {e.code} {e.reason}")
+                    return False
+            except (urllib.error.URLError, OSError):
+                pass
+        return None
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Remote store error: {e}")
+
+    def close(self) -> None:
+        """Stop the sender and make a last attempt to send what is buffered."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self._flush(retries=0)
+        atexit.unregister(self.close)
+
+    def iter_records(self, kind: str, start: float | None = None,
+                     end: float | None = None) -> Iterator[dict[str, Any]]:
+        raise UnsupportedOperationError("Remote stores are write-only; query the exporter's store")
+
+    def aggregate(self, kind: str, group_by: tuple[str, ...] = (),
+                  start: float | None = None, end: float | None = None) -> list[dict[str, Any]]:
+        raise UnsupportedOperationError("Remote stores are write-only; query the exporter's store")
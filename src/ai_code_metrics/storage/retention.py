@@ -0,0 +1,152 @@
+"""Retention and compression of daily metrics logs."""
+
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from .base import KINDS
+from .index import index_path
+from .jsonl import is_compressed, log_file_date, log_files
+
+CODECS = {'gzip': ('.gz', gzip), 'lzma': ('.xz', lzma)}
+
+
+@dataclass
+class RetentionPolicy:
+    """Which daily logs to compress and which to delete.
+
+    Today's logs are never touched. Logs at least ``compress_after_days`` old
+    are compressed with ``codec``; logs older than ``max_age_days`` are
+    deleted, and the oldest days are deleted until the directory holds at most
+    ``max_total_bytes`` of logs.
+    """
+    compress_after_days: int | None = 1
+    codec: str = 'gzip'
+    max_age_days: int | None = None
+    max_total_bytes: int | None = None
+
+    @classmethod
+    def from_config(cls, settings: dict[str, Any]) -> 'RetentionPolicy':
+        """Build a policy from the ``retention`` config section."""
+        max_total_mb = settings.get('max_total_mb')
+        return cls(
+            compress_after_days=settings.get('compress_after_days', 1),
+            codec=settings.get('codec', 'gzip'),
+            max_age_days=settings.get('max_age_days'),
+            max_total_bytes=int(max_total_mb * 1024 * 1024) if max_total_mb else None,
+        )
+
+    def apply(self, metrics_dir: Path, today: date | None = None) -> dict[str, int]:
+        """Compress and delete logs in ``metrics_dir``; return what was done."""
+        if self.codec not in CODECS:
+            raise ValueError(f"Unknown compression codec: {self.codec}")
+        today = today or date.today()
+        summary = {'compressed': 0, 'deleted': 0, 'bytes_freed': 0}
+
+        days: dict[date, list[Path]] = {}
+        for kind in KINDS:
+            for path in log_files(metrics_dir, kind):
+                day = log_file_date(path)
+                if day is not None and day < today:
+                    days.setdefault(day, []).append(path)
+
+        for day in sorted(days):
+            age = (today - day).days
+            if self.max_age_days is not None and age > self.max_age_days:
+                summary['bytes_freed'] += self._delete(days.pop(day))
+                summary['deleted'] += 1
+            elif self.compress_after_days is not None and age >= self.compress_after_days:
+                for i, path in enumerate(days[day]):
+                    if not is_compressed(path):
+                        before = _size_with_index(path)
+                        days[day][i] = self._compress(path)
+                        summary['bytes_freed'] += before - days[day][i].stat().st_size
+                        summary['compressed'] += 1
+
+        if self.max_total_bytes is not None:
+            total = sum(_size_with_index(path) for kind in KINDS
+                        for path in log_files(metrics_dir, kind))
+            for day in sorted(days):
+                if total <= self.max_total_bytes:
+                    break
+                freed = self._delete(days.pop(day))
+                total -= freed
+                summary['bytes_freed'] += freed
+                summary['deleted'] += 1
+
+        return summary
+
+    def _compress(self, path: Path) -> Path:
+        """Compress a closed log next to itself and remove the original.
+
+        The log is renamed aside first, so a writer appending late starts a
+        new log rather than adding lines that would be deleted with this one.
+        If the day was compacted before, the late lines become another stream
+        after the existing archive (both codecs read concatenated streams).
+        The archive is written to a temporary file and swapped in whole, so a
+        failure never leaves it truncated.
+        """
+        suffix, codec = CODECS[self.codec]
+        target = path.with_name(path.name + suffix)
+        aside = path.with_name(path.name + '.compacting')
+        # An existing one was left by an interrupted pass and is compressed
+        # first; the log at ``path`` then waits for the next pass
+        if not aside.exists():
+            os.replace(path, aside)
+            index_path(path).unlink(missing_ok=True)
+
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(tmp_path, 'wb') as raw:
+            if target.exists():
+                with open(target, 'rb') as archived:
+                    shutil.copyfileobj(archived, raw)
+            with open(aside, 'rb') as src, codec.open(raw, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, target)
+        aside.unlink()
+        return target
+
+    def _delete(self, paths: list[Path]) -> int:
+        freed = 0
+        for path in paths:
+            freed += _size_with_index(path)
+            path.unlink(missing_ok=True)
+            index_path(path).unlink(missing_ok=True)
+        return freed
+
+
+def _size_with_index(path: Path) -> int:
+    """Size of a log plus its sidecar index, if any."""
+    size = path.stat().st_size if path.exists() else 0
+    idx = index_path(path)
+    return size + (idx.stat().st_size if idx.exists() else 0)
+
+
+class RetentionWorker(threading.Thread):
+    """Apply a retention policy periodically in a background thread."""
+
+    def __init__(self, policy: RetentionPolicy, metrics_dir: Path, interval: float = 3600.0):
+        super().__init__(name='ai-metrics-retention', daemon=True)
+        self.policy = policy
+        self.metrics_dir = metrics_dir
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.policy.apply(self.metrics_dir)
+            except Exception as e:
+                print(f"Retention error: {e}", file=sys.stderr)
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        """Stop after the current pass."""
+        self._stop_event.set()
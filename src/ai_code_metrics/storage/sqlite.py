@@ -0,0 +1,254 @@
+"""Embedded SQLite storage for collected metrics."""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from .base import API_USAGE, KINDS, TIMING, MetricsStore, check_query
+from .jsonl import JsonlStore, is_compressed, iter_jsonl_offsets, logical_path
+
+# Columns extracted from each kind of record; the full record is kept as JSON
+COLUMNS = {
+    TIMING: ('timestamp', 'function_name', 'ai_assisted', 'success', 'duration',
+             'api_cost', 'span_id'),
+    API_USAGE: ('timestamp', 'model', 'provider', 'function', 'input_tokens',
+                'output_tokens', 'total_cost', 'duration', 'span_id'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timing (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    function_name TEXT,
+    ai_assisted INTEGER,
+    success INTEGER,
+    duration REAL,
+    api_cost REAL,
+    span_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_timing_timestamp ON timing (timestamp);
+CREATE INDEX IF NOT EXISTS idx_timing_function ON timing (function_name, timestamp);
+
+CREATE TABLE IF NOT EXISTS api_usage (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    model TEXT,
+    provider TEXT,
+    function TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    total_cost REAL,
+    duration REAL,
+    span_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_api_usage_timestamp ON api_usage (timestamp);
+CREATE INDEX IF NOT EXISTS idx_api_usage_model ON api_usage (model, timestamp);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+"""
+
+COST_COLUMN = {TIMING: 'api_cost', API_USAGE: 'total_cost'}
+
+# Rows per executemany() call when importing JSONL history
+IMPORT_BATCH_SIZE = 10_000
+
+
+class SQLiteStore(MetricsStore):
+    """Store records in a SQLite database in WAL mode.
+
+    Appends are buffered and written in a single transaction once
+    ``batch_size`` records are pending or ``flush_interval`` seconds have
+    passed since the last write, and on close/exit.
+    """
+
+    def __init__(self, db_path: Path, batch_size: int = 100, flush_interval: float = 1.0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._pending: dict[str, list[tuple]] = {kind: [] for kind in KINDS}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        atexit.register(self.close)
+
+    def _row(self, kind: str, record: dict[str, Any]) -> tuple:
+        return tuple(record.get(column) for column in COLUMNS[kind]) + (json.dumps(record),)
+
+    def append(self, kind: str, record: dict[str, Any]) -> None:
+        """Buffer a record, writing the batch when it is full or old enough."""
+        check_query(kind, ())
+        with self._lock:
+            self._pending[kind].append(self._row(kind, record))
+            self._pending_count += 1
+            if (self._pending_count >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write all buffered records in one transaction."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending_count or self._conn is None:
+            return
+        with self._conn:
+            for kind, rows in self._pending.items():
+                self._insert(kind, rows)
+                rows.clear()
+        self._pending_count = 0
+
+    def _insert(self, kind: str, rows: list[tuple]) -> None:
+        if rows:
+            columns = COLUMNS[kind] + ('data',)
+            self._conn.executemany(
+                f"INSERT INTO {kind} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                rows
+            )
+
+    def close(self) -> None:
+        """Flush pending records and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_locked()
+            self._conn.close()
+            self._conn = None
+        atexit.unregister(self.close)
+
+    def _where(self, start: float | None, end: float | None) -> tuple[str, list[float]]:
+        clauses, params = [], []
+        if start is not None:
+            clauses.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            clauses.append('timestamp < ?')
+            params.append(end)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def iter_records(self, kind: str, start: float | None = None,
+                     end: float | None = None) -> Iterator[dict[str, Any]]:
+        """Yield records in a time range using the timestamp index."""
+        check_query(kind, ())
+        self.flush()
+        where, params = self._where(start, end)
+        cursor = self._conn.execute(
+            f"SELECT data FROM {kind}{where} ORDER BY timestamp", params
+        )
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def iter_rows(self, kind: str, after_id: int = 0) -> Iterator[tuple[int, dict[str, Any]]]:
+        """Yield ``(row id, record)`` for rows inserted after ``after_id``.
+
+        Rows come in insertion order, so a reader that remembers the last id
+        it saw picks up exactly the rows appended since.
+        """
+        check_query(kind, ())
+        self.flush()
+        cursor = self._conn.execute(f"SELECT id, data FROM {kind} WHERE id > ? ORDER BY id", (after_id,))
+        for row_id, data in cursor:
+            yield row_id, json.loads(data)
+
+    def aggregate(self, kind: str, group_by: tuple[str, ...] = (),
+                  start: float | None = None, end: float | None = None) -> list[dict[str, Any]]:
+        """Aggregate with a GROUP BY query over the time range."""
+        check_query(kind, group_by)
+        self.flush()
+
+        group_exprs = [
+            "date(timestamp, 'unixepoch', 'localtime')" if field == 'day' else field
+            for field in group_by
+        ]
+        selects = group_exprs + [
+            'COUNT(*)',
+            'COALESCE(SUM(duration), 0)',
+            f'COALESCE(SUM({COST_COLUMN[kind]}), 0)',
+        ]
+        if kind == API_USAGE:
+            selects += ['COALESCE(SUM(input_tokens), 0)', 'COALESCE(SUM(output_tokens), 0)']
+
+        where, params = self._where(start, end)
+        query = f"SELECT {', '.join(selects)} FROM {kind}{where}"
+        if group_exprs:
+            query += f" GROUP BY {', '.join(group_exprs)} ORDER BY {', '.join(group_exprs)}"
+
+        names = list(group_by) + ['count', 'total_duration', 'total_cost']
+        if kind == API_USAGE:
+            names += ['input_tokens', 'output_tokens']
+
+        results = []
+        for row in self._conn.execute(query, params):
+            result = dict(zip(names, row, strict=True))
+            if result['count']:
+                for field in ('ai_assisted', 'success'):
+                    if field in result and result[field] is not None:
+                        result[field] = bool(result[field])
+                results.append(result)
+        return results
+
+    def import_jsonl(self, source: JsonlStore) -> dict[str, int]:
+        """Import daily JSONL history, skipping files imported before.
+
+        Returns the number of records imported per kind. A file that has grown
+        since it was last imported (e.g. today's) is picked up from the byte
+        where the previous import stopped.
+        """
+        imported = dict.fromkeys(KINDS, 0)
+        with self._lock:
+            self._flush_locked()
+            for kind in KINDS:
+                for path in source.files(kind):
+                    imported[kind] += self._import_file(kind, path)
+        return imported
+
+    def _import_file(self, kind: str, path: Path) -> int:
+        """Import the part of one JSONL file not imported before.
+
+        Progress is recorded per logical (uncompressed) file, so a log that
+        was imported and later compressed by retention is not imported again.
+        """
+        name = logical_path(path).name
+        row = self._conn.execute(
+            'SELECT size FROM imported_files WHERE name = ?', (name,)
+        ).fetchone()
+        imported_size = row[0] if row else 0
+        if not is_compressed(path) and imported_size >= path.stat().st_size:
+            return 0
+
+        count = 0
+        rows = []
+        with self._conn:
+            for record, offset in iter_jsonl_offsets(path, imported_size):
+                rows.append(self._row(kind, record))
+                if len(rows) >= IMPORT_BATCH_SIZE:
+                    self._insert(kind, rows)
+                    count += len(rows)
+                    rows = []
+                imported_size = offset
+            self._insert(kind, rows)
+            count += len(rows)
+            self._conn.execute(
+                'INSERT OR REPLACE INTO imported_files (name, size) VALUES (?, ?)',
+                (name, imported_size)
+            )
+        return count
@@ -0,0 +1,43 @@
+"""Tests for code anonymization."""
+
+from ai_code_metrics.security import anonymizer
+from ai_code_metrics.security.anonymizer import CodeAnonymizer
+
+
+def test_code_anonymizer_is_consistent_and_keeps_keywords():
+    """Identifiers map to salted replacements; keywords and layout are kept."""
+    code = "def load(path):\n    return open(path).read()  # load it\n"
+    first = CodeAnonymizer(salt='a', max_replacements=2)
+    result = first.anonymize_code_snippet(code)
+
+    assert result.startswith('def var_')
+    assert '\n    return var_' in result
+    assert 'load' not in result and 'path' not in result
+    # The memo is bounded, and evicted mappings come back the same
+    assert first._get_replacement.cache_info().currsize == 2
+    assert first.anonymize_code_snippet(code) == result
+    assert CodeAnonymizer(salt='a').anonymize_code_snippet(code) == result
+    assert CodeAnonymizer(salt='b').anonymize_code_snippet(code) != result
+    assert 'José' not in first.anonymize_code_snippet('José = 1')
+
+
+def test_text_anonymization_replaces_every_word():
+    """Numbers, non-ASCII words and keywords used as words are all replaced."""
+    message = CodeAnonymizer(salt='a').anonymize_text('Fix #1234 in José’s parser')
+
+    for word in ('Fix', '1234', 'in', 'José', 'parser'):
+        assert word not in message
+    assert message.count('var_') == 6 and '#' in message
+
+
+def test_batch_anonymization_across_workers_matches_serial(monkeypatch):
+    """Worker processes produce the same mappings as the calling process."""
+    monkeypatch.setattr(anonymizer, 'PARALLEL_MIN_CHARS', 0)
+    snippets = [f"value_{i} = compute(value_{i - 1}, self.total)" for i in range(50)]
+    code_anonymizer = CodeAnonymizer(salt='shared')
+
+    parallel = code_anonymizer.anonymize_batch(snippets, workers=2)
+
+    assert parallel == [code_anonymizer.anonymize_code_snippet(s) for s in snippets]
+    # value_0 is replaced the same way where it is assigned and where it is used
+    assert parallel[0].split(' = ')[0] in parallel[1]
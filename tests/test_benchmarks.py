@@ -0,0 +1,34 @@
+"""Tests for the benchmark workload generators and baseline comparison."""
+
+import tempfile
+from pathlib import Path
+
+from ai_code_metrics.analyzers.commit_analyzer import CommitAnalyzer
+from ai_code_metrics.storage import API_USAGE, TIMING, JsonlStore
+from benchmarks.__main__ import compare
+from benchmarks.generators import LogSpec, RepoSpec, generate_logs, generate_repo
+
+
+def test_generated_repo_and_logs_match_their_spec():
+    """The repository has the requested commits, AI signatures and giant commits."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        spec = RepoSpec(commits=20, files_per_commit=2, ai_share=0.5, giant_every=10,
+                        giant_files=30, file_pool=50, seed=1)
+        repo = generate_repo(Path(temp_dir) / 'repo', spec)
+        commits = CommitAnalyzer(str(repo)).analyze_commits()
+        assert len(commits) == 20
+        assert 0 < sum(c['ai_assisted'] for c in commits) < 20
+        assert sorted(c['files_changed'] for c in commits)[-2:] == [30, 30]
+
+        counts = generate_logs(Path(temp_dir) / 'metrics',
+                               LogSpec(timing_records=300, api_records=100, days=3))
+        assert counts == {TIMING: 300, API_USAGE: 100}
+        store = JsonlStore(Path(temp_dir) / 'metrics')
+        assert sum(1 for _ in store.iter_records(TIMING)) == 300
+
+
+def test_changes_are_measured_against_the_baseline():
+    """Benchmarks missing from the baseline are not compared."""
+    baseline = {'benchmarks': {'roi': {'wall_s': 2.0}, 'anonymizer': {'wall_s': 1.0}}}
+    results = {'roi': {'wall_s': 2.5}, 'anonymizer': {'wall_s': 0.9}, 'new': {'wall_s': 1.0}}
+    assert compare(results, baseline) == {'roi': 25.0, 'anonymizer': -10.0}
@@ -1,7 +1,16 @@
 """Tests for commit analyzer functionality."""
 
+import tempfile
 import unittest
-from ai_code_metrics.analyzers.commit_analyzer import CommitPatternMatcher
+from pathlib import Path
+
+import git
+
+from ai_code_metrics.analyzers.commit_analyzer import (
+    CommitAnalyzer,
+    CommitCache,
+    CommitPatternMatcher,
+)
 
 
 class TestCommitPatternMatcher(unittest.TestCase):
@@ -65,5 +74,41 @@ class TestCommitPatternMatcher(unittest.TestCase):
         self.assertIsNone(ai_data["ai_assistant"])
 
 
+class TestCommitCache(unittest.TestCase):
+    """Test suite for reusing commit analysis between runs."""
+    
+    def test_cached_commits_are_not_analyzed_again(self):
+        """Only commits missing from the cache are diffed; unused ones are pruned."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = git.Repo.init(Path(temp_dir) / 'repo')
+            author = git.Actor('Dev', 'dev@example.com')
+            for i in range(3):
+                (Path(repo.working_dir) / f'file{i}.py').write_text('x = 1\n' * (i + 1))
+                repo.index.add([f'file{i}.py'])
+                repo.index.commit(f'Add file {i}', author=author, committer=author)
+            
+            analyzer = CommitAnalyzer(repo.working_dir)
+            cache_file = Path(temp_dir) / 'commits.json'
+            cache = CommitCache(cache_file)
+            first = analyzer.analyze_commits(limit=2, cache=cache)
+            cache.save()
+            self.assertEqual([c['lines_added'] for c in first], [3, 2])
+            
+            analyzed = []
+            analyze_commit = analyzer._analyze_commit
+            analyzer._analyze_commit = lambda commit: analyzed.append(commit) or analyze_commit(commit)
+            cache = CommitCache(cache_file)
+            self.assertEqual(analyzer.analyze_commits(limit=2, cache=cache), first)
+            self.assertEqual(analyzed, [])
+            
+            cache = CommitCache(cache_file)
+            analyzer.analyze_commits(cache=cache)
+            self.assertEqual(len(analyzed), 1)
+            cache = CommitCache(cache_file)
+            analyzer.analyze_commits(limit=1, cache=cache)
+            cache.save()
+            self.assertEqual(len(CommitCache(cache_file)._commits), 1)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
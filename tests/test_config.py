@@ -0,0 +1,46 @@
+"""Tests for configuration loading."""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from ai_code_metrics.config import Config
+
+
+def test_config_is_loaded_lazily_without_writing():
+    """Nothing is read or written until a lookup; dotted keys may contain dots."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = Path(temp_dir) / 'config.json'
+        config = Config(config_path)
+        assert config._config is None
+
+        assert config.get('prometheus.port') == 8080
+        assert config.get('models.gpt-3.5-turbo') == {'input': 0.5, 'output': 1.5}
+        assert config.get('prometheus.missing', 'default') == 'default'
+        assert not config_path.exists()
+
+
+def test_config_reloads_on_change_and_notifies():
+    """Edits to the file are picked up and announced to subscribers."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_path = Path(temp_dir) / 'config.json'
+        config_path.write_text(json.dumps({'roi': {'hourly_rate': 100.0}}))
+        config = Config(config_path, reload_interval=0)
+        reloads = []
+        config.subscribe(reloads.append)
+
+        assert config.get('roi.hourly_rate') == 100.0
+        assert config.get('roi.improvement_factor') == 0.3
+        assert not config.refresh()
+
+        config_path.write_text(json.dumps({'roi': {'hourly_rate': 120.0}}))
+        stat = config_path.stat()
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert config.get('roi.hourly_rate') == 120.0
+        assert reloads == [config]
+
+        config.set('roi.hourly_rate', 90.0)
+        assert json.loads(config_path.read_text())['roi']['hourly_rate'] == 90.0
+        assert len(reloads) == 2
+        assert Config.DEFAULT_CONFIG['roi']['hourly_rate'] == 75.0
@@ -0,0 +1,62 @@
+"""Tests for the static HTML dashboard."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from ai_code_metrics.analyzers.dashboard import DashboardBuilder
+from ai_code_metrics.security import CodeAnonymizer
+
+
+def commit(day, author, lines, assistant=None):
+    return {
+        'timestamp': f'{day}T10:00:00+00:00',
+        'author': author,
+        'message': f'Change by {author}\n\nDetails',
+        'lines_added': lines,
+        'ai_assisted': assistant is not None,
+        'ai_assistant': assistant,
+    }
+
+
+def test_only_changed_days_are_rewritten():
+    """Rebuilding writes fragments for changed days and drops days out of the period."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_dir = Path(temp_dir)
+        builder = DashboardBuilder(output_dir)
+        commits = [
+            commit('2025-01-01', 'alice', 10, 'claude_code'),
+            commit('2025-01-01', 'bob', 5),
+            commit('2025-01-02', 'alice', 7),
+        ]
+        assert builder.build(commits, {'repository': 'demo'}) == {
+            'written': 2, 'unchanged': 0, 'removed': 0
+        }
+        assert 'demo' in (output_dir / 'index.html').read_text()
+        day = json.loads((output_dir / 'data' / 'days' / '2025-01-01.json').read_text())
+        assert day['commits'] == 2 and day['ai_lines_added'] == 10
+        assert day['assistants'] == {'claude_code': [1, 1, 10]}
+        assert day['authors'] == {'alice': [1, 1, 10], 'bob': [1, 0, 5]}
+
+        commits = commits[1:] + [commit('2025-01-03', 'bob', 1)]
+        assert builder.build(commits, {'repository': 'demo'}) == {
+            'written': 2, 'unchanged': 1, 'removed': 0
+        }
+        assert builder.build(commits[1:], {'repository': 'demo'}) == {
+            'written': 0, 'unchanged': 2, 'removed': 1
+        }
+        summary = json.loads((output_dir / 'data' / 'summary.json').read_text())
+        assert sorted(summary['days']) == ['2025-01-02', '2025-01-03']
+        assert summary['totals']['commits'] == 2
+        assert summary['recent'][0]['message'] == 'Change by bob'
+
+
+def test_authors_are_anonymized():
+    """Author names never reach the published files when anonymizing."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_dir = Path(temp_dir)
+        DashboardBuilder(output_dir, CodeAnonymizer('salt')).build(
+            [commit('2025-01-01', 'alice', 3)], {'repository': 'demo'}
+        )
+        published = ''.join(path.read_text() for path in (output_dir / 'data').rglob('*.json'))
+        assert 'alice' not in published
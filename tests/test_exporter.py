@@ -0,0 +1,665 @@
+"""Tests for the Prometheus exporter."""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from ai_code_metrics.exporters.prometheus_exporter import MetricsExporter, ai_requests_total
+from ai_code_metrics.exporters.tailer import LogTailer
+
+
+def _requests(operation):
+    return ai_requests_total.labels(model='unknown', language='unknown', operation=operation)._value.get()
+
+
+def test_partial_trailing_line_is_read_once_complete():
+    """A line still being written is left for the next poll instead of crashing."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        log = temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl'
+        line = json.dumps({'function_name': 'partial', 'duration': 1.0, 'timestamp': time.time()})
+        log.write_text(line + '\n' + line[:10])
+
+        exporter = MetricsExporter(temp_path)
+        before = _requests('partial')
+        exporter.update_metrics()
+        assert _requests('partial') == before + 1
+
+        with open(log, 'a') as f:
+            f.write(line[10:] + '\n' + '{not json}\n')
+        exporter.update_metrics()
+        assert _requests('partial') == before + 2
+
+
+def test_tailer_ingests_in_background():
+    """The tailer picks up new lines without a scrape."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        log = temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl'
+        before = _requests('tailed')
+
+        tailer = LogTailer(MetricsExporter(temp_path), poll_interval=0.01)
+        tailer.start()
+        try:
+            log.write_text(json.dumps({'function_name': 'tailed', 'duration': 1.0,
+                                       'timestamp': time.time()}) + '\n')
+            deadline = time.time() + 5
+            while _requests('tailed') == before and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            tailer.stop()
+
+        assert _requests('tailed') == before + 1
+
+
+def test_concurrent_updates_count_each_line_once():
+    """Racing ingestions are serialized and the exposition is cached between them."""
+    import gzip
+    import threading
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        log = temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl'
+        line = json.dumps({'function_name': 'racy', 'duration': 1.0, 'timestamp': time.time()})
+        log.write_text((line + '\n') * 200)
+
+        exporter = MetricsExporter(temp_path)
+        before = _requests('racy')
+        threads = [threading.Thread(target=exporter.update_metrics) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert _requests('racy') == before + 200
+
+        generation = exporter.generation
+        body = exporter.exposition()
+        assert exporter.update_metrics() == 0
+        assert exporter.generation == generation
+        assert exporter.exposition() is body
+        assert gzip.decompress(exporter.exposition(compress=True)) == body
+
+
+def test_checkpoint_resumes_offsets_after_restart():
+    """A restarted exporter resumes at the checkpointed offsets instead of re-reading."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        log = temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl'
+        line = json.dumps({'function_name': 'restart', 'duration': 1.0, 'timestamp': time.time()})
+        log.write_text((line + '\n') * 3)
+
+        first = MetricsExporter(temp_path)
+        assert first.update_metrics() == 3
+        first.save_checkpoint()
+
+        with open(log, 'a') as f:
+            f.write(line + '\n')
+        assert MetricsExporter(temp_path).update_metrics() == 1
+
+        # A log replaced by a different file is read from the start
+        replacement = temp_path / 'replacement'
+        replacement.write_text((line + '\n') * 5)
+        replacement.replace(log)
+        assert MetricsExporter(temp_path).update_metrics() == 5
+
+
+def test_backfill_skips_old_compressed_logs():
+    """Compressed logs and records from before the backfill point are not ingested."""
+    import gzip
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        now = time.time()
+
+        def record(age_days):
+            return json.dumps({'function_name': 'backfill', 'duration': 1.0,
+                               'timestamp': now - age_days * 86400}) + '\n'
+
+        for age_days in (10, 5):
+            day = time.strftime('%Y-%m-%d', time.localtime(now - age_days * 86400))
+            with gzip.open(temp_path / f'timing_{day}.jsonl.gz', 'wt') as f:
+                f.write(record(age_days))
+        yesterday = time.strftime('%Y-%m-%d', time.localtime(now - 86400))
+        with gzip.open(temp_path / f'timing_{yesterday}.jsonl.gz', 'wt') as f:
+            f.write(record(3) + record(0.5))
+        (temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl').write_text(record(0))
+
+        assert MetricsExporter(temp_path, backfill_days=1).update_metrics() == 2
+
+
+def test_sqlite_backend_rows_are_ingested(monkeypatch):
+    """Rows collectors add to SQLite are ingested once; migrated log history is not recounted."""
+    from ai_code_metrics.config import Config
+    from ai_code_metrics.exporters import prometheus_exporter
+    from ai_code_metrics.storage import TIMING, JsonlStore, SQLiteStore
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        exporter_config = Config(temp_path / 'config.json')
+        exporter_config.set('storage.backend', 'sqlite')
+        monkeypatch.setattr(prometheus_exporter, 'config', exporter_config)
+
+        now = time.time()
+        JsonlStore(temp_path).append(TIMING, {'function_name': 'stored', 'duration': 1.0,
+                                              'timestamp': now - 10})
+        with SQLiteStore(temp_path / 'metrics.db') as store:
+            assert store.import_jsonl(JsonlStore(temp_path)) == {TIMING: 1, 'api_usage': 0}
+            for age in (2, 1):
+                store.append(TIMING, {'function_name': 'stored', 'duration': 1.0, 'timestamp': now - age})
+
+        exporter = MetricsExporter(temp_path)
+        assert exporter.update_metrics() == 3
+        exporter.save_checkpoint()
+
+        with SQLiteStore(temp_path / 'metrics.db') as store:
+            store.append(TIMING, {'function_name': 'stored', 'duration': 1.0, 'timestamp': time.time()})
+        assert MetricsExporter(temp_path).update_metrics() == 1
+
+
+def test_metric_snapshot_round_trip():
+    """Counters and histograms restored from a snapshot match the originals."""
+    from prometheus_client import CollectorRegistry, Counter, Histogram
+
+    from ai_code_metrics.exporters.checkpoint import restore_metrics, snapshot_metrics
+
+    def make_metrics():
+        registry = CollectorRegistry()
+        return (
+            Counter('calls_total', 'Calls', ['op'], registry=registry),
+            Histogram('latency_seconds', 'Latency', ['op'], buckets=[1.0, 5.0], registry=registry),
+        )
+
+    calls, latency = make_metrics()
+    calls.labels(op='a').inc(3)
+    for value in (0.5, 2.0, 9.0):
+        latency.labels(op='a').observe(value)
+    snapshot = json.loads(json.dumps(snapshot_metrics((calls, latency))))
+
+    restored = make_metrics()
+    restore_metrics(restored, snapshot)
+    assert snapshot_metrics(restored) == snapshot
+    assert restored[1].labels(op='a')._sum.get() == 11.5
+
+
+def test_api_usage_and_git_history_are_ingested():
+    """API costs get real model/provider labels; new commits count generated lines."""
+    import git
+
+    from ai_code_metrics.exporters.prometheus_exporter import api_cost_total, lines_generated
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        (temp_path / f'api_usage_{time.strftime("%Y-%m-%d")}.jsonl').write_text(json.dumps({
+            'model': 'ingest-test-model', 'provider': 'openai', 'function': 'ask',
+            'total_cost': 0.25, 'duration': 1.0, 'timestamp': time.time(),
+        }) + '\n')
+
+        repo_path = temp_path / 'repo'
+        repo = git.Repo.init(repo_path)
+        with repo.config_writer() as writer:
+            writer.set_value('user', 'name', 'Test')
+            writer.set_value('user', 'email', 'test@example.com')
+
+        def commit(name, lines, message):
+            (repo_path / name).write_text('x\n' * lines)
+            repo.index.add([name])
+            repo.index.commit(message)
+
+        commit('first.rs', 3, 'feat: first')
+
+        exporter = MetricsExporter(temp_path)
+        exporter.git_repos = [str(repo_path)]
+        exporter.git_interval = 0
+        generated = lines_generated.labels(language='rust', ai_assisted='true')
+        before = generated._value.get()
+
+        assert exporter.update_metrics() == 2
+        cost = api_cost_total.labels(model='ingest-test-model', provider='openai')
+        assert cost._value.get() == 0.25
+
+        commit('second.rs', 4, 'feat: second\n\nAI-assisted')
+        ingester = exporter._git_ingesters[str(repo_path)]
+        new_commits = ingester.new_commits
+
+        def walk_unlocked(last_sha, last_authored=None):
+            # Scrapes are not blocked while the repository is walked
+            assert not exporter._lock.locked()
+            return new_commits(last_sha, last_authored)
+
+        ingester.new_commits = walk_unlocked
+        assert exporter.update_metrics() == 1
+        assert generated._value.get() == before + 4
+
+
+def test_rewritten_git_history_is_not_counted_twice():
+    """Commits ingested before a rebase are skipped when the walk falls back to dates."""
+    import git
+
+    from ai_code_metrics.exporters.prometheus_exporter import lines_generated
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        repo_path = temp_path / 'repo'
+        repo = git.Repo.init(repo_path)
+        with repo.config_writer() as writer:
+            writer.set_value('user', 'name', 'Test')
+            writer.set_value('user', 'email', 'test@example.com')
+
+        def commit(name, lines, hours_ago):
+            (repo_path / name).write_text('x\n' * lines)
+            repo.index.add([name])
+            authored = time.strftime('%Y-%m-%dT%H:%M:%S',
+                                     time.localtime(time.time() - hours_ago * 3600))
+            repo.index.commit(f'feat: {name}\n\nAI-assisted', author_date=authored)
+
+        commit('rewrite_a.kt', 2, 3)
+        commit('rewrite_b.kt', 5, 2)
+
+        exporter = MetricsExporter(temp_path)
+        exporter.git_repos = [str(repo_path)]
+        exporter.git_interval = 0
+        generated = lines_generated.labels(language='kotlin', ai_assisted='true')
+        before = generated._value.get()
+        assert exporter.update_metrics() == 2
+        assert generated._value.get() == before + 7
+
+        # Reword the last commit and drop the old one so the previous HEAD is gone
+        repo.git.commit('--amend', '-m', 'feat: rewrite_b.kt reworded\n\nAI-assisted')
+        repo.git.reflog('expire', '--expire=now', '--all')
+        repo.git.gc('--prune=now')
+        commit('rewrite_c.kt', 4, 1)
+
+        assert exporter.update_metrics() == 1
+        assert generated._value.get() == before + 11
+
+
+def test_label_limiter_folds_and_evicts():
+    """Values past the limit go to 'other' until one outgrows an admitted value."""
+    from ai_code_metrics.exporters.cardinality import OTHER, LabelLimiter
+
+    evicted = []
+    limiter = LabelLimiter(max_values=2, allowlist=['vip'], on_evict=evicted.append)
+    assert [limiter.value(v) for v in ('a', 'b', 'c', 'vip')] == ['a', 'b', OTHER, 'vip']
+    for _ in range(5):
+        limiter.value('a')
+
+    results = [limiter.value('hot') for _ in range(4)]
+    assert results[0] == OTHER and results[-1] == 'hot'
+    assert evicted == ['b']
+    assert set(limiter.admitted) == {'a', 'hot'}
+
+
+def test_exporter_bounds_operation_labels():
+    """Generated function names cannot create unbounded series."""
+    from ai_code_metrics.exporters.cardinality import LabelLimiter
+    from ai_code_metrics.exporters.prometheus_exporter import label_overflow_total
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        with open(temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl', 'w') as f:
+            for i in range(50):
+                f.write(json.dumps({'function_name': f'closure_{i}', 'duration': 1.0,
+                                    'timestamp': time.time()}) + '\n')
+
+        exporter = MetricsExporter(temp_path)
+        overflow = label_overflow_total.labels(metric='ai_coding_requests', label='operation')
+        before = overflow._value.get()
+        exporter.label_limiters[('ai_coding_requests', 'operation')] = LabelLimiter(max_values=10)
+        exporter.update_metrics()
+
+        assert overflow._value.get() == before + 40
+        assert b'ai_coding_exporter_series{metric="ai_coding_requests"}' in exporter.exposition()
+
+
+def test_sketch_quantiles_within_relative_accuracy():
+    """Quantiles stay within the relative error from microseconds to minutes."""
+    import random
+
+    from ai_code_metrics.exporters.sketch import DDSketch, WindowedSketch, suggest_buckets
+
+    rng = random.Random(1)
+    values = [10 ** rng.uniform(-6, 2.5) for _ in range(20000)]
+    halves = DDSketch(0.01), DDSketch(0.01)
+    for i, value in enumerate(values):
+        halves[i % 2].add(value)
+    sketch = halves[0]
+    sketch.merge(halves[1])
+
+    ordered = sorted(values)
+    for q in (0.01, 0.5, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    assert len(suggest_buckets(sketch)) >= 8
+
+    windowed = WindowedSketch(window_seconds=60, slots=6)
+    windowed.add(100.0, timestamp=1000.0, now=1000.0)
+    windowed.add(1.0, timestamp=1055.0, now=1055.0)
+    assert windowed.merged(now=1055.0).count == 2
+    assert windowed.merged(now=1065.0).quantile(0.5) == 1.0
+
+
+def test_exporter_exposes_response_time_quantiles():
+    """Quantile gauges are published per model, operation and window."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        with open(temp_path / f'api_usage_{time.strftime("%Y-%m-%d")}.jsonl', 'w') as f:
+            for duration in (20.0, 40.0, 90.0):
+                f.write(json.dumps({'model': 'quantile-model', 'function': 'slow', 'total_cost': 0.0,
+                                    'duration': duration, 'timestamp': time.time()}) + '\n')
+
+        exporter = MetricsExporter(temp_path)
+        exporter.update_metrics()
+
+        body = exporter.exposition().decode()
+        assert ('ai_coding_response_time_quantile_seconds{model="quantile-model",'
+                'operation="slow",quantile="0.5",window="300s"} 40.') in body
+        assert exporter.suggested_buckets()['quantile-model'] == [20.0, 40.0]
+
+
+def test_pipeline_self_metrics():
+    """Bytes, lines, parse errors and per-file lag are reported by the exporter."""
+    from ai_code_metrics.exporters.prometheus_exporter import (
+        exporter_bytes_read_total,
+        exporter_parse_errors_total,
+    )
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        log = temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl'
+        content = json.dumps({'function_name': 'lagging', 'duration': 1.0,
+                              'timestamp': time.time() - 30}) + '\n{broken\n'
+        log.write_text(content)
+
+        errors = exporter_parse_errors_total.labels(kind='timing')
+        bytes_read = exporter_bytes_read_total.labels(kind='timing')
+        errors_before, bytes_before = errors._value.get(), bytes_read._value.get()
+
+        exporter = MetricsExporter(temp_path)
+        exporter.update_metrics()
+        exporter.update_metrics()
+
+        assert errors._value.get() == errors_before + 1
+        assert bytes_read._value.get() == bytes_before + len(content)
+        body = exporter.exposition().decode()
+        lag_line = next(line for line in body.splitlines()
+                        if line.startswith('ai_coding_exporter_ingest_lag_seconds') and log.name in line)
+        assert float(lag_line.split()[-1]) >= 30
+        assert 'process_resident_memory_bytes' in body
+
+
+def test_server_keeps_connections_alive():
+    """The threaded server answers several requests on one connection."""
+    import threading
+    from http.client import HTTPConnection
+
+    from ai_code_metrics.exporters.server import ExporterServer
+
+    def app(environ, start_response):
+        body = f"{environ['REQUEST_METHOD']} {environ['PATH_INFO']} {environ['wsgi.input'].read()!r}"
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [body.encode()]
+
+    server = ExporterServer(app, '127.0.0.1', 0, max_body_bytes=64)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        connection.request('GET', '/metrics')
+        first = connection.getresponse()
+        assert first.read() == b"GET /metrics b''"
+        socket = connection.sock
+
+        connection.request('POST', '/ingest', body=b'data')
+        assert connection.getresponse().read() == b"POST /ingest b'data'"
+        assert connection.sock is socket
+
+        # An oversized body is refused unread and the connection closed
+        connection.request('POST', '/ingest', body=b'x' * 65)
+        refused = connection.getresponse()
+        assert refused.status == 413 and refused.getheader('Connection') == 'close'
+        connection.close()
+
+        # A chunked body is refused rather than read as empty and left on the socket
+        connection = HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+        connection.request('POST', '/ingest', body=iter([b'data']), encode_chunked=True)
+        refused = connection.getresponse()
+        assert refused.status == 411 and refused.getheader('Connection') == 'close'
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_backfill_writes_openmetrics_blocks():
+    """History is replayed into one time-ordered OpenMetrics file per block."""
+    from ai_code_metrics.exporters.backfill import OpenMetricsBackfill
+    from ai_code_metrics.storage import API_USAGE, TIMING, JsonlStore
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        store = JsonlStore(temp_path / 'logs')
+        base = 1_700_000_000 - 1_700_000_000 % 3600
+        # Two hours of records, some written a little out of order
+        for i in range(240):
+            timestamp = base + 15 + i * 30 - (7 if i % 5 == 0 else 0)
+            store.append(TIMING, {'function_name': 'f', 'duration': 0.3, 'timestamp': timestamp})
+            store.append(API_USAGE, {'model': 'gpt-4', 'provider': 'openai', 'total_cost': 0.5,
+                                     'duration': 2.0, 'timestamp': timestamp})
+
+        backfill = OpenMetricsBackfill(temp_path / 'out', block_seconds=3600, step_seconds=60,
+                                       extra_labels={'instance': 'backfill'})
+        files = backfill.run(store.files(TIMING), store.files(API_USAGE))
+        assert [path.name for path in files] == [f'block_{base}.om', f'block_{base + 3600}.om']
+
+        series: dict[str, list[tuple[float, float]]] = {}
+        for path in files:
+            text = path.read_text()
+            assert text.endswith('# EOF\n')
+            assert text.count('# TYPE ') == 3
+            for line in text.splitlines():
+                if line.startswith('#'):
+                    continue
+                name, value, timestamp = line.rsplit(' ', 2)
+                assert 'instance="backfill"' in name
+                series.setdefault(name, []).append((float(timestamp), float(value)))
+
+        requests_total = next(s for name, s in series.items() if name.startswith('ai_coding_requests_total'))
+        # One sample per step, never going back in time or down in value
+        assert len(requests_total) == 120
+        assert requests_total == sorted(requests_total)
+        assert requests_total[-1][1] == 240
+        cost = next(s for name, s in series.items() if name.startswith('ai_coding_api_cost_dollars_total'))
+        assert cost[-1][1] == 120.0
+
+
+def test_remote_store_ingests_through_exporter(monkeypatch):
+    """Batches posted by a remote collector are stored and counted once."""
+    import threading
+    import urllib.error
+    import urllib.request
+
+    from ai_code_metrics.collectors import MetricsCollector
+    from ai_code_metrics.config import Config
+    from ai_code_metrics.exporters import prometheus_exporter
+    from ai_code_metrics.exporters.server import ExporterServer
+    from ai_code_metrics.storage import (
+        API_USAGE,
+        TIMING,
+        JsonlStore,
+        RemoteStore,
+        UnsupportedOperationError,
+    )
+    from ai_code_metrics.storage.remote import encode_batch
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        settings = Config(temp_path / 'config.json')
+        monkeypatch.setattr(prometheus_exporter, 'config', settings)
+        monkeypatch.setattr(prometheus_exporter, 'exporter', MetricsExporter(temp_path))
+        server = ExporterServer(prometheus_exporter.app, '127.0.0.1', 0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+        try:
+            # Without a token batches are refused unless explicitly allowed
+            anonymous = RemoteStore(url, max_retries=1, flush_interval=3600)
+            anonymous.append(TIMING, {'function_name': 'anonymous', 'timestamp': time.time()})
+            anonymous.close()
+            assert anonymous.sent == 0
+
+            settings.set('prometheus.ingest.token', 'secret')
+            before = _requests('remote_task')
+            store = RemoteStore(url, batch_size=10, flush_interval=3600, token='secret')
+            collector = MetricsCollector(store=store)
+
+            @collector.track_function()
+            def remote_task():
+                return None
+
+            for _ in range(25):
+                remote_task()
+            store.append(API_USAGE, {'model': 'gpt-4', 'total_cost': 0.1, 'timestamp': time.time()})
+            store.close()
+            assert (store.sent, store.dropped) == (26, 0)
+            assert not store.readable
+            try:
+                store.iter_records(TIMING)
+                raise AssertionError('a write-only store was queried')
+            except UnsupportedOperationError:
+                pass
+            assert _requests('remote_task') == before + 25
+            logs = JsonlStore(temp_path)
+            assert len(list(logs.iter_records(TIMING))) == 25
+
+            # A retried batch is acknowledged without being stored again
+            body = encode_batch([(TIMING, {'function_name': 'remote_task', 'timestamp': time.time()})])
+            headers = {'Content-Encoding': 'gzip', 'Idempotency-Key': 'retry-me',
+                       'Authorization': 'Bearer secret'}
+            for duplicate in (False, True):
+                request = urllib.request.Request(f'{url}/ingest', data=body, headers=headers)
+                with urllib.request.urlopen(request) as response:
+                    assert json.loads(response.read())['duplicate'] is duplicate
+            assert _requests('remote_task') == before + 26
+
+            request = urllib.request.Request(f'{url}/ingest', data=b'{"kind": "other"}\n',
+                                             headers={'Authorization': 'Bearer secret'})
+            try:
+                urllib.request.urlopen(request)
+                raise AssertionError('invalid batch was accepted')
+            except urllib.error.HTTPError as e:
+                assert e.code == 400
+
+            # Undeliverable batches stay queued with their key for a later flush
+            unreachable = RemoteStore('http://127.0.0.1:9', max_retries=1, backoff=0.01,
+                                      flush_interval=3600)
+            unreachable.append(TIMING, {'function_name': 'lost', 'timestamp': time.time()})
+            unreachable.flush()
+            assert unreachable.sent == 0 and len(unreachable._batches) == 1
+            unreachable.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def test_direct_emission_is_summed_at_scrape_time(monkeypatch):
+    """Events counted in collecting processes show up without log ingestion."""
+    from ai_code_metrics.collectors import MetricsCollector
+    from ai_code_metrics.exporters.multiprocess import EMITTED_FIELD, PrometheusSink
+    from ai_code_metrics.storage import TIMING, JsonlStore
+
+    def scraped(exporter):
+        for line in exporter.exposition().decode().splitlines():
+            if line.startswith('ai_coding_requests_total{') and 'operation="direct_task"' in line:
+                return float(line.rsplit(' ', 1)[1])
+        return 0.0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+        collector = MetricsCollector(temp_path / 'logs', sink=PrometheusSink(temp_path / 'multiproc'))
+        # The sink writes to its own directory without changing the environment
+        assert 'PROMETHEUS_MULTIPROC_DIR' not in os.environ
+        monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(temp_path / 'multiproc'))
+
+        @collector.track_function()
+        def direct_task():
+            return None
+
+        for _ in range(3):
+            direct_task()
+        exporter = MetricsExporter(temp_path / 'logs')
+        assert scraped(exporter) == 3
+
+        # The audit log is read for the quantile sketches but not counted again
+        exporter.update_metrics()
+        assert scraped(exporter) == 3
+        assert ('unknown', 'direct_task') in exporter.response_time_sketches
+
+        direct_task()
+        assert scraped(exporter) == 4
+
+        # Records logged without a sink are still counted by the exporter
+        JsonlStore(temp_path / 'logs').append(TIMING, {'function_name': 'direct_task', 'timestamp': time.time()})
+        exporter.update_metrics()
+        assert scraped(exporter) == 5
+
+        # Another host's sink does not write to this exporter's multiprocess files
+        exporter.ingest([(TIMING, {'function_name': 'direct_task', 'timestamp': time.time(),
+                                   EMITTED_FIELD: True})])
+        assert scraped(exporter) == 6
+
+
+def test_tenants_are_served_from_one_exporter(monkeypatch):
+    """Each tenant's metrics carry its label and stay within its own budget."""
+    from ai_code_metrics.config import Config
+    from ai_code_metrics.exporters import prometheus_exporter
+    from ai_code_metrics.exporters.tenants import merge_expositions
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        exporter_config = Config(temp_path / 'config.json')
+        monkeypatch.setattr(prometheus_exporter, 'config', exporter_config)
+        tenants = {}
+        for name, operations in (('team-a', 1), ('team-b', 6)):
+            root = temp_path / name
+            root.mkdir()
+            log = root / f'timing_{time.strftime("%Y-%m-%d")}.jsonl'
+            log.write_text(''.join(
+                json.dumps({'function_name': f'op{i}', 'duration': 0.1, 'timestamp': time.time()}) + '\n'
+                for i in range(operations)
+            ))
+            settings = {'max_series': 6, 'quantiles': {'windows': []}}
+            tenants[name] = MetricsExporter(root, tenant=name, settings=settings)
+        monkeypatch.setattr(prometheus_exporter, 'tenants', tenants)
+        monkeypatch.setattr(prometheus_exporter, 'tailers', {})
+        for shard in tenants.values():
+            shard.update_metrics()
+
+        client = prometheus_exporter.app.test_client()
+        try:
+            body = client.get('/metrics').data.decode()
+        finally:
+            prometheus_exporter.stop_tailer()
+        assert body.count('# TYPE ai_coding_requests_total counter') == 1
+        assert 'model="unknown",operation="op0",tenant="team-a"} 1.0' in body
+        # team-b's budget of six series holds three operations of two metrics
+        b_series = [line for line in body.splitlines()
+                    if line.startswith('ai_coding_requests_total{') and 'tenant="team-b"' in line]
+        assert len(b_series) == 4
+        assert 'operation="other",tenant="team-b"} 3.0' in body
+        assert 'process_cpu_seconds_total' in body
+
+        assert client.get('/metrics/team-c').status_code == 404
+        assert client.post('/ingest', data=b'').status_code == 403
+        exporter_config.set('prometheus.ingest.allow_unauthenticated', True)
+        assert client.post('/ingest', data=b'').status_code == 400
+        assert b'tenant="team-a"' in client.get('/metrics/team-a').data
+        assert merge_expositions([b'# HELP x X\n# TYPE x gauge\nx{tenant="a"} 1.0\n',
+                                  b'# HELP x X\n# TYPE x gauge\nx{tenant="b"} 2.0\n']) == (
+            b'# HELP x X\n# TYPE x gauge\nx{tenant="a"} 1.0\nx{tenant="b"} 2.0\n'
+        )
+        # Only whole lines starting with "# HELP" begin a family
+        tricky = b'# HELP x X\n# TYPE x gauge\nx{path="a # HELP y"} 1.0\n'
+        assert merge_expositions([tricky, tricky]) == (
+            b'# HELP x X\n# TYPE x gauge\nx{path="a # HELP y"} 1.0\nx{path="a # HELP y"} 1.0\n'
+        )
@@ -0,0 +1,42 @@
+"""Tests for stage timing."""
+
+import json
+import tempfile
+from pathlib import Path
+
+from ai_code_metrics.analyzers.report import CommitReport
+from ai_code_metrics.profiling import stage, stage_report, timed_iter, timing
+
+
+def test_stages_are_timed_only_while_a_timer_is_active():
+    """Without a timer stages are no-ops; with one, calls and items add up."""
+    with stage('idle') as idle:
+        idle.items = 5
+    assert stage_report() is None
+    assert list(timed_iter('walk', range(3))) == [0, 1, 2]
+
+    with timing() as timer:
+        assert list(timed_iter('walk', range(3))) == [0, 1, 2]
+        for _ in range(2):
+            with stage('match', items=10) as matching:
+                matching.items += 5
+    report = timer.report()
+    assert stage_report() is None
+    assert list(report) == ['walk', 'match']
+    assert report['walk']['calls'] == 4 and report['walk']['items'] == 3
+    assert report['match']['calls'] == 2 and report['match']['items'] == 30
+    assert report['match']['wall_s'] >= 0 and report['match']['cpu_s'] >= 0
+
+
+def test_report_totals_include_stages_when_timed():
+    """The analyze report ends with the time spent per stage."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'report.json'
+        with timing(), CommitReport(path, {'repository': 'demo'}) as report:
+            report.write({'commit_hash': 'abc', 'lines_added': 3})
+        stages = json.loads(path.read_text())['stages']
+        assert stages['json_write']['items'] == 1
+
+        with CommitReport(path, {'repository': 'demo'}) as report:
+            report.write({'commit_hash': 'abc', 'lines_added': 3})
+        assert 'stages' not in json.loads(path.read_text())
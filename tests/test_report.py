@@ -0,0 +1,56 @@
+"""Tests for analysis reports and the commit records written to them."""
+
+import json
+import tempfile
+from pathlib import Path
+
+import git
+
+from ai_code_metrics.analyzers import GitMetricsAnalyzer
+from ai_code_metrics.analyzers.report import CommitReport
+from ai_code_metrics.security import CodeAnonymizer
+
+
+def test_commit_records_leave_out_personal_details():
+    """Analyzed commits carry the author name but no email, message or paths."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        repo = git.Repo.init(temp_dir)
+        with repo.config_writer() as writer:
+            writer.set_value('user', 'name', 'Jane Doe')
+            writer.set_value('user', 'email', 'jane@example.com')
+        (Path(temp_dir) / 'dates.py').write_text('x = 1\n')
+        repo.index.add(['dates.py'])
+        repo.index.commit('fix: parse dates #12')
+
+        [record] = GitMetricsAnalyzer(temp_dir).analyze_recent_commits()
+        assert record['author'] == 'Jane Doe' and record['lines_added'] == 1
+        assert not {'author_email', 'message', 'files'} & set(record)
+
+
+def test_commit_report_streams_anonymized_records():
+    """Commits are on disk as soon as they are written, with identities hidden."""
+    commit = {'commit_hash': 'abc', 'author': 'Jane Doe', 'author_email': 'jane@example.com',
+              'message': 'fix: parse dates #12', 'files': ['src/app/dates.py'],
+              'lines_added': 10, 'lines_deleted': 2, 'ai_generated_lines': 4}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for report_format in ('json', 'ndjson'):
+            path = Path(temp_dir) / f'report.{report_format}'
+            with CommitReport(path, {'repository': '.', 'days_analyzed': 7}, report_format,
+                              CodeAnonymizer(salt='s')) as report:
+                report.write(commit)
+                assert 'abc' in path.read_text()
+                report.write({**commit, 'ai_generated_lines': 0})
+
+            text = path.read_text()
+            for secret in ('Jane', 'jane@example.com', 'parse', 'dates'):
+                assert secret not in text
+            if report_format == 'json':
+                data = json.loads(text)
+                commits = data['commit_data']
+            else:
+                lines = [json.loads(line) for line in text.splitlines()]
+                data, commits = lines[-1], lines[1:-1]
+            totals = (data['total_commits'], data['ai_assisted_commits'], data['ai_generated_lines'])
+            assert totals == (2, 1, 4)
+            assert commits[0]['author'] == commits[1]['author'] != 'Jane Doe'
+            assert commits[0]['files'][0].count('/') == 2
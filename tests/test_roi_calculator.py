@@ -0,0 +1,180 @@
+"""Tests for ROI calculation and timing/API log correlation."""
+
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from ai_code_metrics.analyzers import ROICalculator
+from ai_code_metrics.analyzers.log_join import join_timing_with_api
+from ai_code_metrics.storage.jsonl import iter_sorted_records
+
+
+def _write_jsonl(path, records):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def test_sorted_records_across_files():
+    """Records are merged in timestamp order, tolerating small reordering."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        _write_jsonl(temp_path / 'timing_2024-01-02.jsonl', [{'timestamp': 30}, {'timestamp': 29}])
+        _write_jsonl(temp_path / 'timing_2024-01-01.jsonl', [{'timestamp': 10}, {'timestamp': 20}])
+
+        records = list(iter_sorted_records(temp_path.glob('timing_*.jsonl'), start=15))
+
+        assert [r['timestamp'] for r in records] == [20, 29, 30]
+
+
+def test_join_by_containment_prefers_innermost():
+    """API calls are attributed to the innermost timing record containing them."""
+    timing = [
+        {'function_name': 'inner', 'timestamp': 105.0, 'duration': 4.0},
+        {'function_name': 'outer', 'timestamp': 110.0, 'duration': 20.0},
+    ]
+    api = [
+        {'timestamp': 95.0, 'duration': 1.0, 'total_cost': 0.5},
+        {'timestamp': 104.0, 'duration': 1.0, 'total_cost': 1.0},
+        {'timestamp': 108.0, 'duration': 1.0, 'total_cost': 2.0},
+        {'timestamp': 200.0, 'duration': 1.0, 'total_cost': 4.0},
+    ]
+    unmatched = []
+
+    joined = list(join_timing_with_api(timing, api, on_unmatched=unmatched.append))
+
+    assert [j.api_cost for j in joined] == [1.0, 2.5]
+    assert [r['total_cost'] for r in unmatched] == [4.0]
+
+
+def test_join_by_span_id():
+    """Span IDs take precedence over time containment."""
+    timing = [
+        {'span_id': 'a', 'timestamp': 105.0, 'duration': 10.0},
+        {'span_id': 'b', 'timestamp': 106.0, 'duration': 10.0},
+    ]
+    api = [{'span_id': 'b', 'timestamp': 100.0, 'duration': 1.0, 'total_cost': 1.0}]
+
+    joined = list(join_timing_with_api(timing, api))
+
+    assert [j.api_cost for j in joined] == [0, 1.0]
+
+    # A claimed call expiring after its span reappeared is already released
+    timing = [
+        {'span_id': 'a', 'timestamp': 105.0, 'duration': 10.0},
+        {'span_id': 'z', 'timestamp': 5000.0, 'duration': 1.0},
+    ]
+    api = [
+        {'span_id': 'a', 'timestamp': 100.0, 'duration': 1.0, 'total_cost': 1.0},
+        {'span_id': 'a', 'timestamp': 110.0, 'duration': 1.0, 'total_cost': 2.0},
+        {'span_id': 'a', 'timestamp': 110.0, 'duration': 1.0, 'total_cost': 2.0},
+    ]
+    unmatched = []
+
+    joined = list(join_timing_with_api(timing, api, on_unmatched=unmatched.append))
+
+    assert [j.api_cost for j in joined] == [1.0, 0]
+    assert [r['total_cost'] for r in unmatched] == [2.0, 2.0]
+
+
+def test_join_mixed_legacy_and_span_logs():
+    """Legacy timing records take span-tagged calls whose span never appears."""
+    timing = [
+        {'span_id': 'a', 'timestamp': 105.0, 'duration': 10.0},
+        {'timestamp': 120.0, 'duration': 30.0},
+        {'span_id': 'c', 'timestamp': 130.0, 'duration': 5.0},
+    ]
+    api = [
+        {'span_id': 'a', 'timestamp': 100.0, 'duration': 1.0, 'total_cost': 1.0},
+        {'span_id': 'b', 'timestamp': 110.0, 'duration': 1.0, 'total_cost': 2.0},
+        {'timestamp': 115.0, 'duration': 1.0, 'total_cost': 4.0},
+        {'span_id': 'b', 'timestamp': 128.0, 'duration': 1.0, 'total_cost': 8.0},
+    ]
+    unmatched = []
+
+    joined = list(join_timing_with_api(timing, api, on_unmatched=unmatched.append))
+
+    # Span-tagged timing records still only take their own span's calls
+    assert [j.api_cost for j in joined] == [1.0, 6.0, 0]
+    assert [r['total_cost'] for r in unmatched] == [8.0]
+
+
+def test_roi_includes_api_usage_costs():
+    """API usage logs contribute to the total cost used for ROI."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        now = time.time()
+        _write_jsonl(temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl', [
+            {'function_name': 'f', 'ai_assisted': True, 'duration': 7 * 3600.0,
+             'timestamp': now - 60, 'span_id': 'x'},
+        ])
+        _write_jsonl(temp_path / f'api_usage_{time.strftime("%Y-%m-%d")}.jsonl', [
+            {'model': 'claude-3-haiku', 'total_cost': 10.0, 'duration': 1.0,
+             'timestamp': now - 120, 'span_id': 'x'},
+            {'model': 'claude-3-haiku', 'total_cost': 5.0, 'duration': 1.0, 'timestamp': now - 30},
+        ])
+
+        calculator = ROICalculator(hourly_rate=10.0)
+        roi = calculator.calculate_roi(
+            list(temp_path.glob('timing_*.jsonl')),
+            api_usage_files=list(temp_path.glob('api_usage_*.jsonl'))
+        )
+
+        assert roi['total_hours_saved'] == 3.0
+        assert roi['total_api_cost'] == 15.0
+        assert roi['attributed_api_cost'] == 10.0
+        assert roi['api_calls_analyzed'] == 2
+        assert roi['unattributed_api_calls'] == 1
+        assert roi['net_savings'] == 15.0
+
+
+def test_improvement_factor_is_configurable():
+    """Time saved follows the improvement factor instead of a fixed 30%."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        _write_jsonl(temp_path / f'timing_{time.strftime("%Y-%m-%d")}.jsonl', [
+            {'function_name': 'f', 'ai_assisted': True, 'duration': 3600.0, 'timestamp': time.time()},
+        ])
+
+        roi = ROICalculator(hourly_rate=10.0, improvement_factor=0.5).calculate_roi(
+            list(temp_path.glob('timing_*.jsonl'))
+        )
+
+        assert roi['total_hours_saved'] == 1.0
+
+    for factor in (1.0, 1.5, -0.1):
+        try:
+            ROICalculator(improvement_factor=factor)
+            raise AssertionError(f'improvement factor {factor} was accepted')
+        except ValueError:
+            pass
+
+
+def test_scenario_engine_matches_point_estimate():
+    """Fixed parameters reproduce the point estimate; ranges give ordered percentiles."""
+    from ai_code_metrics.analyzers import ParameterRange, ROIScenarioEngine
+
+    engine = ROIScenarioEngine(durations=[3600.0, 3600.0], costs=[1.0, 2.0, 3.0],
+                               cost_models=['a', 'b'], model_index=[0, 1, 1])
+    point = engine.evaluate([0.5], [10.0], [1.0])
+    assert point['net_savings'][0] == 20.0 - 6.0
+
+    summary = engine.simulate(
+        improvement_factor=ParameterRange(0.1, 0.3, 0.5),
+        hourly_rate=ParameterRange.fixed(10.0),
+        price_change=ParameterRange(0.5, 1.0, 2.0),
+        scenarios=2000,
+        seed=1
+    )
+    percentiles = summary['percentiles']['net_savings']
+    assert percentiles['p5'] <= percentiles['p50'] <= percentiles['p95']
+    assert summary['sensitivity'][0]['parameter'] == 'improvement_factor'
+    assert summary['sensitivity'][-1]['parameter'] == 'hourly_rate'
+    assert summary['sensitivity'][-1]['swing'] == 0
+
+    # Without API cost the engine follows ROICalculator's convention
+    free = ROIScenarioEngine(durations=[3600.0], costs=[], cost_models=[], model_index=[])
+    assert list(free.evaluate([0.0, 0.5], [10.0, 10.0], [1.0, 1.0])['roi_percentage']) == [
+        0.0, float('inf')
+    ]
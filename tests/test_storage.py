@@ -0,0 +1,196 @@
+"""Tests for metrics storage backends."""
+
+import tempfile
+import time
+from pathlib import Path
+
+from ai_code_metrics.analyzers import ROICalculator
+from ai_code_metrics.collectors import MetricsCollector
+from ai_code_metrics.storage import API_USAGE, TIMING, JsonlStore, SQLiteStore
+
+
+def _records(now):
+    timing = [
+        {'function_name': 'a', 'ai_assisted': True, 'success': True, 'duration': 1.0, 'timestamp': now - 300},
+        {'function_name': 'b', 'ai_assisted': False, 'success': True, 'duration': 2.0, 'timestamp': now - 200},
+        {'function_name': 'a', 'ai_assisted': True, 'success': False, 'duration': 4.0, 'timestamp': now - 100},
+    ]
+    api_usage = [
+        {'model': 'gpt-4', 'provider': 'openai', 'total_cost': 1.5, 'input_tokens': 10,
+         'output_tokens': 5, 'duration': 1.0, 'timestamp': now - 250},
+        {'model': 'claude-3-haiku', 'provider': 'anthropic', 'total_cost': 0.5, 'input_tokens': 20,
+         'output_tokens': 1, 'duration': 1.0, 'timestamp': now - 150},
+    ]
+    return timing, api_usage
+
+
+def _fill(store, now):
+    timing, api_usage = _records(now)
+    for record in timing:
+        store.append(TIMING, record)
+    for record in api_usage:
+        store.append(API_USAGE, record)
+    store.flush()
+
+
+def test_sqlite_batches_until_flush():
+    """Appends are buffered until the batch is full or flushed."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = SQLiteStore(Path(temp_dir) / 'metrics.db', batch_size=2, flush_interval=3600)
+        store.append(TIMING, {'function_name': 'a', 'timestamp': 1.0, 'duration': 1.0})
+        assert store._conn.execute('SELECT COUNT(*) FROM timing').fetchone()[0] == 0
+
+        store.append(TIMING, {'function_name': 'b', 'timestamp': 2.0, 'duration': 1.0})
+        assert store._conn.execute('SELECT COUNT(*) FROM timing').fetchone()[0] == 2
+        store.close()
+
+
+def test_sqlite_and_jsonl_queries_agree():
+    """Both backends answer range and group-by queries identically."""
+    now = time.time()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        jsonl = JsonlStore(temp_path / 'jsonl')
+        _fill(jsonl, now)
+
+        with SQLiteStore(temp_path / 'metrics.db') as sqlite:
+            _fill(sqlite, now)
+
+            for store in (jsonl, sqlite):
+                records = list(store.iter_records(TIMING, start=now - 250, end=now - 100))
+                assert [r['function_name'] for r in records] == ['b']
+
+                by_function = store.aggregate(TIMING, group_by=('function_name', 'ai_assisted'))
+                assert [(g['function_name'], g['ai_assisted'], g['count'], g['total_duration'])
+                        for g in by_function] == [('a', True, 2, 5.0), ('b', False, 1, 2.0)]
+
+                by_model = store.aggregate(API_USAGE, group_by=('model',), start=now - 200)
+                assert [(g['model'], g['total_cost'], g['input_tokens']) for g in by_model] == [
+                    ('claude-3-haiku', 0.5, 20)
+                ]
+
+                by_day = store.aggregate(API_USAGE, group_by=('day',))
+                assert by_day[0]['day'] == time.strftime('%Y-%m-%d', time.localtime(now - 250))
+                assert sum(g['count'] for g in by_day) == 2
+
+
+def test_import_jsonl_is_incremental():
+    """Re-running the migration only imports lines appended since."""
+    now = time.time()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        jsonl = JsonlStore(temp_path)
+        _fill(jsonl, now)
+
+        with SQLiteStore(temp_path / 'metrics.db') as sqlite:
+            assert sqlite.import_jsonl(jsonl) == {TIMING: 3, API_USAGE: 2}
+            assert sqlite.import_jsonl(jsonl) == {TIMING: 0, API_USAGE: 0}
+
+            jsonl.append(TIMING, {'function_name': 'c', 'duration': 1.0, 'timestamp': now})
+            assert sqlite.import_jsonl(jsonl) == {TIMING: 1, API_USAGE: 0}
+            assert len(list(sqlite.iter_records(TIMING))) == 4
+
+
+def test_collector_and_roi_with_sqlite_store():
+    """Collectors write through a store and ROI reads back from it."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with SQLiteStore(Path(temp_dir) / 'metrics.db') as store:
+            collector = MetricsCollector(store=store)
+
+            @collector.track_function(ai_assisted=True)
+            def task():
+                return 42
+
+            assert task() == 42
+            roi = ROICalculator(hourly_rate=75.0).calculate_roi_from_store(store)
+            assert roi['metrics_analyzed'] == 1
+
+
+def test_time_index_seeks_into_log():
+    """Appends maintain a sidecar index that range reads seek with."""
+    from ai_code_metrics.storage.index import TimeIndex, index_path, iter_jsonl_window
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = JsonlStore(Path(temp_dir))
+        base = time.time() - 3600
+        # One record every 10 seconds for an hour, with some written out of order
+        timestamps = [base + i * 10 for i in range(360)]
+        for i in range(0, 360, 7):
+            timestamps[i] -= 13
+        for timestamp in timestamps:
+            store.append(TIMING, {'function_name': 'f', 'duration': 1.0, 'timestamp': timestamp})
+
+        log_file = store.files(TIMING)[0]
+        assert index_path(log_file).exists()
+
+        start, end = base + 1200, base + 1500
+        first, last = TimeIndex(log_file).byte_range(start, end)
+        assert 0 < first < last < log_file.stat().st_size
+
+        window = [r['timestamp'] for r in iter_jsonl_window(log_file, start, end)]
+        assert window == [t for t in timestamps if start <= t < end]
+
+        # A log without an index (e.g. from an older version) gets one on first read
+        index_path(log_file).unlink()
+        assert [r['timestamp'] for r in iter_jsonl_window(log_file, start, end)] == window
+        assert index_path(log_file).exists()
+
+
+def test_retention_compresses_and_reads_transparently():
+    """Compressed logs read back like plain ones, with the same import offsets."""
+    import json
+    from datetime import date, timedelta
+
+    from ai_code_metrics.storage import RetentionPolicy
+    from ai_code_metrics.storage.jsonl import iter_jsonl, logical_path
+
+    now = time.time()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        jsonl = JsonlStore(temp_path)
+        _fill(jsonl, now)
+        with SQLiteStore(temp_path / 'metrics.db') as sqlite:
+            assert sqlite.import_jsonl(jsonl) == {TIMING: 3, API_USAGE: 2}
+
+            summary = RetentionPolicy(compress_after_days=1).apply(
+                temp_path, today=date.today() + timedelta(days=2)
+            )
+            assert summary['compressed'] == len(jsonl.files(TIMING)) + len(jsonl.files(API_USAGE))
+            assert all(path.suffix == '.gz' for path in jsonl.files(TIMING))
+
+            records = list(jsonl.iter_records(TIMING, start=now - 250))
+            assert [r['function_name'] for r in records] == ['b', 'a']
+            # Already imported before compression, so nothing is imported twice
+            assert sqlite.import_jsonl(jsonl) == {TIMING: 0, API_USAGE: 0}
+
+        # Lines appended to a compacted day are added to its archive as another stream
+        archive = jsonl.files(TIMING)[-1]
+        late = logical_path(archive)
+        late.write_text(json.dumps({'function_name': 'late', 'timestamp': now}) + '\n')
+        RetentionPolicy(compress_after_days=1).apply(temp_path, today=date.today() + timedelta(days=2))
+        assert jsonl.files(TIMING)[-1] == archive and not late.exists()
+        assert not [p for p in temp_path.iterdir() if p.suffix in ('.compacting', '.tmp')]
+        assert [r['function_name'] for r in iter_jsonl(archive)][-1] == 'late'
+
+
+def test_retention_deletes_by_age_and_size():
+    """Old days are deleted by age, then oldest first until under the size cap."""
+    from datetime import date, timedelta
+
+    from ai_code_metrics.storage import RetentionPolicy
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        today = date.today()
+        for age in range(5):
+            day = (today - timedelta(days=age)).isoformat()
+            (temp_path / f'timing_{day}.jsonl').write_text('{"timestamp": 0}\n' * 100)
+
+        policy = RetentionPolicy(compress_after_days=None, max_age_days=3)
+        assert policy.apply(temp_path, today=today)['deleted'] == 1
+
+        policy = RetentionPolicy(compress_after_days=None, max_total_bytes=2 * 1700)
+        assert policy.apply(temp_path, today=today)['deleted'] == 2
+        assert [p.name for p in JsonlStore(temp_path).files(TIMING)] == [
+            f'timing_{(today - timedelta(days=age)).isoformat()}.jsonl' for age in (1, 0)
+        ]
@@ -75,4 +75,31 @@ def test_timing_exception_handling():
         metric = metrics[0]
         assert metric['function_name'] == 'failing_function'
         assert metric['ai_assisted'] is False
-        assert metric['success'] is False  # Should be false due to the exception
\ No newline at end of file
+        assert metric['success'] is False  # Should be false due to the exception
+
+def test_nested_spans_are_recorded():
+    """Each tracked call records its own span ID, visible to code it calls."""
+    from ai_code_metrics.collectors.timing_metrics import current_span_id
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_path = Path(temp_dir)
+        collector = MetricsCollector(storage_path=temp_path)
+        seen = []
+
+        @collector.track_function()
+        def inner():
+            seen.append(current_span_id())
+
+        @collector.track_function()
+        def outer():
+            inner()
+
+        outer()
+        assert current_span_id() is None
+
+        with open(next(temp_path.glob('timing_*.jsonl'))) as f:
+            metrics = [json.loads(line) for line in f]
+
+        assert [m['function_name'] for m in metrics] == ['inner', 'outer']
+        assert metrics[0]['span_id'] == seen[0]
+        assert metrics[0]['span_id'] != metrics[1]['span_id']